@@ -0,0 +1,57 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import get_settings
+from app.database import Base, database_url
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+url = database_url(get_settings().DATABASE_URL)
+
+# Maintained by Postgres itself and deliberately left unmapped (see 0007_document_full_text_search)
+DATABASE_ONLY = {("documents", "search_vector"), ("documents", "ix_documents_search_vector")}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keep autogenerate from proposing to drop database-maintained objects."""
+    if reflected and compare_to is None and type_ in ("column", "index"):
+        return (obj.table.name, name) not in DATABASE_ONLY
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout instead of connecting (alembic upgrade head --sql)."""
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(url, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
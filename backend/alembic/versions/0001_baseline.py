@@ -0,0 +1,278 @@
+"""Baseline schema (the tables previously created by create_all at startup)
+
+Tables that already exist are left alone, so a database that was bootstrapped
+by the old startup create_all can simply be upgraded.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENUMS = {
+    "clientstatus": ("ACTIVE", "INACTIVE", "PROSPECTIVE"),
+    "casetype": (
+        "CIVIL", "CRIMINAL", "CORPORATE", "FAMILY", "REAL_ESTATE",
+        "IMMIGRATION", "IP", "LABOR", "TAX", "OTHER",
+    ),
+    "casestatus": ("OPEN", "IN_PROGRESS", "PENDING", "CLOSED", "ARCHIVED"),
+    "documenttype": ("CONTRACT", "AGREEMENT", "MOTION", "BRIEF", "LETTER", "NOTICE", "PLEADING", "MEMO", "OTHER"),
+    "invoicestatus": ("DRAFT", "SENT", "PAID", "OVERDUE", "CANCELLED"),
+    "eventtype": ("HEARING", "MEETING", "DEPOSITION", "FILING", "CONSULTATION", "OTHER"),
+    "deadlinepriority": ("LOW", "MEDIUM", "HIGH", "CRITICAL"),
+    "appointmentstatus": ("SCHEDULED", "CONFIRMED", "COMPLETED", "CANCELLED", "MISSED"),
+}
+
+
+def enum(name: str) -> sa.Enum:
+    # Postgres types are created once up front, since documenttype is shared by two tables
+    return sa.Enum(*ENUMS[name], name=name).with_variant(
+        postgresql.ENUM(*ENUMS[name], name=name, create_type=False), "postgresql"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    if bind.dialect.name == "postgresql":
+        for name, values in ENUMS.items():
+            postgresql.ENUM(*values, name=name).create(bind, checkfirst=True)
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("email", sa.String(length=255), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("hashed_password", sa.String(length=255), nullable=False),
+            sa.Column("picture", sa.Text(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("firm_name", sa.String(length=255), nullable=True),
+            sa.Column("bar_number", sa.String(length=100), nullable=True),
+            sa.Column("phone", sa.String(length=50), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "document_templates" not in existing:
+        op.create_table(
+            "document_templates",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("doc_type", enum("documenttype"), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("variables", sa.Text(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("is_system", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "clients" not in existing:
+        op.create_table(
+            "clients",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("email", sa.String(length=255), nullable=True),
+            sa.Column("phone", sa.String(length=50), nullable=True),
+            sa.Column("address", sa.Text(), nullable=True),
+            sa.Column("company", sa.String(length=255), nullable=True),
+            sa.Column("status", enum("clientstatus"), nullable=False),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "calendar_events" not in existing:
+        op.create_table(
+            "calendar_events",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("title", sa.String(length=500), nullable=False),
+            sa.Column("event_type", enum("eventtype"), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("location", sa.String(length=500), nullable=True),
+            sa.Column("start_time", sa.DateTime(), nullable=False),
+            sa.Column("end_time", sa.DateTime(), nullable=False),
+            sa.Column("is_all_day", sa.Boolean(), nullable=False),
+            sa.Column("reminder_minutes", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "cases" not in existing:
+        op.create_table(
+            "cases",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("client_id", sa.String(length=36), nullable=False),
+            sa.Column("title", sa.String(length=500), nullable=False),
+            sa.Column("case_number", sa.String(length=100), nullable=True),
+            sa.Column("case_type", enum("casetype"), nullable=False),
+            sa.Column("status", enum("casestatus"), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("court", sa.String(length=255), nullable=True),
+            sa.Column("judge", sa.String(length=255), nullable=True),
+            sa.Column("opposing_counsel", sa.String(length=255), nullable=True),
+            sa.Column("filing_date", sa.DateTime(), nullable=True),
+            sa.Column("estimated_value", sa.Numeric(precision=12, scale=2), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["client_id"], ["clients.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("case_number"),
+        )
+
+    if "invoices" not in existing:
+        op.create_table(
+            "invoices",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("client_id", sa.String(length=36), nullable=False),
+            sa.Column("invoice_number", sa.String(length=50), nullable=False),
+            sa.Column("status", enum("invoicestatus"), nullable=False),
+            sa.Column("subtotal", sa.Numeric(precision=12, scale=2), nullable=False),
+            sa.Column("tax_rate", sa.Numeric(precision=5, scale=2), nullable=False),
+            sa.Column("tax_amount", sa.Numeric(precision=12, scale=2), nullable=False),
+            sa.Column("total", sa.Numeric(precision=12, scale=2), nullable=False),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("due_date", sa.DateTime(), nullable=True),
+            sa.Column("paid_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["client_id"], ["clients.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("invoice_number"),
+        )
+
+    if "appointments" not in existing:
+        op.create_table(
+            "appointments",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("case_id", sa.String(length=36), nullable=True),
+            sa.Column("client_id", sa.String(length=36), nullable=True),
+            sa.Column("title", sa.String(length=500), nullable=False),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("location", sa.String(length=500), nullable=True),
+            sa.Column("start_time", sa.DateTime(), nullable=False),
+            sa.Column("end_time", sa.DateTime(), nullable=False),
+            sa.Column("status", enum("appointmentstatus"), nullable=False),
+            sa.Column("reminder_minutes", sa.Integer(), nullable=False),
+            sa.Column("auto_follow_up", sa.Boolean(), nullable=False),
+            sa.Column("follow_up_template", sa.Text(), nullable=True),
+            sa.Column("reminder_sent_at", sa.DateTime(), nullable=True),
+            sa.Column("follow_up_created_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["case_id"], ["cases.id"]),
+            sa.ForeignKeyConstraint(["client_id"], ["clients.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "deadlines" not in existing:
+        op.create_table(
+            "deadlines",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("case_id", sa.String(length=36), nullable=True),
+            sa.Column("title", sa.String(length=500), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("due_date", sa.DateTime(), nullable=False),
+            sa.Column("priority", enum("deadlinepriority"), nullable=False),
+            sa.Column("is_completed", sa.Boolean(), nullable=False),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.Column("reminder_days", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["case_id"], ["cases.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "documents" not in existing:
+        op.create_table(
+            "documents",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("case_id", sa.String(length=36), nullable=True),
+            sa.Column("title", sa.String(length=500), nullable=False),
+            sa.Column("doc_type", enum("documenttype"), nullable=False),
+            sa.Column("content", sa.Text(), nullable=True),
+            sa.Column("file_path", sa.Text(), nullable=True),
+            sa.Column("ai_summary", sa.Text(), nullable=True),
+            sa.Column("ai_risk_flags", sa.Text(), nullable=True),
+            sa.Column("template_id", sa.String(length=36), nullable=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["case_id"], ["cases.id"]),
+            sa.ForeignKeyConstraint(["template_id"], ["document_templates.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "invoice_items" not in existing:
+        op.create_table(
+            "invoice_items",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("invoice_id", sa.String(length=36), nullable=False),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("quantity", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("rate", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("amount", sa.Numeric(precision=12, scale=2), nullable=False),
+            sa.ForeignKeyConstraint(["invoice_id"], ["invoices.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "time_entries" not in existing:
+        op.create_table(
+            "time_entries",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("case_id", sa.String(length=36), nullable=True),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("hours", sa.Numeric(precision=6, scale=2), nullable=False),
+            sa.Column("rate", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("date", sa.DateTime(), nullable=False),
+            sa.Column("is_billable", sa.Boolean(), nullable=False),
+            sa.Column("is_billed", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["case_id"], ["cases.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade() -> None:
+    for table in (
+        "time_entries", "invoice_items", "documents", "deadlines", "appointments",
+        "invoices", "cases", "calendar_events", "clients", "document_templates",
+    ):
+        op.drop_table(table)
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for name, values in ENUMS.items():
+            postgresql.ENUM(*values, name=name).drop(bind, checkfirst=True)
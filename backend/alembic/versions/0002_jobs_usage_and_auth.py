@@ -0,0 +1,97 @@
+"""Research history, job checkpoints, AI usage, auth attempts and token versions
+
+Like the baseline, anything that already exists (created by the old startup
+create_all) is skipped.
+
+Revision ID: 0002_jobs_usage_and_auth
+Revises: 0001_baseline
+Create Date: 2026-10-19 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_jobs_usage_and_auth"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    if "token_version" not in {c["name"] for c in inspector.get_columns("users")}:
+        op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="1"))
+    if "ai_analyzed_version" not in {c["name"] for c in inspector.get_columns("documents")}:
+        op.add_column("documents", sa.Column("ai_analyzed_version", sa.Integer(), nullable=True))
+
+    if "research_history" not in existing:
+        op.create_table(
+            "research_history",
+            sa.Column("id", sa.String(length=36), nullable=False),
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("query", sa.Text(), nullable=False),
+            sa.Column("jurisdiction", sa.String(length=255), nullable=True),
+            sa.Column("area_of_law", sa.String(length=255), nullable=True),
+            sa.Column("include_case_law", sa.Boolean(), nullable=False),
+            sa.Column("include_statutes", sa.Boolean(), nullable=False),
+            sa.Column("request_hash", sa.String(length=64), nullable=False),
+            sa.Column("response", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_research_history_user_created", "research_history", ["user_id", "created_at"])
+        op.create_index("ix_research_history_user_hash", "research_history", ["user_id", "request_hash"])
+
+    if "job_checkpoints" not in existing:
+        op.create_table(
+            "job_checkpoints",
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("cursor", sa.String(length=255), nullable=True),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("run_started_at", sa.DateTime(), nullable=True),
+            sa.Column("processed", sa.Integer(), nullable=False),
+            sa.Column("failed", sa.Integer(), nullable=False),
+            sa.Column("tokens_used", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+    if "ai_usage" not in existing:
+        op.create_table(
+            "ai_usage",
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("period", sa.Date(), nullable=False),
+            sa.Column("tokens", sa.BigInteger(), nullable=False),
+            sa.Column("requests", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id", "period"),
+        )
+
+    if "auth_attempts" not in existing:
+        op.create_table(
+            "auth_attempts",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("key", sa.String(length=320), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_auth_attempts_key_created_at", "auth_attempts", ["key", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("auth_attempts")
+    op.drop_table("ai_usage")
+    op.drop_table("job_checkpoints")
+    op.drop_table("research_history")
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.drop_column("ai_analyzed_version")
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("token_version")
@@ -0,0 +1,59 @@
+"""Composite indexes for the per-user access paths, plus foreign key indexes
+
+Every list endpoint filters on user_id and orders by a timestamp, so each
+table gets a (user_id, <sort column>) index that serves both. Deadlines also
+lead with is_completed, which the dashboard and case automation filter on.
+Foreign keys used for joins, per-parent filters and cascading deletes get
+their own index. On Postgres the indexes are built CONCURRENTLY so upgrading
+a live database does not block writes.
+
+Revision ID: 0003_access_path_indexes
+Revises: 0002_jobs_usage_and_auth
+Create Date: 2026-10-19 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_access_path_indexes"
+down_revision: Union[str, None] = "0002_jobs_usage_and_auth"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_clients_user_created", "clients", ["user_id", "created_at"]),
+    ("ix_cases_user_created", "cases", ["user_id", "created_at"]),
+    ("ix_cases_client_id", "cases", ["client_id"]),
+    ("ix_documents_user_created", "documents", ["user_id", "created_at"]),
+    ("ix_documents_case_id", "documents", ["case_id"]),
+    ("ix_documents_template_id", "documents", ["template_id"]),
+    ("ix_invoices_user_created", "invoices", ["user_id", "created_at"]),
+    ("ix_invoices_client_id", "invoices", ["client_id"]),
+    ("ix_invoice_items_invoice_id", "invoice_items", ["invoice_id"]),
+    ("ix_time_entries_user_date", "time_entries", ["user_id", "date"]),
+    ("ix_time_entries_case_id", "time_entries", ["case_id"]),
+    ("ix_calendar_events_user_start", "calendar_events", ["user_id", "start_time"]),
+    ("ix_deadlines_user_completed_due", "deadlines", ["user_id", "is_completed", "due_date"]),
+    ("ix_deadlines_case_id", "deadlines", ["case_id"]),
+    ("ix_appointments_user_start", "appointments", ["user_id", "start_time"]),
+    ("ix_appointments_case_id", "appointments", ["case_id"]),
+    ("ix_appointments_client_id", "appointments", ["client_id"]),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
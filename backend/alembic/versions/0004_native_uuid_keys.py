@@ -0,0 +1,93 @@
+"""Native UUID primary and foreign keys instead of VARCHAR(36)
+
+On Postgres every id column is converted in place with `USING column::uuid`;
+the foreign keys are dropped first and recreated afterwards because both sides
+of a constraint must change type together. Indexes and primary keys are
+rebuilt by the ALTER itself, at 16 bytes per key instead of 37. The table is
+rewritten, so run this in a maintenance window on large databases. SQLite has
+no UUID type and stores the 32-character hex form that SQLAlchemy's Uuid uses.
+
+Existing ids keep their (v4) values; new rows get time-ordered v7 ids.
+
+Revision ID: 0004_native_uuid_keys
+Revises: 0003_access_path_indexes
+Create Date: 2026-10-19 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_native_uuid_keys"
+down_revision: Union[str, None] = "0003_access_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ID_COLUMNS = {
+    "users": ["id"],
+    "clients": ["id", "user_id"],
+    "cases": ["id", "user_id", "client_id"],
+    "document_templates": ["id"],
+    "documents": ["id", "user_id", "case_id", "template_id"],
+    "invoices": ["id", "user_id", "client_id"],
+    "invoice_items": ["id", "invoice_id"],
+    "time_entries": ["id", "user_id", "case_id"],
+    "calendar_events": ["id", "user_id"],
+    "deadlines": ["id", "user_id", "case_id"],
+    "appointments": ["id", "user_id", "case_id", "client_id"],
+    "research_history": ["id", "user_id"],
+    "ai_usage": ["user_id"],
+}
+
+
+def _foreign_keys(bind) -> list[tuple[str, dict]]:
+    inspector = sa.inspect(bind)
+    return [(table, fk) for table in ID_COLUMNS for fk in inspector.get_foreign_keys(table) if fk["name"]]
+
+
+def _convert_postgres(column_type: str, cast: str) -> None:
+    bind = op.get_bind()
+    foreign_keys = _foreign_keys(bind)
+    for table, fk in foreign_keys:
+        op.drop_constraint(fk["name"], table, type_="foreignkey")
+    for table, columns in ID_COLUMNS.items():
+        op.execute(
+            f"ALTER TABLE {table} "
+            + ", ".join(f"ALTER COLUMN {column} TYPE {column_type} USING {column}::{cast}" for column in columns)
+        )
+    for table, fk in foreign_keys:
+        op.create_foreign_key(
+            fk["name"], table, fk["referred_table"], fk["constrained_columns"], fk["referred_columns"],
+            **fk.get("options", {}),
+        )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _convert_postgres("uuid", "uuid")
+        return
+    for table, columns in ID_COLUMNS.items():
+        for column in columns:
+            op.execute(f"UPDATE {table} SET {column} = replace({column}, '-', '') WHERE {column} IS NOT NULL")
+        with op.batch_alter_table(table) as batch:
+            for column in columns:
+                batch.alter_column(column, type_=sa.Uuid(as_uuid=False), existing_type=sa.String(length=36))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _convert_postgres("varchar(36)", "text")
+        return
+    for table, columns in ID_COLUMNS.items():
+        with op.batch_alter_table(table) as batch:
+            for column in columns:
+                batch.alter_column(column, type_=sa.String(length=36), existing_type=sa.Uuid(as_uuid=False))
+        for column in columns:
+            op.execute(
+                f"UPDATE {table} SET {column} = substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' "
+                f"|| substr({column}, 13, 4) || '-' || substr({column}, 17, 4) || '-' || substr({column}, 21) "
+                f"WHERE {column} IS NOT NULL"
+            )
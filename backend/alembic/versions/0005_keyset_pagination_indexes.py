@@ -0,0 +1,63 @@
+"""Access-path indexes end in id, so keyset pages are read straight from the index
+
+List endpoints page on (sort column, id) with a row comparison. Appending id to
+the per-user indexes lets Postgres seek to the cursor and read the page in
+order without a sort. Deadlines get a (user_id, due_date, id) index for the
+unfiltered calendar listing; the is_completed one stays for the dashboard.
+Built CONCURRENTLY on Postgres, new index before the old one is dropped.
+
+Revision ID: 0005_keyset_pagination_indexes
+Revises: 0004_native_uuid_keys
+Create Date: 2026-10-19 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_keyset_pagination_indexes"
+down_revision: Union[str, None] = "0004_native_uuid_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns before, columns after); None = no such index on that side
+INDEXES = [
+    ("ix_clients_user_created", "clients", ["user_id", "created_at"], ["user_id", "created_at", "id"]),
+    ("ix_cases_user_created", "cases", ["user_id", "created_at"], ["user_id", "created_at", "id"]),
+    ("ix_documents_user_created", "documents", ["user_id", "created_at"], ["user_id", "created_at", "id"]),
+    ("ix_invoices_user_created", "invoices", ["user_id", "created_at"], ["user_id", "created_at", "id"]),
+    ("ix_time_entries_user_date", "time_entries", ["user_id", "date"], ["user_id", "date", "id"]),
+    ("ix_calendar_events_user_start", "calendar_events", ["user_id", "start_time"], ["user_id", "start_time", "id"]),
+    ("ix_appointments_user_start", "appointments", ["user_id", "start_time"], ["user_id", "start_time", "id"]),
+    ("ix_deadlines_user_due", "deadlines", None, ["user_id", "due_date", "id"]),
+]
+
+
+def _swap(name: str, table: str, old: list[str] | None, new: list[str] | None) -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        if old is not None:
+            op.drop_index(name, table_name=table)
+        if new is not None:
+            op.create_index(name, table, new)
+        return
+    # The old index keeps serving reads until its replacement is built
+    if new is not None:
+        op.create_index(f"{name}_new", table, new, postgresql_concurrently=True)
+    if old is not None:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    if new is not None:
+        op.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, old, new in INDEXES:
+            _swap(name, table, old, new)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, old, new in reversed(INDEXES):
+            _swap(name, table, new, old)
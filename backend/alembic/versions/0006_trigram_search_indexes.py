@@ -0,0 +1,54 @@
+"""pg_trgm GIN indexes for substring search and import matching
+
+`search` on the case, client and document lists is ILIKE '%term%', which no
+B-tree can serve; trigram GIN indexes can, and also back the similarity
+ranking. The imports' case-insensitive title matches use the same indexes.
+Creating the extension needs a role allowed to do so (the database owner on
+managed Postgres). Postgres only; SQLite keeps scanning.
+
+Revision ID: 0006_trigram_search_indexes
+Revises: 0005_keyset_pagination_indexes
+Create Date: 2026-10-19 00:00:05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_trigram_search_indexes"
+down_revision: Union[str, None] = "0005_keyset_pagination_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_cases_title_trgm", "cases", "title"),
+    ("ix_cases_case_number_trgm", "cases", "case_number"),
+    ("ix_clients_name_trgm", "clients", "name"),
+    ("ix_clients_email_trgm", "clients", "email"),
+    ("ix_clients_company_trgm", "clients", "company"),
+    ("ix_documents_title_trgm", "documents", "title"),
+    ("ix_calendar_events_title_trgm", "calendar_events", "title"),
+    ("ix_deadlines_title_trgm", "deadlines", "title"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name, table, [column],
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,50 @@
+"""Full-text search over document titles and bodies
+
+Adds `documents.search_vector`, a stored generated tsvector (title weighted A,
+content weighted B), and a GIN index on it. Postgres recomputes the vector as
+part of every INSERT/UPDATE of a row, so the index is maintained incrementally
+on save with no triggers or application code. Adding a stored column rewrites
+the documents table once. The column is not mapped by the ORM; see
+app.services.search. Postgres only.
+
+Revision ID: 0007_document_full_text_search
+Revises: 0006_trigram_search_indexes
+Create Date: 2026-10-19 00:00:06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_document_full_text_search"
+down_revision: Union[str, None] = "0006_trigram_search_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        f"ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_search_vector", "documents", ["search_vector"],
+            postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index("ix_documents_search_vector", table_name="documents")
+    op.drop_column("documents", "search_vector")
@@ -0,0 +1,101 @@
+"""Monthly range partitions for time_entries (date) and appointments (start_time)
+
+Both tables only grow, and their hot queries (this month's hours, the
+appointment automation window, the upcoming list) touch a few recent months.
+Each table is rebuilt as a partitioned table with one partition per month from
+the earliest row to 12 months ahead, plus a DEFAULT partition for anything
+outside that range; app.services.partitions keeps adding future months.
+
+Postgres requires the partition key in every unique constraint, so the primary
+keys become (id, date) and (id, start_time). Indexes and foreign keys are added
+after the copy and cascade to every partition. The copy rewrites both tables
+under an exclusive lock: run this in a maintenance window on large databases.
+SQLite has no partitioning and is left unchanged.
+
+Revision ID: 0008_partition_time_entries_appointments
+Revises: 0007_document_full_text_search
+Create Date: 2026-10-19 00:00:07
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_partition_time_entries_appointments"
+down_revision: Union[str, None] = "0007_document_full_text_search"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 12
+
+# table -> (partition column, foreign keys, indexes)
+TABLES = {
+    "time_entries": (
+        "date",
+        [("user_id", "users"), ("case_id", "cases")],
+        [("ix_time_entries_user_date", ["user_id", "date", "id"]), ("ix_time_entries_case_id", ["case_id"])],
+    ),
+    "appointments": (
+        "start_time",
+        [("user_id", "users"), ("case_id", "cases"), ("client_id", "clients")],
+        [
+            ("ix_appointments_user_start", ["user_id", "start_time", "id"]),
+            ("ix_appointments_case_id", ["case_id"]),
+            ("ix_appointments_client_id", ["client_id"]),
+        ],
+    ),
+}
+
+
+def _month(day: date, months_ahead: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 + months_ahead
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    column, foreign_keys, indexes = TABLES[table]
+    new = f"{table}_rebuilt"
+    if partitioned:
+        op.execute(f'CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ("{column}")')
+        oldest = op.get_bind().scalar(sa.text(f'SELECT min("{column}") FROM {table}'))
+        first = _month(min(oldest or datetime.utcnow(), datetime.utcnow()))
+        last = _month(datetime.utcnow(), MONTHS_AHEAD)
+        month = first
+        while month <= last:
+            following = _month(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {new} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+            )
+            month = following
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {new} DEFAULT")
+    else:
+        op.execute(f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS)")
+
+    op.execute(f"INSERT INTO {new} SELECT * FROM {table}")
+    op.drop_table(table)
+    op.rename_table(new, table)
+
+    op.create_primary_key(f"{table}_pkey", table, ["id", column] if partitioned else ["id"])
+    for local, remote in foreign_keys:
+        op.create_foreign_key(f"{table}_{local}_fkey", table, remote, [local], ["id"])
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in TABLES:
+        _rebuild(table, partitioned=False)
@@ -0,0 +1,48 @@
+"""Per-user dashboard totals maintained on write
+
+GET /dashboard/stats read eight count/sum aggregates over clients, cases,
+documents, invoices and time entries on every load. dashboard_stats holds those
+totals per user, updated in the writing transaction by the ORM flush hook in
+app.services.dashboard_stats. The table starts empty: the reconciler fills it
+when the backend starts, and until then the endpoint counts live.
+
+Revision ID: 0009_dashboard_stats
+Revises: 0008_partition_time_entries_appointments
+Create Date: 2026-10-19 00:00:08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_dashboard_stats"
+down_revision: Union[str, None] = "0008_partition_time_entries_appointments"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dashboard_stats",
+        sa.Column("user_id", sa.Uuid(as_uuid=False), nullable=False),
+        sa.Column("active_clients", sa.Integer(), nullable=False),
+        sa.Column("open_cases", sa.Integer(), nullable=False),
+        sa.Column("documents", sa.Integer(), nullable=False),
+        sa.Column("pending_invoices", sa.Integer(), nullable=False),
+        sa.Column("total_billed", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("total_collected", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("outstanding", sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column("billable_hours_month", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column("hours_month", sa.Date(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("reconciled_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dashboard_stats")
@@ -0,0 +1,120 @@
+"""ON DELETE CASCADE / SET NULL foreign keys and soft-delete columns
+
+Deleting a client or case used to load every child row into the session so the
+ORM could delete them one by one. The foreign keys now carry the delete rule
+themselves (the relationships use passive_deletes=True), so a delete is one
+statement and the database removes or detaches the children.
+
+On Postgres each constraint is swapped under its existing name in a single
+ALTER and added NOT VALID, which holds the table lock only briefly. The swaps
+commit first; each VALIDATE then runs in its own autocommit transaction, so the
+full scan of the child table takes only a lock that lets writes continue.
+Partitioned tables do not support NOT VALID foreign keys and are validated as
+they are added. SQLite constraints are unnamed and immutable, so the tables
+are rebuilt with the new rules.
+
+clients, invoices and appointments also get a nullable deleted_at for the
+optional soft-delete mode (SOFT_DELETE_RETENTION_DAYS), with a partial index
+for the purge job.
+
+Revision ID: 0010_database_cascades
+Revises: 0009_dashboard_stats
+Create Date: 2026-10-19 00:00:09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_database_cascades"
+down_revision: Union[str, None] = "0009_dashboard_stats"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> [(column, referred table, ON DELETE rule)]
+FOREIGN_KEYS = {
+    "clients": [("user_id", "users", "CASCADE")],
+    "cases": [("user_id", "users", "CASCADE"), ("client_id", "clients", "CASCADE")],
+    "documents": [
+        ("user_id", "users", "CASCADE"), ("case_id", "cases", "CASCADE"),
+        ("template_id", "document_templates", "SET NULL"),
+    ],
+    "invoices": [("user_id", "users", "CASCADE"), ("client_id", "clients", "CASCADE")],
+    "invoice_items": [("invoice_id", "invoices", "CASCADE")],
+    "time_entries": [("user_id", "users", "CASCADE"), ("case_id", "cases", "CASCADE")],
+    "calendar_events": [("user_id", "users", "CASCADE")],
+    "deadlines": [("user_id", "users", "CASCADE"), ("case_id", "cases", "CASCADE")],
+    "appointments": [
+        ("user_id", "users", "CASCADE"), ("case_id", "cases", "SET NULL"), ("client_id", "clients", "SET NULL"),
+    ],
+    "research_history": [("user_id", "users", "CASCADE")],
+    "ai_usage": [("user_id", "users", "CASCADE")],
+    "dashboard_stats": [("user_id", "users", "CASCADE")],
+}
+SOFT_DELETE_TABLES = ("clients", "invoices", "appointments")
+# Names for SQLite's unnamed constraints while the tables are rebuilt
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _swap_postgres(cascading: bool) -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    to_validate = []
+    for table, rules in FOREIGN_KEYS.items():
+        partitioned = bind.scalar(
+            sa.text("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)"), {"table": table}
+        )
+        names = {
+            fk["constrained_columns"][0]: fk["name"]
+            for fk in inspector.get_foreign_keys(table) if len(fk["constrained_columns"]) == 1
+        }
+        for column, remote, rule in rules:
+            name = names.get(column, f"{table}_{column}_fkey")
+            drop = f"DROP CONSTRAINT IF EXISTS {name}, " if column in names else ""
+            on_delete = f" ON DELETE {rule}" if cascading else ""
+            not_valid = "" if partitioned else " NOT VALID"
+            op.execute(
+                f"ALTER TABLE {table} {drop}ADD CONSTRAINT {name} "
+                f"FOREIGN KEY ({column}) REFERENCES {remote} (id){on_delete}{not_valid}"
+            )
+            if not partitioned:
+                to_validate.append((table, name))
+    # Outside the migration transaction: holding the ADDs' ACCESS EXCLUSIVE locks through the scans would block writes
+    with op.get_context().autocommit_block():
+        for table, name in to_validate:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def _rebuild_sqlite(cascading: bool) -> None:
+    for table, rules in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, naming_convention=SQLITE_NAMING, recreate="always") as batch:
+            for column, remote, rule in rules:
+                name = f"fk_{table}_{column}_{remote}"
+                batch.drop_constraint(name, type_="foreignkey")
+                batch.create_foreign_key(name, remote, [column], ["id"], ondelete=rule if cascading else None)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _swap_postgres(cascading=True)
+    else:
+        _rebuild_sqlite(cascading=True)
+    for table in SOFT_DELETE_TABLES:
+        op.add_column(table, sa.Column("deleted_at", sa.DateTime(), nullable=True))
+        op.create_index(
+            f"ix_{table}_deleted_at", table, ["deleted_at"], postgresql_where=sa.text("deleted_at IS NOT NULL")
+        )
+
+
+def downgrade() -> None:
+    for table in SOFT_DELETE_TABLES:
+        op.drop_index(f"ix_{table}_deleted_at", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("deleted_at")
+    if op.get_bind().dialect.name == "postgresql":
+        _swap_postgres(cascading=False)
+    else:
+        _rebuild_sqlite(cascading=False)
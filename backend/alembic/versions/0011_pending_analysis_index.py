@@ -0,0 +1,41 @@
+"""Partial index over documents waiting for batch analysis
+
+GET /documents/analysis/batch reports how many of the caller's documents still
+need analysis. The partial index holds only those documents, keyed by owner,
+so the count reads the caller's pending entries instead of scanning the
+table on every poll. Built CONCURRENTLY on Postgres; SQLite gets a plain
+user_id index.
+
+Revision ID: 0011_pending_analysis_index
+Revises: 0010_database_cascades
+Create Date: 2026-10-19 00:00:10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_pending_analysis_index"
+down_revision: Union[str, None] = "0010_database_cascades"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = "content IS NOT NULL AND content <> '' AND (ai_summary IS NULL OR ai_analyzed_version < version)"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_documents_pending_analysis", "documents", ["user_id"],
+                postgresql_where=sa.text(PENDING), postgresql_concurrently=True, if_not_exists=True,
+            )
+    else:
+        op.create_index("ix_documents_pending_analysis", "documents", ["user_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_pending_analysis", table_name="documents")
@@ -0,0 +1,33 @@
+"""Soft-delete column for cases
+
+In soft-delete mode a client's cases are marked with it rather than deleted,
+so the cascade to their documents, time entries and deadlines runs in the
+purge job instead of the request. Nullable, with a partial index for the purge.
+
+Revision ID: 0012_case_soft_delete
+Revises: 0011_pending_analysis_index
+Create Date: 2026-10-19 00:00:11
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_case_soft_delete"
+down_revision: Union[str, None] = "0011_pending_analysis_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("cases", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_cases_deleted_at", "cases", ["deleted_at"], postgresql_where=sa.text("deleted_at IS NOT NULL"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cases_deleted_at", table_name="cases")
+    with op.batch_alter_table("cases") as batch:
+        batch.drop_column("deleted_at")
@@ -0,0 +1,34 @@
+"""updated_at for time entries
+
+The local completion model reads rows in updated_at order, so an edited
+time entry's description is learned again instead of never. Existing rows
+start from their created_at.
+
+Revision ID: 0013_time_entry_updated_at
+Revises: 0012_case_soft_delete
+Create Date: 2026-10-19 00:00:12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_time_entry_updated_at"
+down_revision: Union[str, None] = "0012_case_soft_delete"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("time_entries", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE time_entries SET updated_at = created_at")
+    with op.batch_alter_table("time_entries") as batch:
+        batch.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("time_entries") as batch:
+        batch.drop_column("updated_at")
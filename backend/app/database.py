@@ -1,21 +1,135 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import os
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session, raiseload, sessionmaker
 
 from app.config import get_settings
+from app.services.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, register_pool
+from app.services.query_stats import instrument_engine
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+# psycopg 3 serves both engines; URLs without an explicit driver would otherwise pick psycopg2
+SYNC_DRIVERS = {"postgresql": "postgresql+psycopg"}
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def database_url(url: str, drivers: dict[str, str] = SYNC_DRIVERS) -> str:
+    parsed = make_url(url)
+    driver = drivers.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "echo": settings.DB_ECHO,
+}
+
+# Sync engine for scripts, the seed, startup DDL and background jobs running in worker threads
+engine = create_engine(database_url(settings.DATABASE_URL), poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+register_pool("sync", engine.pool)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by every request handler via get_db
+async_engine = create_async_engine(
+    database_url(settings.DATABASE_URL, ASYNC_DRIVERS), poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+)
+register_pool("async", async_engine.sync_engine.pool)
+# Objects stay readable after commit, so handlers can return them without another round trip
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Optional read replica, used by get_read_db; without one reads share the primary
+replica_engine = None
+ReplicaSessionLocal = AsyncSessionLocal
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        database_url(settings.DATABASE_REPLICA_URL, ASYNC_DRIVERS), poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS
+    )
+    register_pool("replica", replica_engine.sync_engine.pool)
+    ReplicaSessionLocal = async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+
+    if replica_engine.dialect.name == "postgresql":
+        @event.listens_for(replica_engine.sync_engine, "connect")
+        def _read_only(dbapi_connection, connection_record):
+            # A handler that writes through get_read_db fails loudly, even when the "replica" is the primary
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+            cursor.close()
+            dbapi_connection.commit()
+
+if engine.dialect.name == "sqlite":
+    def _enforce_foreign_keys(dbapi_connection, connection_record):
+        # SQLite ignores ON DELETE CASCADE / SET NULL unless asked per connection
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    for _engine in (engine, async_engine.sync_engine):
+        event.listen(_engine, "connect", _enforce_foreign_keys)
+
+# ENVIRONMENT=test on Postgres: every connection works in a scratch schema, created and dropped by app.testing
+TEST_SCHEMA = None
+if settings.ENVIRONMENT == "test" and make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+    TEST_SCHEMA = settings.TEST_DATABASE_SCHEMA or f"test_{os.getpid()}"
+
+    def _use_test_schema(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'SET search_path TO "{TEST_SCHEMA}", public')
+        cursor.close()
+        dbapi_connection.commit()
+
+    for _engine in (engine, async_engine.sync_engine):
+        event.listen(_engine, "connect", _use_test_schema)
+
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    for _engine in (engine, async_engine.sync_engine, replica_engine and replica_engine.sync_engine):
+        if _engine is not None:
+            instrument_engine(_engine)
+
+if settings.SQL_RAISELOAD:
+    @event.listens_for(Session, "do_orm_execute")
+    def _raiseload_by_default(execute_state):
+        # Relationships not named in selectinload/joinedload raise instead of lazily querying per row
+        if execute_state.is_select and not execute_state.is_column_load and not execute_state.is_relationship_load:
+            execute_state.statement = execute_state.statement.options(raiseload("*"))
+
+# Set after a successful write so the client's next reads stay on the primary while the replica catches up
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def reads_from_primary(request: Request) -> bool:
+    """True when the client wrote recently or asked for read-your-writes with `X-Consistency: primary`."""
+    if request.headers.get("x-consistency", "").lower() == "primary":
+        return True
     try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request):
+    """Session for read-only handlers: the replica when configured, unless the client must see its own writes."""
+    session_factory = AsyncSessionLocal if reads_from_primary(request) else ReplicaSessionLocal
+    async with session_factory() as db:
         yield db
-    finally:
-        db.close()
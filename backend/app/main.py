@@ -1,11 +1,24 @@
-from fastapi import FastAPI
+import logging
+import time
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import DataError
 
 from app.config import get_settings
-from app.database import engine, Base
+from app.database import PRIMARY_STICKY_COOKIE, async_engine, replica_engine
 from app.routers import auth, clients, cases, documents, billing, calendar, ai, dashboard
+from app.services.auth import get_current_user
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.pool_metrics import get_pool_metrics
+from app.services.query_stats import check_budget, start_request
+from app.services.quota import QuotaExceeded, flush_usage, load_usage
+from app.services.scheduler import start_scheduler, shutdown_scheduler
 
 settings = get_settings()
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)  # DB_ECHO still turns statement logging on
+access_log = logging.getLogger("app.access")
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -18,17 +31,66 @@ app = FastAPI(
 # CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        settings.FRONTEND_URL,
-        settings.FRONTEND_URL_HTTPS,
-        "http://localhost:3000",
-        "https://localhost:3000",
-    ],
+    allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+
+@app.middleware("http")
+async def primary_stickiness(request: Request, call_next):
+    """After a successful write, keep this client's reads on the primary for DB_REPLICA_STICKY_SECONDS."""
+    response = await call_next(request)
+    if replica_engine is not None and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            str(time.time() + settings.DB_REPLICA_STICKY_SECONDS),
+            max_age=settings.DB_REPLICA_STICKY_SECONDS,
+            httponly=True,
+            secure=settings.COOKIE_SECURE,
+            samesite="lax",
+        )
+    return response
+
+
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    @app.middleware("http")
+    async def sql_instrumentation(request: Request, call_next):
+        """Report the request's query count, DB time and slowest statement, and enforce its query budget."""
+        stats = start_request(request.scope)
+        started = time.perf_counter()
+        response = await call_next(request)
+        elapsed = (time.perf_counter() - started) * 1000
+        response.headers["Server-Timing"] = f"{stats.server_timing()}, app;dur={elapsed:.1f}"
+        access_log.info(
+            "%s %s %s %.1fms queries=%d db=%.1fms slowest=%.1fms",
+            request.method,
+            stats.route,
+            response.status_code,
+            elapsed,
+            stats.count,
+            stats.total * 1000,
+            stats.slowest * 1000,
+        )
+        check_budget(stats)
+        return response
+
+
+@app.exception_handler(QuotaExceeded)
+async def quota_exceeded_handler(request: Request, exc: QuotaExceeded):
+    return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+
+@app.exception_handler(DataError)
+async def malformed_id_handler(request: Request, exc: DataError):
+    """A malformed id can never match a UUID key; answer 404 as for any other unknown id."""
+    if "type uuid" not in str(exc.orig):
+        raise exc
+    return JSONResponse(status_code=404, content={"detail": "Not found"})
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(clients.router, prefix="/api")
@@ -42,10 +104,29 @@ app.include_router(dashboard.router, prefix="/api")
 
 @app.on_event("startup")
 async def startup():
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # The schema is managed by Alembic (`alembic upgrade head`); startup issues no DDL
+    load_usage()
+    start_scheduler()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    shutdown_scheduler()
+    flush_usage()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "version": settings.APP_VERSION}
+
+
+@app.get("/api/health/db", dependencies=[Depends(get_current_user)])
+async def database_health():
+    """Connection pool usage per engine (checkout wait, in-use and overflow counts).
+
+    Requires a signed-in user: pool sizing and replica state are not for anonymous callers.
+    """
+    return {"pools": get_pool_metrics()}
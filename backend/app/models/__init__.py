@@ -4,6 +4,11 @@ from app.models.case import Case
 from app.models.document import Document, DocumentTemplate
 from app.models.billing import Invoice, InvoiceItem, TimeEntry
 from app.models.calendar import CalendarEvent, Deadline, Appointment
+from app.models.research import ResearchHistory
+from app.models.job import JobCheckpoint
+from app.models.usage import AIUsage
+from app.models.auth_attempt import AuthAttempt
+from app.models.dashboard import DashboardStats
 
 __all__ = [
     "User",
@@ -17,4 +22,9 @@ __all__ = [
     "CalendarEvent",
     "Deadline",
     "Appointment",
+    "ResearchHistory",
+    "JobCheckpoint",
+    "AIUsage",
+    "AuthAttempt",
+    "DashboardStats",
 ]
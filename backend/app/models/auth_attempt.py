@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class AuthAttempt(Base):
+    """One login/registration attempt, used when throttling is shared between workers."""
+
+    __tablename__ = "auth_attempts"
+    __table_args__ = (Index("ix_auth_attempts_key_created_at", "key", "created_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    key: Mapped[str] = mapped_column(String(320))  # "ip:<address>" or "email:<address>"
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
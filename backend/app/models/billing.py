@@ -1,8 +1,8 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Numeric, Integer
+from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Numeric, Integer, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.ids import UUIDStr, new_id
 import enum
 
 
@@ -16,10 +16,14 @@ class InvoiceStatus(str, enum.Enum):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_user_created", "user_id", "created_at", "id"),
+        Index("ix_invoices_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
-    client_id: Mapped[str] = mapped_column(String(36), ForeignKey("clients.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    client_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
     invoice_number: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
     status: Mapped[InvoiceStatus] = mapped_column(SAEnum(InvoiceStatus), default=InvoiceStatus.DRAFT)
     subtotal: Mapped[float] = mapped_column(Numeric(12, 2), default=0)
@@ -31,18 +35,19 @@ class Invoice(Base):
     paid_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Set in soft-delete mode until purged
 
     # Relationships
     user = relationship("User", back_populates="invoices")
     client = relationship("Client", back_populates="invoices")
-    items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
+    items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    invoice_id: Mapped[str] = mapped_column(String(36), ForeignKey("invoices.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    invoice_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False, index=True)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     quantity: Mapped[float] = mapped_column(Numeric(10, 2), default=1)
     rate: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
@@ -54,17 +59,20 @@ class InvoiceItem(Base):
 
 class TimeEntry(Base):
     __tablename__ = "time_entries"
+    __table_args__ = (Index("ix_time_entries_user_date", "user_id", "date", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
-    case_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("cases.id"), nullable=True)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    case_id: Mapped[str | None] = mapped_column(UUIDStr, ForeignKey("cases.id", ondelete="CASCADE"), nullable=True, index=True)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     hours: Mapped[float] = mapped_column(Numeric(6, 2), nullable=False)
     rate: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
-    date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Partition key on Postgres (monthly ranges), so part of the primary key there too
+    date: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     is_billable: Mapped[bool] = mapped_column(default=True)
     is_billed: Mapped[bool] = mapped_column(default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", back_populates="time_entries")
@@ -1,8 +1,9 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Boolean
+from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Boolean, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.ids import UUIDStr, new_id
+from app.models.search import trigram_index
 import enum
 
 
@@ -32,9 +33,13 @@ class AppointmentStatus(str, enum.Enum):
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        Index("ix_calendar_events_user_start", "user_id", "start_time", "id"),
+        trigram_index("ix_calendar_events_title_trgm", "title"),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     event_type: Mapped[EventType] = mapped_column(SAEnum(EventType), default=EventType.OTHER)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -51,10 +56,15 @@ class CalendarEvent(Base):
 
 class Deadline(Base):
     __tablename__ = "deadlines"
+    __table_args__ = (
+        Index("ix_deadlines_user_completed_due", "user_id", "is_completed", "due_date"),
+        Index("ix_deadlines_user_due", "user_id", "due_date", "id"),
+        trigram_index("ix_deadlines_title_trgm", "title"),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
-    case_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("cases.id"), nullable=True)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    case_id: Mapped[str | None] = mapped_column(UUIDStr, ForeignKey("cases.id", ondelete="CASCADE"), nullable=True, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     due_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -73,15 +83,20 @@ class Deadline(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_user_start", "user_id", "start_time", "id"),
+        Index("ix_appointments_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
-    case_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("cases.id"), nullable=True)
-    client_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("clients.id"), nullable=True)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    case_id: Mapped[str | None] = mapped_column(UUIDStr, ForeignKey("cases.id", ondelete="SET NULL"), nullable=True, index=True)
+    client_id: Mapped[str | None] = mapped_column(UUIDStr, ForeignKey("clients.id", ondelete="SET NULL"), nullable=True, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     location: Mapped[str | None] = mapped_column(String(500), nullable=True)
-    start_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Partition key on Postgres (monthly ranges), so part of the primary key there too
+    start_time: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     end_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     status: Mapped[AppointmentStatus] = mapped_column(
         SAEnum(AppointmentStatus), default=AppointmentStatus.SCHEDULED
@@ -93,6 +108,7 @@ class Appointment(Base):
     follow_up_created_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Set in soft-delete mode until purged
 
     user = relationship("User", back_populates="appointments")
     case = relationship("Case", back_populates="appointments")
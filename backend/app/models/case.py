@@ -1,8 +1,9 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Numeric
+from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Numeric, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.ids import UUIDStr, new_id
+from app.models.search import trigram_index
 import enum
 
 
@@ -29,10 +30,16 @@ class CaseType(str, enum.Enum):
 
 class Case(Base):
     __tablename__ = "cases"
-
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
-    client_id: Mapped[str] = mapped_column(String(36), ForeignKey("clients.id"), nullable=False)
+    __table_args__ = (
+        Index("ix_cases_user_created", "user_id", "created_at", "id"),
+        trigram_index("ix_cases_title_trgm", "title"),
+        trigram_index("ix_cases_case_number_trgm", "case_number"),
+        Index("ix_cases_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
+
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    client_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     case_number: Mapped[str | None] = mapped_column(String(100), nullable=True, unique=True)
     case_type: Mapped[CaseType] = mapped_column(SAEnum(CaseType), default=CaseType.OTHER)
@@ -45,11 +52,12 @@ class Case(Base):
     estimated_value: Mapped[float | None] = mapped_column(Numeric(12, 2), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Set in soft-delete mode until purged
 
     # Relationships
     user = relationship("User", back_populates="cases")
     client = relationship("Client", back_populates="cases")
-    documents = relationship("Document", back_populates="case", cascade="all, delete-orphan")
-    deadlines = relationship("Deadline", back_populates="case", cascade="all, delete-orphan")
-    time_entries = relationship("TimeEntry", back_populates="case", cascade="all, delete-orphan")
-    appointments = relationship("Appointment", back_populates="case")
+    documents = relationship("Document", back_populates="case", cascade="all, delete-orphan", passive_deletes=True)
+    deadlines = relationship("Deadline", back_populates="case", cascade="all, delete-orphan", passive_deletes=True)
+    time_entries = relationship("TimeEntry", back_populates="case", cascade="all, delete-orphan", passive_deletes=True)
+    appointments = relationship("Appointment", back_populates="case", passive_deletes=True)
@@ -1,8 +1,9 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum
+from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.ids import UUIDStr, new_id
+from app.models.search import trigram_index
 import enum
 
 
@@ -14,9 +15,16 @@ class ClientStatus(str, enum.Enum):
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        Index("ix_clients_user_created", "user_id", "created_at", "id"),
+        trigram_index("ix_clients_name_trgm", "name"),
+        trigram_index("ix_clients_email_trgm", "email"),
+        trigram_index("ix_clients_company_trgm", "company"),
+        Index("ix_clients_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     email: Mapped[str | None] = mapped_column(String(255), nullable=True)
     phone: Mapped[str | None] = mapped_column(String(50), nullable=True)
@@ -28,9 +36,10 @@ class Client(Base):
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Set in soft-delete mode until purged
 
     # Relationships
     user = relationship("User", back_populates="clients")
-    cases = relationship("Case", back_populates="client", cascade="all, delete-orphan")
-    invoices = relationship("Invoice", back_populates="client", cascade="all, delete-orphan")
-    appointments = relationship("Appointment", back_populates="client")
+    cases = relationship("Case", back_populates="client", cascade="all, delete-orphan", passive_deletes=True)
+    invoices = relationship("Invoice", back_populates="client", cascade="all, delete-orphan", passive_deletes=True)
+    appointments = relationship("Appointment", back_populates="client", passive_deletes=True)
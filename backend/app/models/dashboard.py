@@ -0,0 +1,24 @@
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from app.models.ids import UUIDStr
+
+
+class DashboardStats(Base):
+    """Per-user dashboard totals, kept current by app.services.dashboard_stats."""
+
+    __tablename__ = "dashboard_stats"
+
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    active_clients: Mapped[int] = mapped_column(Integer, default=0)
+    open_cases: Mapped[int] = mapped_column(Integer, default=0)
+    documents: Mapped[int] = mapped_column(Integer, default=0)
+    pending_invoices: Mapped[int] = mapped_column(Integer, default=0)
+    total_billed: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    total_collected: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    outstanding: Mapped[float] = mapped_column(Numeric(14, 2), default=0)
+    billable_hours_month: Mapped[float] = mapped_column(Numeric(10, 2), default=0)
+    hours_month: Mapped[date] = mapped_column(Date, nullable=False)  # Month billable_hours_month covers
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    reconciled_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -1,8 +1,9 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Integer
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SAEnum, Integer, Index, text
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 from app.database import Base
+from app.models.ids import UUIDStr, new_id
+from app.models.search import trigram_index
 import enum
 
 
@@ -20,21 +21,39 @@ class DocumentType(str, enum.Enum):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_user_created", "user_id", "created_at", "id"),
+        trigram_index("ix_documents_title_trgm", "title"),
+        # Documents waiting for batch analysis, counted per user by its status endpoint
+        Index(
+            "ix_documents_pending_analysis", "user_id",
+            postgresql_where=text(
+                "content IS NOT NULL AND content <> '' AND (ai_summary IS NULL OR ai_analyzed_version < version)"
+            ),
+        ),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
-    case_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("cases.id"), nullable=True)
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    case_id: Mapped[str | None] = mapped_column(UUIDStr, ForeignKey("cases.id", ondelete="CASCADE"), nullable=True, index=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     doc_type: Mapped[DocumentType] = mapped_column(SAEnum(DocumentType), default=DocumentType.OTHER)
-    content: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # The large text columns load only when asked for, with undefer_group("body")
+    content: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="body")
     file_path: Mapped[str | None] = mapped_column(Text, nullable=True)
-    ai_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
-    ai_risk_flags: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON string
-    template_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("document_templates.id"), nullable=True)
+    ai_summary: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="body")
+    ai_risk_flags: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_group="body")  # JSON string
+    ai_analyzed_version: Mapped[int | None] = mapped_column(Integer, nullable=True)  # `version` the analysis was run on
+    template_id: Mapped[str | None] = mapped_column(UUIDStr, ForeignKey("document_templates.id", ondelete="SET NULL"), nullable=True, index=True)
     version: Mapped[int] = mapped_column(Integer, default=1)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Computed by list queries with with_expression (see app.routers.documents); None otherwise
+    size: Mapped[int | None] = query_expression()
+    excerpt: Mapped[str | None] = query_expression()
+    ai_summary_excerpt: Mapped[str | None] = query_expression()
+
     # Relationships
     user = relationship("User", back_populates="documents")
     case = relationship("Case", back_populates="documents")
@@ -44,14 +63,17 @@ class Document(Base):
 class DocumentTemplate(Base):
     __tablename__ = "document_templates"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     doc_type: Mapped[DocumentType] = mapped_column(SAEnum(DocumentType), default=DocumentType.OTHER)
-    content: Mapped[str] = mapped_column(Text, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False, deferred=True, deferred_group="body")
     variables: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON: list of template variables
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_system: Mapped[bool] = mapped_column(default=False)  # Pre-built templates
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+    size: Mapped[int | None] = query_expression()
+    excerpt: Mapped[str | None] = query_expression()
+
     # Relationships
-    documents = relationship("Document", back_populates="template")
+    documents = relationship("Document", back_populates="template", passive_deletes=True)
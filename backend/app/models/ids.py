@@ -0,0 +1,26 @@
+"""Primary and foreign key type: native UUID on Postgres, exposed to Python (and the API) as a string."""
+import os
+import time
+import uuid
+from sqlalchemy import Uuid
+
+# Postgres stores 16 bytes instead of a 36-character string; SQLite falls back to CHAR(32)
+UUIDStr = Uuid(as_uuid=False)
+
+
+def uuid7() -> uuid.UUID:
+    """RFC 9562 version 7 UUID: a millisecond timestamp followed by random bits.
+
+    Keys generated close together sort close together, so inserts append to the
+    right edge of the primary key index instead of splitting random pages.
+    """
+    millis = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (millis & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76 | (rand >> 64 & 0xFFF) << 64  # version, 12 bits rand_a
+    value |= 0b10 << 62 | rand & 0x3FFF_FFFF_FFFF_FFFF  # variant, 62 bits rand_b
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    return str(uuid7())
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class JobCheckpoint(Base):
+    """Progress and lease for a background job, so runs can resume after a restart."""
+
+    __tablename__ = "job_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    cursor: Mapped[str | None] = mapped_column(String(255), nullable=True)  # Keyset position of the last processed row
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # Lease held by the running worker
+    run_started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    tokens_used: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, Text, ForeignKey, Boolean, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.database import Base
+from app.models.ids import UUIDStr, new_id
+
+
+class ResearchHistory(Base):
+    __tablename__ = "research_history"
+    __table_args__ = (
+        Index("ix_research_history_user_created", "user_id", "created_at"),
+        Index("ix_research_history_user_hash", "user_id", "request_hash"),
+    )
+
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    query: Mapped[str] = mapped_column(Text, nullable=False)
+    jurisdiction: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    area_of_law: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    include_case_law: Mapped[bool] = mapped_column(Boolean, default=True)
+    include_statutes: Mapped[bool] = mapped_column(Boolean, default=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of the query parameters
+    response: Mapped[str] = mapped_column(Text, nullable=False)  # JSON string
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User", back_populates="research_history")
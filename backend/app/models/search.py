@@ -0,0 +1,9 @@
+"""Index helpers for text search columns."""
+from sqlalchemy import Index
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """pg_trgm GIN index serving ILIKE '%term%' and similarity on `column`; Postgres only."""
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}).ddl_if(
+        dialect="postgresql"
+    )
@@ -0,0 +1,17 @@
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, ForeignKey, BigInteger, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from app.models.ids import UUIDStr
+
+
+class AIUsage(Base):
+    """Per-user AI consumption for one day; written in bulk by the quota service."""
+
+    __tablename__ = "ai_usage"
+
+    user_id: Mapped[str] = mapped_column(UUIDStr, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    period: Mapped[date] = mapped_column(Date, primary_key=True)
+    tokens: Mapped[int] = mapped_column(BigInteger, default=0)
+    requests: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
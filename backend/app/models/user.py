@@ -1,14 +1,14 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import String, Boolean, DateTime, Text
+from sqlalchemy import String, Boolean, DateTime, Text, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.models.ids import UUIDStr, new_id
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDStr, primary_key=True, default=new_id)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -17,15 +17,17 @@ class User(Base):
     firm_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     bar_number: Mapped[str | None] = mapped_column(String(100), nullable=True)
     phone: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    token_version: Mapped[int] = mapped_column(Integer, default=1)  # Bumped to revoke previously issued tokens
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    clients = relationship("Client", back_populates="user", cascade="all, delete-orphan")
-    cases = relationship("Case", back_populates="user", cascade="all, delete-orphan")
-    documents = relationship("Document", back_populates="user", cascade="all, delete-orphan")
-    invoices = relationship("Invoice", back_populates="user", cascade="all, delete-orphan")
-    time_entries = relationship("TimeEntry", back_populates="user", cascade="all, delete-orphan")
-    calendar_events = relationship("CalendarEvent", back_populates="user", cascade="all, delete-orphan")
-    deadlines = relationship("Deadline", back_populates="user", cascade="all, delete-orphan")
-    appointments = relationship("Appointment", back_populates="user", cascade="all, delete-orphan")
+    clients = relationship("Client", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    cases = relationship("Case", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    documents = relationship("Document", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    invoices = relationship("Invoice", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    time_entries = relationship("TimeEntry", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    calendar_events = relationship("CalendarEvent", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    deadlines = relationship("Deadline", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    appointments = relationship("Appointment", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    research_history = relationship("ResearchHistory", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
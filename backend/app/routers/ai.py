@@ -1,79 +1,279 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
-from app.schemas.ai import ResearchRequest, ResearchResponse
-from app.services.auth import get_current_user
+from app.config import get_settings
+from app.database import get_db, get_read_db
+from app.models.research import ResearchHistory
+from app.schemas.ai import ResearchRequest, ResearchResponse, ResearchHistoryPage, ResearchHistoryDetail
+from app.services.auth import CurrentUser, get_current_user, get_websocket_user
+from app.services.query_stats import query_budget
 from app.services.ai_service import legal_research, summarize_text, suggest_keywords, inline_complete, auto_fill_form
+from app.services.completion_model import local_complete
+from app.services.quota import QuotaExceeded, get_usage
 
 router = APIRouter(prefix="/ai", tags=["AI"])
+settings = get_settings()
+
+
+def _research_hash(request: ResearchRequest) -> str:
+    """Stable key for a research request; whitespace and case in free text are ignored."""
+    params = {
+        "query": " ".join(request.query.split()).lower(),
+        "jurisdiction": (request.jurisdiction or "").strip().lower(),
+        "area_of_law": (request.area_of_law or "").strip().lower(),
+        "include_case_law": request.include_case_law,
+        "include_statutes": request.include_statutes,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
 
 
 @router.post("/research", response_model=ResearchResponse)
 async def do_research(
     request: ResearchRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
+    request_hash = _research_hash(request)
+    if request.use_history:
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.RESEARCH_HISTORY_MAX_AGE_MINUTES)
+        entry = await db.scalar(
+            select(ResearchHistory)
+            .where(
+                ResearchHistory.user_id == current_user.id,
+                ResearchHistory.request_hash == request_hash,
+                ResearchHistory.created_at >= cutoff,
+            )
+            .order_by(ResearchHistory.created_at.desc())
+            .limit(1)
+        )
+        if entry:
+            return ResearchResponse(**json.loads(entry.response), history_id=entry.id, from_history=True)
+
     result = await legal_research(
         query=request.query,
         jurisdiction=request.jurisdiction,
         area_of_law=request.area_of_law,
         include_case_law=request.include_case_law,
         include_statutes=request.include_statutes,
+        user_id=current_user.id,
+    )
+    response = ResearchResponse(**result)
+
+    entry = ResearchHistory(
+        user_id=current_user.id,
+        query=request.query,
+        jurisdiction=request.jurisdiction,
+        area_of_law=request.area_of_law,
+        include_case_law=request.include_case_law,
+        include_statutes=request.include_statutes,
+        request_hash=request_hash,
+        response=response.model_dump_json(exclude={"history_id", "from_history"}),
     )
-    return ResearchResponse(**result)
+    db.add(entry)
+    await db.commit()
+    response.history_id = entry.id
+    return response
+
+
+@router.get("/research/history", response_model=ResearchHistoryPage)
+@query_budget(3)
+async def list_research_history(
+    limit: int = Query(default=25, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Past research sessions, newest first. Responses are omitted; fetch one by id to replay it."""
+    criteria = ResearchHistory.user_id == current_user.id
+    total = await db.scalar(select(func.count()).select_from(ResearchHistory).where(criteria))
+    items = (await db.scalars(
+        select(ResearchHistory).where(criteria).order_by(ResearchHistory.created_at.desc()).offset(offset).limit(limit)
+    )).all()
+    return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+
+@router.get("/research/history/{entry_id}", response_model=ResearchHistoryDetail)
+@query_budget(2)
+async def get_research_history(
+    entry_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    entry = await db.scalar(select(ResearchHistory).where(
+        ResearchHistory.id == entry_id, ResearchHistory.user_id == current_user.id
+    ))
+    if not entry:
+        raise HTTPException(status_code=404, detail="Research entry not found")
+    return ResearchHistoryDetail(
+        id=entry.id,
+        query=entry.query,
+        jurisdiction=entry.jurisdiction,
+        area_of_law=entry.area_of_law,
+        include_case_law=entry.include_case_law,
+        include_statutes=entry.include_statutes,
+        created_at=entry.created_at,
+        result=ResearchResponse(**json.loads(entry.response), history_id=entry.id, from_history=True),
+    )
+
+
+@router.get("/usage")
+@query_budget(1)
+async def get_ai_usage(current_user: CurrentUser = Depends(get_current_user)):
+    """Today's AI token and request usage against the configured quotas."""
+    return get_usage(current_user.id)
 
 
 @router.post("/summarize")
 async def do_summarize(
     body: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     text = body.get("text", "")
     if not text:
         return {"error": "No text provided"}
-    summary = await summarize_text(text)
+    summary = await summarize_text(text, user_id=current_user.id)
     return {"summary": summary}
 
 
-@router.post("/suggest")
-async def do_suggest(
-    body: dict,
-    current_user: User = Depends(get_current_user),
-):
+async def _suggest(user_id: str, body: dict) -> dict:
     partial_text = body.get("text", "")
     field_type = body.get("field_type", "general")
     context = body.get("context", "")
     if not partial_text or len(partial_text) < 2:
         return {"suggestions": []}
     try:
-        suggestions = await suggest_keywords(partial_text, field_type, context)
+        suggestions = await suggest_keywords(partial_text, field_type, context, user_id=user_id)
         return {"suggestions": suggestions}
+    except QuotaExceeded:
+        raise  # Answered with 429 (or an error frame), not an empty result
     except Exception:
         return {"suggestions": []}
 
 
-@router.post("/complete")
-async def do_complete(
-    body: dict,
-    current_user: User = Depends(get_current_user),
-):
-    """Gmail-style inline sentence completion."""
+async def _complete(user_id: str, body: dict) -> dict:
     partial_text = body.get("text", "")
     field_type = body.get("field_type", "general")
     context = body.get("context", "")
     if not partial_text or len(partial_text) < 2:
         return {"completion": ""}
+    # Answer from the user's own writing when confident; only then pay for the LLM
+    local = local_complete(user_id, partial_text, field_type)
+    if local:
+        return {"completion": local}
     try:
-        completion = await inline_complete(partial_text, field_type, context)
+        completion = await inline_complete(partial_text, field_type, context, user_id=user_id)
         return {"completion": completion}
+    except QuotaExceeded:
+        raise
     except Exception:
         return {"completion": ""}
 
 
+@router.post("/suggest")
+async def do_suggest(
+    body: dict,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await _suggest(current_user.id, body)
+
+
+@router.post("/complete")
+async def do_complete(
+    body: dict,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Gmail-style inline sentence completion."""
+    return await _complete(current_user.id, body)
+
+
+WS_HANDLERS = {"complete": _complete, "suggest": _suggest}
+
+
+@router.websocket("/ws")
+async def ai_socket(websocket: WebSocket):
+    """Long-lived channel for keystroke-level completion and suggestions.
+
+    Authenticated once on connect, from the auth cookie. Clients send
+    `{"id", "type": "complete" | "suggest", "text", "field_type", "context", "channel"}`
+    and receive `{"id", "type", ...result}`; a frame that is not a JSON object
+    or not a known request gets `{"id", "type": "error", "detail"}` and the
+    connection stays open. A new request on the same type and channel
+    (defaults to field_type) cancels the one still in flight, and
+    `{"type": "cancel", "id"}` cancels a request explicitly; cancelled requests
+    get no reply.
+    """
+    user = await get_websocket_user(websocket)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    user_id = user.id
+
+    in_flight: dict[str, asyncio.Task] = {}
+    latest: dict[tuple[str, str], str] = {}
+    send_lock = asyncio.Lock()
+
+    async def reply_error(request_id: str, detail: str):
+        async with send_lock:
+            await websocket.send_json({"id": request_id, "type": "error", "detail": detail})
+
+    async def run(request_id: str, kind: str, message: dict):
+        try:
+            result = await WS_HANDLERS[kind](user_id, message)
+            async with send_lock:
+                await websocket.send_json({"id": request_id, "type": kind, **result})
+        except QuotaExceeded as exc:
+            await reply_error(request_id, str(exc))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            in_flight.pop(request_id, None)
+
+    try:
+        while True:
+            # A bad frame is answered on its own; it must not drop the other requests in flight
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                await reply_error("", "Invalid JSON")
+                continue
+            if not isinstance(message, dict):
+                await reply_error("", "Expected a JSON object")
+                continue
+            request_id = str(message.get("id", ""))
+            kind = message.get("type")
+
+            if kind == "cancel":
+                task = in_flight.get(request_id)
+                if task:
+                    task.cancel()
+                continue
+            if kind not in WS_HANDLERS or not request_id:
+                await reply_error(request_id, "Unknown request")
+                continue
+
+            channel = (kind, str(message.get("channel") or message.get("field_type", "general")))
+            stale = in_flight.get(latest.get(channel, ""))
+            if stale:
+                stale.cancel()
+            latest[channel] = request_id
+            in_flight[request_id] = asyncio.create_task(run(request_id, kind, message))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in list(in_flight.values()):
+            task.cancel()
+
+
 @router.post("/autofill")
 async def do_autofill(
     body: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Auto-fill all form fields with AI-generated realistic content."""
     form_type = body.get("form_type", "")
@@ -83,7 +283,7 @@ async def do_autofill(
     if not form_type or not fields:
         return {"error": "form_type and fields are required"}
     try:
-        result = await auto_fill_form(form_type, fields, existing, context)
+        result = await auto_fill_form(form_type, fields, existing, context, user_id=current_user.id)
         return result
     except Exception as e:
         return {"error": str(e)}
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import RegisterRequest, LoginRequest, TokenResponse, UserResponse, UserUpdate
 from app.services.auth import (
+    CurrentUser,
     create_access_token,
-    hash_password,
-    verify_password,
+    dummy_verify_password,
+    hash_password_async,
+    verify_and_update_password,
     get_current_user,
 )
+from app.services.query_stats import query_budget
+from app.services.rate_limit import check_auth_rate_limit, reset_email_attempts
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 settings = get_settings()
@@ -29,40 +34,69 @@ def set_auth_cookie(response: Response, token: str):
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(request: RegisterRequest, response: Response, db: Session = Depends(get_db)):
+async def register(
+    request: RegisterRequest,
+    response: Response,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+):
     """Register a new user account."""
-    existing = db.query(User).filter(User.email == request.email).first()
+    await check_auth_rate_limit(http_request, request.email)
+    existing = await db.scalar(select(User).where(User.email == request.email))
     if existing:
         raise HTTPException(status_code=400, detail="An account with this email already exists")
 
     if len(request.password) < 6:
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
 
+    # Return the pooled connection while bcrypt runs so slow hashing can't starve the pool
+    await db.close()
+    hashed_password = await hash_password_async(request.password)
+
     user = User(
         email=request.email,
         name=request.name,
-        hashed_password=hash_password(request.password),
+        hashed_password=hashed_password,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
-    token = create_access_token(user.id)
+    token = create_access_token(user)
     set_auth_cookie(response, token)
     return TokenResponse(access_token=token, user=UserResponse.model_validate(user))
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest, response: Response, db: Session = Depends(get_db)):
+async def login(
+    request: LoginRequest,
+    response: Response,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+):
     """Login with email and password."""
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not verify_password(request.password, user.hashed_password):
+    await check_auth_rate_limit(http_request, request.email)
+    user = await db.scalar(select(User).where(User.email == request.email))
+    if not user:
+        await db.close()
+        await dummy_verify_password(request.password)
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    # Return the pooled connection while bcrypt runs; `user` stays readable once detached
+    await db.close()
+    valid, new_hash = await verify_and_update_password(request.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account is disabled")
 
-    token = create_access_token(user.id)
+    await reset_email_attempts(request.email)
+    if new_hash:
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
+
+    token = create_access_token(user)
     set_auth_cookie(response, token)
     return TokenResponse(access_token=token, user=UserResponse.model_validate(user))
 
@@ -74,20 +108,28 @@ async def logout(response: Response):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
-    """Get current authenticated user."""
+@query_budget(1)
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
+    """Get current authenticated user (served from the verified token claims)."""
     return current_user
 
 
 @router.patch("/me", response_model=UserResponse)
 async def update_me(
     data: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Update current user profile."""
+    """Update current user profile.
+
+    Profile changes revoke previously issued tokens (their claims are stale), so a
+    fresh token is set in the auth cookie.
+    """
+    user = await db.scalar(select(User).where(User.id == current_user.id))
     for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(current_user, field, value)
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+        setattr(user, field, value)
+    await db.commit()
+    await db.refresh(user)
+    set_auth_cookie(response, create_access_token(user))
+    return user
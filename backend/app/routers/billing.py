@@ -1,102 +1,127 @@
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.billing import Invoice, InvoiceItem, TimeEntry
 from app.models.case import Case
-from app.models.user import User
 from app.schemas.billing import (
     InvoiceCreate, InvoiceResponse, InvoiceUpdate,
     TimeEntryCreate, TimeEntryResponse,
 )
-from app.services.auth import get_current_user
+from app.services.auth import CurrentUser, get_current_user
+from app.services.importer import ImportSpec, import_rows
+from app.services.pagination import paginate
+from app.services.query_stats import query_budget
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
 
+async def _get_invoice(db: AsyncSession, user_id: str, invoice_id: str) -> Invoice | None:
+    """Load an invoice with its items, which InvoiceResponse serializes."""
+    return await db.scalar(
+        select(Invoice)
+        .where(Invoice.id == invoice_id, Invoice.user_id == user_id)
+        .options(selectinload(Invoice.items))
+        .execution_options(populate_existing=True)
+    )
+
+
+async def _next_invoice_number(db: AsyncSession, user_id: str) -> str:
+    count = await db.scalar(select(func.count()).select_from(Invoice).where(Invoice.user_id == user_id))
+    return f"INV-{count + 1:05d}"
+
+
+def _entry_description(row: dict) -> str:
+    description = row.get("description", "").strip()
+    if not description:
+        raise ValueError("description is required")
+    return description
+
+
+def _entry_date(row: dict) -> datetime:
+    return datetime.fromisoformat(row["date"]) if row.get("date") else datetime.utcnow()
+
+
+def _entry_changes(row: dict) -> dict:
+    changes = {field: float(row[field]) for field in ("hours", "rate") if row.get(field) is not None}
+    if row.get("is_billable") is not None:
+        changes["is_billable"] = bool(row["is_billable"])
+    if row.get("case_id") is not None:
+        changes["case_id"] = row["case_id"] or None
+    changes["date"] = _entry_date(row)
+    return changes
+
+
+TIME_ENTRY_IMPORT = ImportSpec(
+    model=TimeEntry,
+    key_column=TimeEntry.description,
+    key=_entry_description,
+    new=lambda row: {
+        "description": _entry_description(row),
+        "hours": float(row.get("hours", 0)),
+        "rate": float(row.get("rate", 250)),
+        "date": _entry_date(row),
+        "is_billable": row.get("is_billable", True),
+        "case_id": row.get("case_id") or None,
+    },
+    changes=_entry_changes,
+)
+
+
 @router.post("/import")
+@query_budget(None)
 async def import_billing(
     body: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """Bulk import time entries from JSON array. Updates existing by description+date match."""
     rows = body.get("data", [])
     if not rows:
         raise HTTPException(status_code=400, detail="No data provided")
-    created = 0
-    updated = 0
-    errors = []
-    for i, row in enumerate(rows):
-        try:
-            description = row.get("description", "").strip()
-            if not description:
-                errors.append(f"Row {i+1}: description is required")
-                continue
-            entry_date = datetime.fromisoformat(row["date"]) if row.get("date") else datetime.utcnow()
-            existing = db.query(TimeEntry).filter(
-                TimeEntry.user_id == current_user.id,
-                TimeEntry.description.ilike(description),
-            ).first()
-            if existing:
-                for field, val in [("hours", row.get("hours")), ("rate", row.get("rate")),
-                                   ("is_billable", row.get("is_billable")), ("case_id", row.get("case_id"))]:
-                    if val is not None:
-                        if field in ("hours", "rate"):
-                            setattr(existing, field, float(val))
-                        else:
-                            setattr(existing, field, val if val else None)
-                existing.date = entry_date
-                updated += 1
-            else:
-                entry = TimeEntry(
-                    user_id=current_user.id,
-                    description=description,
-                    hours=float(row.get("hours", 0)),
-                    rate=float(row.get("rate", 250)),
-                    date=entry_date,
-                    is_billable=row.get("is_billable", True),
-                    case_id=row.get("case_id") or None,
-                )
-                db.add(entry)
-                created += 1
-        except Exception as e:
-            errors.append(f"Row {i+1}: {str(e)}")
-    db.commit()
-    return {"created": created, "updated": updated, "errors": errors}
+    result = await import_rows(db, TIME_ENTRY_IMPORT, current_user.id, rows)
+    await db.commit()
+    return result
 
 
 # --- Invoices ---
 
 @router.get("/invoices", response_model=list[InvoiceResponse])
+@query_budget(3)
 async def list_invoices(
+    response: Response,
     client_id: str | None = None,
     status: str | None = None,
     limit: int = Query(default=25, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Invoice).filter(Invoice.user_id == current_user.id)
+    query = select(Invoice).where(Invoice.user_id == current_user.id).options(selectinload(Invoice.items))
     if client_id:
-        query = query.filter(Invoice.client_id == client_id)
+        query = query.where(Invoice.client_id == client_id)
     if status:
-        query = query.filter(Invoice.status == status)
-    return query.order_by(Invoice.created_at.desc()).offset(offset).limit(limit).all()
+        query = query.where(Invoice.status == status)
+    return await paginate(
+        db, query, Invoice.created_at, Invoice.id, response,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
 
 
 @router.post("/invoices", response_model=InvoiceResponse, status_code=201)
 async def create_invoice(
     data: InvoiceCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     # Auto-generate invoice number
     invoice_number = data.invoice_number
     if not invoice_number:
-        count = db.query(Invoice).filter(Invoice.user_id == current_user.id).count()
-        invoice_number = f"INV-{count + 1:05d}"
+        invoice_number = await _next_invoice_number(db, current_user.id)
 
     # Calculate totals
     subtotal = sum(item.amount for item in data.items)
@@ -115,26 +140,24 @@ async def create_invoice(
         due_date=data.due_date,
     )
     db.add(invoice)
-    db.flush()
+    await db.flush()
 
     for item_data in data.items:
         item = InvoiceItem(invoice_id=invoice.id, **item_data.model_dump())
         db.add(item)
 
-    db.commit()
-    db.refresh(invoice)
-    return invoice
+    await db.commit()
+    return await _get_invoice(db, current_user.id, invoice.id)
 
 
 @router.get("/invoices/{invoice_id}", response_model=InvoiceResponse)
+@query_budget(3)
 async def get_invoice(
     invoice_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    invoice = db.query(Invoice).filter(
-        Invoice.id == invoice_id, Invoice.user_id == current_user.id
-    ).first()
+    invoice = await _get_invoice(db, current_user.id, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
@@ -144,12 +167,10 @@ async def get_invoice(
 async def update_invoice(
     invoice_id: str,
     data: InvoiceUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    invoice = db.query(Invoice).filter(
-        Invoice.id == invoice_id, Invoice.user_id == current_user.id
-    ).first()
+    invoice = await _get_invoice(db, current_user.id, invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
@@ -159,8 +180,7 @@ async def update_invoice(
 
     for field, value in update_data.items():
         setattr(invoice, field, value)
-    db.commit()
-    db.refresh(invoice)
+    await db.commit()
     return invoice
 
 
@@ -169,40 +189,53 @@ async def update_invoice(
 @router.post("/invoices/auto-generate", response_model=InvoiceResponse, status_code=201)
 async def auto_generate_invoice(
     data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Auto-generate an invoice from unbilled time entries for a client."""
+    """Auto-generate an invoice from unbilled time entries for a client.
+
+    Optional ISO `period_start`/`period_end` limit it to entries dated in that
+    range, which also keeps the scan to those months' partitions.
+    """
     client_id = data.get("client_id")
     tax_rate = data.get("tax_rate", 0)
     if not client_id:
         raise HTTPException(status_code=400, detail="client_id is required")
+    try:
+        period_start = datetime.fromisoformat(data["period_start"]) if data.get("period_start") else None
+        period_end = datetime.fromisoformat(data["period_end"]) if data.get("period_end") else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="period_start and period_end must be ISO dates")
 
     # Find all cases for this client
-    case_ids = [
-        c.id for c in db.query(Case).filter(
+    case_ids = (await db.scalars(
+        select(Case.id).where(
             Case.user_id == current_user.id,
-            Case.client_id == client_id
-        ).all()
-    ]
+            Case.client_id == client_id,
+        )
+    )).all()
 
     if not case_ids:
         raise HTTPException(status_code=400, detail="No cases found for this client")
 
     # Find unbilled, billable time entries for those cases
-    entries = db.query(TimeEntry).filter(
+    query = select(TimeEntry).where(
         TimeEntry.user_id == current_user.id,
         TimeEntry.case_id.in_(case_ids),
         TimeEntry.is_billable == True,
         TimeEntry.is_billed == False,
-    ).order_by(TimeEntry.date).all()
+    )
+    if period_start:
+        query = query.where(TimeEntry.date >= period_start)
+    if period_end:
+        query = query.where(TimeEntry.date <= period_end)
+    entries = (await db.scalars(query.order_by(TimeEntry.date))).all()
 
     if not entries:
         raise HTTPException(status_code=400, detail="No unbilled time entries found for this client")
 
     # Auto-generate invoice number
-    count = db.query(Invoice).filter(Invoice.user_id == current_user.id).count()
-    invoice_number = f"INV-{count + 1:05d}"
+    invoice_number = await _next_invoice_number(db, current_user.id)
 
     # Calculate totals
     subtotal = sum(float(e.hours) * float(e.rate) for e in entries)
@@ -222,7 +255,7 @@ async def auto_generate_invoice(
         due_date=datetime.utcnow() + timedelta(days=30),
     )
     db.add(invoice)
-    db.flush()
+    await db.flush()
 
     # Create invoice items from time entries
     for entry in entries:
@@ -238,53 +271,64 @@ async def auto_generate_invoice(
         # Mark entry as billed
         entry.is_billed = True
 
-    db.commit()
-    db.refresh(invoice)
-    return invoice
+    await db.commit()
+    return await _get_invoice(db, current_user.id, invoice.id)
 
 
 # --- Time Entries ---
 
 @router.get("/time-entries", response_model=list[TimeEntryResponse])
+@query_budget(2)
 async def list_time_entries(
+    response: Response,
     case_id: str | None = None,
     is_billed: bool | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
     limit: int = Query(default=25, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(TimeEntry).filter(TimeEntry.user_id == current_user.id)
+    query = select(TimeEntry).where(TimeEntry.user_id == current_user.id)
     if case_id:
-        query = query.filter(TimeEntry.case_id == case_id)
+        query = query.where(TimeEntry.case_id == case_id)
     if is_billed is not None:
-        query = query.filter(TimeEntry.is_billed == is_billed)
-    return query.order_by(TimeEntry.date.desc()).offset(offset).limit(limit).all()
+        query = query.where(TimeEntry.is_billed == is_billed)
+    if start_date:
+        query = query.where(TimeEntry.date >= start_date)
+    if end_date:
+        query = query.where(TimeEntry.date <= end_date)
+    return await paginate(
+        db, query, TimeEntry.date, TimeEntry.id, response,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
 
 
 @router.post("/time-entries", response_model=TimeEntryResponse, status_code=201)
 async def create_time_entry(
     data: TimeEntryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     entry = TimeEntry(user_id=current_user.id, **data.model_dump())
     db.add(entry)
-    db.commit()
-    db.refresh(entry)
+    await db.commit()
+    await db.refresh(entry)
     return entry
 
 
 @router.delete("/time-entries/{entry_id}", status_code=204)
 async def delete_time_entry(
     entry_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    entry = db.query(TimeEntry).filter(
-        TimeEntry.id == entry_id, TimeEntry.user_id == current_user.id
-    ).first()
+    entry = await db.scalar(
+        select(TimeEntry).where(TimeEntry.id == entry_id, TimeEntry.user_id == current_user.id)
+    )
     if not entry:
         raise HTTPException(status_code=404, detail="Time entry not found")
-    db.delete(entry)
-    db.commit()
+    await db.delete(entry)
+    await db.commit()
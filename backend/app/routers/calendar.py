@@ -1,131 +1,141 @@
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.calendar import CalendarEvent, Deadline, Appointment
-from app.models.user import User
+from app.config import get_settings
+from app.database import get_db, get_read_db
+from app.models.calendar import CalendarEvent, Deadline, Appointment, AppointmentStatus
 from app.schemas.calendar import (
     CalendarEventCreate, CalendarEventResponse, CalendarEventUpdate,
     DeadlineCreate, DeadlineResponse, DeadlineUpdate,
     AppointmentCreate, AppointmentResponse, AppointmentUpdate,
     AppointmentAutomationRunRequest, AppointmentAutomationResponse,
 )
-from app.services.auth import get_current_user
+from app.services.auth import CurrentUser, get_current_user
+from app.services.importer import ImportSpec, import_rows, non_empty
+from app.services.pagination import paginate
+from app.services.query_stats import query_budget
+from app.services.soft_delete import delete_rows
 
+settings = get_settings()
 router = APIRouter(prefix="/calendar", tags=["Calendar"])
 
 
+def _title(row: dict) -> str:
+    title = row.get("title", "").strip()
+    if not title:
+        raise ValueError("title is required")
+    return title
+
+
+def _timestamp(row: dict, field: str) -> datetime:
+    return datetime.fromisoformat(row[field]) if row.get(field) else datetime.utcnow()
+
+
+def _event_changes(row: dict) -> dict:
+    changes = non_empty(row, ["event_type", "description", "location"])
+    for field in ("start_time", "end_time"):
+        if row.get(field):
+            changes[field] = datetime.fromisoformat(row[field])
+    return changes
+
+
+def _deadline_changes(row: dict) -> dict:
+    changes = non_empty(row, ["description", "priority", "case_id"])
+    if row.get("due_date"):
+        changes["due_date"] = datetime.fromisoformat(row["due_date"])
+    if row.get("reminder_days"):
+        changes["reminder_days"] = int(row["reminder_days"])
+    return changes
+
+
+EVENT_IMPORT = ImportSpec(
+    model=CalendarEvent,
+    key_column=CalendarEvent.title,
+    key=_title,
+    new=lambda row: {
+        "title": _title(row),
+        "event_type": row.get("event_type", "other"),
+        "description": row.get("description"),
+        "location": row.get("location"),
+        "start_time": _timestamp(row, "start_time"),
+        "end_time": _timestamp(row, "end_time"),
+    },
+    changes=_event_changes,
+)
+DEADLINE_IMPORT = ImportSpec(
+    model=Deadline,
+    key_column=Deadline.title,
+    key=_title,
+    new=lambda row: {
+        "title": _title(row),
+        "description": row.get("description"),
+        "due_date": _timestamp(row, "due_date"),
+        "priority": row.get("priority", "medium"),
+        "case_id": row.get("case_id") or None,
+        "reminder_days": int(row.get("reminder_days", 3)),
+    },
+    changes=_deadline_changes,
+)
+
+
 @router.post("/import")
+@query_budget(None)
 async def import_calendar(
     body: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """Bulk import deadlines and events from JSON array. Updates existing by title match."""
     rows = body.get("data", [])
     import_type = body.get("type", "deadlines")  # "deadlines" or "events"
     if not rows:
         raise HTTPException(status_code=400, detail="No data provided")
-    created = 0
-    updated = 0
-    errors = []
-    for i, row in enumerate(rows):
-        try:
-            title = row.get("title", "").strip()
-            if not title:
-                errors.append(f"Row {i+1}: title is required")
-                continue
-            if import_type == "events":
-                existing = db.query(CalendarEvent).filter(
-                    CalendarEvent.user_id == current_user.id,
-                    CalendarEvent.title.ilike(title)
-                ).first()
-                if existing:
-                    for field in ["event_type", "description", "location"]:
-                        val = row.get(field)
-                        if val is not None and str(val).strip():
-                            setattr(existing, field, val)
-                    if row.get("start_time"):
-                        existing.start_time = datetime.fromisoformat(row["start_time"])
-                    if row.get("end_time"):
-                        existing.end_time = datetime.fromisoformat(row["end_time"])
-                    updated += 1
-                else:
-                    event = CalendarEvent(
-                        user_id=current_user.id,
-                        title=title,
-                        event_type=row.get("event_type", "other"),
-                        description=row.get("description"),
-                        location=row.get("location"),
-                        start_time=datetime.fromisoformat(row["start_time"]) if row.get("start_time") else datetime.utcnow(),
-                        end_time=datetime.fromisoformat(row["end_time"]) if row.get("end_time") else datetime.utcnow(),
-                    )
-                    db.add(event)
-                    created += 1
-            else:
-                existing = db.query(Deadline).filter(
-                    Deadline.user_id == current_user.id,
-                    Deadline.title.ilike(title)
-                ).first()
-                if existing:
-                    for field in ["description", "priority", "case_id"]:
-                        val = row.get(field)
-                        if val is not None and str(val).strip():
-                            setattr(existing, field, val if val else None)
-                    if row.get("due_date"):
-                        existing.due_date = datetime.fromisoformat(row["due_date"])
-                    if row.get("reminder_days"):
-                        existing.reminder_days = int(row["reminder_days"])
-                    updated += 1
-                else:
-                    deadline = Deadline(
-                        user_id=current_user.id,
-                        title=title,
-                        description=row.get("description"),
-                        due_date=datetime.fromisoformat(row["due_date"]) if row.get("due_date") else datetime.utcnow(),
-                        priority=row.get("priority", "medium"),
-                        case_id=row.get("case_id") or None,
-                        reminder_days=int(row.get("reminder_days", 3)),
-                    )
-                    db.add(deadline)
-                    created += 1
-        except Exception as e:
-            errors.append(f"Row {i+1}: {str(e)}")
-    db.commit()
-    return {"created": created, "updated": updated, "errors": errors}
+    spec = EVENT_IMPORT if import_type == "events" else DEADLINE_IMPORT
+    result = await import_rows(db, spec, current_user.id, rows)
+    await db.commit()
+    return result
 
 
 # --- Calendar Events ---
 
 @router.get("/events", response_model=list[CalendarEventResponse])
+@query_budget(2)
 async def list_events(
+    response: Response,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
     event_type: str | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=200, ge=1, le=1000),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(CalendarEvent).filter(CalendarEvent.user_id == current_user.id)
+    query = select(CalendarEvent).where(CalendarEvent.user_id == current_user.id)
     if start_date:
-        query = query.filter(CalendarEvent.start_time >= start_date)
+        query = query.where(CalendarEvent.start_time >= start_date)
     if end_date:
-        query = query.filter(CalendarEvent.end_time <= end_date)
+        query = query.where(CalendarEvent.end_time <= end_date)
     if event_type:
-        query = query.filter(CalendarEvent.event_type == event_type)
-    return query.order_by(CalendarEvent.start_time).all()
+        query = query.where(CalendarEvent.event_type == event_type)
+    return await paginate(
+        db, query, CalendarEvent.start_time, CalendarEvent.id, response,
+        limit=limit, cursor=cursor, offset=offset,
+    )
 
 
 @router.post("/events", response_model=CalendarEventResponse, status_code=201)
 async def create_event(
     data: CalendarEventCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     event = CalendarEvent(user_id=current_user.id, **data.model_dump())
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
@@ -133,66 +143,74 @@ async def create_event(
 async def update_event(
     event_id: str,
     data: CalendarEventUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    event = db.query(CalendarEvent).filter(
+    event = await db.scalar(select(CalendarEvent).where(
         CalendarEvent.id == event_id, CalendarEvent.user_id == current_user.id
-    ).first()
+    ))
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(event, field, value)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
 @router.delete("/events/{event_id}", status_code=204)
 async def delete_event(
     event_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    event = db.query(CalendarEvent).filter(
+    event = await db.scalar(select(CalendarEvent).where(
         CalendarEvent.id == event_id, CalendarEvent.user_id == current_user.id
-    ).first()
+    ))
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
 
 
 # --- Deadlines ---
 
 @router.get("/deadlines", response_model=list[DeadlineResponse])
+@query_budget(2)
 async def list_deadlines(
+    response: Response,
     case_id: str | None = None,
     is_completed: bool | None = None,
     priority: str | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=200, ge=1, le=1000),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Deadline).filter(Deadline.user_id == current_user.id)
+    query = select(Deadline).where(Deadline.user_id == current_user.id)
     if case_id:
-        query = query.filter(Deadline.case_id == case_id)
+        query = query.where(Deadline.case_id == case_id)
     if is_completed is not None:
-        query = query.filter(Deadline.is_completed == is_completed)
+        query = query.where(Deadline.is_completed == is_completed)
     if priority:
-        query = query.filter(Deadline.priority == priority)
-    return query.order_by(Deadline.due_date).all()
+        query = query.where(Deadline.priority == priority)
+    return await paginate(
+        db, query, Deadline.due_date, Deadline.id, response,
+        limit=limit, cursor=cursor, offset=offset,
+    )
 
 
 @router.post("/deadlines", response_model=DeadlineResponse, status_code=201)
 async def create_deadline(
     data: DeadlineCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     deadline = Deadline(user_id=current_user.id, **data.model_dump())
     db.add(deadline)
-    db.commit()
-    db.refresh(deadline)
+    await db.commit()
+    await db.refresh(deadline)
     return deadline
 
 
@@ -200,12 +218,12 @@ async def create_deadline(
 async def update_deadline(
     deadline_id: str,
     data: DeadlineUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    deadline = db.query(Deadline).filter(
+    deadline = await db.scalar(select(Deadline).where(
         Deadline.id == deadline_id, Deadline.user_id == current_user.id
-    ).first()
+    ))
     if not deadline:
         raise HTTPException(status_code=404, detail="Deadline not found")
 
@@ -215,65 +233,74 @@ async def update_deadline(
 
     for field, value in update_data.items():
         setattr(deadline, field, value)
-    db.commit()
-    db.refresh(deadline)
+    await db.commit()
+    await db.refresh(deadline)
     return deadline
 
 
 @router.delete("/deadlines/{deadline_id}", status_code=204)
 async def delete_deadline(
     deadline_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    deadline = db.query(Deadline).filter(
+    deadline = await db.scalar(select(Deadline).where(
         Deadline.id == deadline_id, Deadline.user_id == current_user.id
-    ).first()
+    ))
     if not deadline:
         raise HTTPException(status_code=404, detail="Deadline not found")
-    db.delete(deadline)
-    db.commit()
+    await db.delete(deadline)
+    await db.commit()
 
 
 # --- Appointments ---
 
 @router.get("/appointments", response_model=list[AppointmentResponse])
+@query_budget(2)
 async def list_appointments(
+    response: Response,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
     status: str | None = None,
     case_id: str | None = None,
     client_id: str | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    limit: int = Query(default=200, ge=1, le=1000),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Appointment).filter(Appointment.user_id == current_user.id)
+    query = select(Appointment).where(Appointment.user_id == current_user.id)
     if start_date:
-        query = query.filter(Appointment.start_time >= start_date)
+        query = query.where(Appointment.start_time >= start_date)
     if end_date:
-        query = query.filter(Appointment.end_time <= end_date)
+        # start_time <= end_time, so this adds nothing but lets Postgres prune later partitions
+        query = query.where(Appointment.end_time <= end_date, Appointment.start_time <= end_date)
     if status:
-        query = query.filter(Appointment.status == status)
+        query = query.where(Appointment.status == status)
     if case_id:
-        query = query.filter(Appointment.case_id == case_id)
+        query = query.where(Appointment.case_id == case_id)
     if client_id:
-        query = query.filter(Appointment.client_id == client_id)
-    return query.order_by(Appointment.start_time).all()
+        query = query.where(Appointment.client_id == client_id)
+    return await paginate(
+        db, query, Appointment.start_time, Appointment.id, response,
+        limit=limit, cursor=cursor, offset=offset,
+    )
 
 
 @router.post("/appointments", response_model=AppointmentResponse, status_code=201)
 async def create_appointment(
     data: AppointmentCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     if data.end_time <= data.start_time:
         raise HTTPException(status_code=400, detail="End time must be after start time")
 
     appointment = Appointment(user_id=current_user.id, **data.model_dump())
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
+    await db.commit()
+    await db.refresh(appointment)
     return appointment
 
 
@@ -281,12 +308,12 @@ async def create_appointment(
 async def update_appointment(
     appointment_id: str,
     data: AppointmentUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    appointment = db.query(Appointment).filter(
+    appointment = await db.scalar(select(Appointment).where(
         Appointment.id == appointment_id, Appointment.user_id == current_user.id
-    ).first()
+    ))
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
@@ -297,38 +324,46 @@ async def update_appointment(
     if appointment.end_time <= appointment.start_time:
         raise HTTPException(status_code=400, detail="End time must be after start time")
 
-    db.commit()
-    db.refresh(appointment)
+    await db.commit()
+    await db.refresh(appointment)
     return appointment
 
 
 @router.delete("/appointments/{appointment_id}", status_code=204)
 async def delete_appointment(
     appointment_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    appointment = db.query(Appointment).filter(
-        Appointment.id == appointment_id, Appointment.user_id == current_user.id
-    ).first()
-    if not appointment:
+    if not await delete_rows(db, Appointment, Appointment.id == appointment_id, Appointment.user_id == current_user.id):
         raise HTTPException(status_code=404, detail="Appointment not found")
-    db.delete(appointment)
-    db.commit()
+    await db.commit()
 
 
 @router.post("/appointments/automation/run", response_model=AppointmentAutomationResponse)
 async def run_appointment_automation(
     data: AppointmentAutomationRunRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     now = datetime.utcnow()
     reminder_cutoff = now + timedelta(minutes=max(data.reminder_window_minutes, 0))
 
-    appointments = db.query(Appointment).filter(
+    # Bounding start_time keeps the scan to the recent monthly partitions
+    lookback_start = now - timedelta(days=settings.APPOINTMENT_AUTOMATION_LOOKBACK_DAYS)
+    appointments = (await db.scalars(select(Appointment).where(
         Appointment.user_id == current_user.id,
-    ).all()
+        Appointment.start_time >= lookback_start,
+        Appointment.start_time <= reminder_cutoff,
+        or_(
+            Appointment.status.in_([AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]),
+            and_(
+                Appointment.status == AppointmentStatus.COMPLETED,
+                Appointment.auto_follow_up == True,
+                Appointment.follow_up_created_at.is_(None),
+            ),
+        ),
+    ))).all()
 
     reminders: list[str] = []
     reminders_flagged = 0
@@ -372,7 +407,7 @@ async def run_appointment_automation(
             followups_created += 1
 
     if reminders_flagged or appointments_auto_completed or followups_created:
-        db.commit()
+        await db.commit()
 
     return {
         "reminders_flagged": reminders_flagged,
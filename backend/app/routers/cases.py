@@ -1,108 +1,117 @@
+from collections import defaultdict
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.case import Case
 from app.models.calendar import Deadline
-from app.models.user import User
 from app.schemas.case import CaseCreate, CaseResponse, CaseUpdate
-from app.services.auth import get_current_user
+from app.services.auth import CurrentUser, get_current_user
+from app.services.importer import ImportSpec, import_rows, non_empty
+from app.services.pagination import paginate
+from app.services.query_stats import query_budget
+from app.services.search import contains, ranked
+from app.services.soft_delete import delete_rows
 
 router = APIRouter(prefix="/cases", tags=["Cases"])
 
 
+def _case_title(row: dict) -> str:
+    title = row.get("title", "").strip()
+    if not title or not row.get("client_id", "").strip():
+        raise ValueError("title and client_id are required")
+    return title
+
+
+CASE_IMPORT = ImportSpec(
+    model=Case,
+    key_column=Case.title,
+    key=_case_title,
+    new=lambda row: {
+        "client_id": row["client_id"].strip(),
+        "title": _case_title(row),
+        "case_number": row.get("case_number"),
+        "case_type": row.get("case_type", "other"),
+        "description": row.get("description"),
+        "court": row.get("court"),
+        "judge": row.get("judge"),
+        "opposing_counsel": row.get("opposing_counsel"),
+        "status": row.get("status", "open"),
+    },
+    changes=lambda row: non_empty(
+        row, ["client_id", "case_number", "case_type", "description", "court", "judge", "opposing_counsel", "status"]
+    ),
+)
+
+
 @router.post("/import")
+@query_budget(None)
 async def import_cases(
     body: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """Bulk import cases from JSON array. Updates existing by title match."""
     rows = body.get("data", [])
     if not rows:
         raise HTTPException(status_code=400, detail="No data provided")
-    created = 0
-    updated = 0
-    errors = []
-    for i, row in enumerate(rows):
-        try:
-            title = row.get("title", "").strip()
-            client_id = row.get("client_id", "").strip()
-            if not title or not client_id:
-                errors.append(f"Row {i+1}: title and client_id are required")
-                continue
-            existing = db.query(Case).filter(
-                Case.user_id == current_user.id,
-                Case.title.ilike(title)
-            ).first()
-            if existing:
-                for field in ["client_id", "case_number", "case_type", "description", "court", "judge", "opposing_counsel", "status"]:
-                    val = row.get(field)
-                    if val is not None and str(val).strip():
-                        setattr(existing, field, val)
-                updated += 1
-            else:
-                case = Case(
-                    user_id=current_user.id,
-                    client_id=client_id,
-                    title=title,
-                    case_number=row.get("case_number"),
-                    case_type=row.get("case_type", "other"),
-                    description=row.get("description"),
-                    court=row.get("court"),
-                    judge=row.get("judge"),
-                    opposing_counsel=row.get("opposing_counsel"),
-                    status=row.get("status", "open"),
-                )
-                db.add(case)
-                created += 1
-        except Exception as e:
-            errors.append(f"Row {i+1}: {str(e)}")
-    db.commit()
-    return {"created": created, "updated": updated, "errors": errors}
+    result = await import_rows(db, CASE_IMPORT, current_user.id, rows)
+    await db.commit()
+    return result
 
 
 @router.get("", response_model=list[CaseResponse])
+@query_budget(2)
 async def list_cases(
+    response: Response,
     status: str | None = None,
     client_id: str | None = None,
     search: str | None = None,
+    rank: bool = False,
     limit: int = Query(default=25, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Case).filter(Case.user_id == current_user.id)
+    query = select(Case).where(Case.user_id == current_user.id)
     if status:
-        query = query.filter(Case.status == status)
+        query = query.where(Case.status == status)
     if client_id:
-        query = query.filter(Case.client_id == client_id)
+        query = query.where(Case.client_id == client_id)
     if search:
-        query = query.filter(Case.title.ilike(f"%{search}%"))
-    return query.order_by(Case.created_at.desc()).offset(offset).limit(limit).all()
+        query = query.where(contains(search, Case.title, Case.case_number))
+        if rank:
+            return await ranked(db, query, search, Case.title, Case.case_number, limit=limit, offset=offset)
+    return await paginate(
+        db, query, Case.created_at, Case.id, response,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
 
 
 @router.post("", response_model=CaseResponse, status_code=201)
 async def create_case(
     data: CaseCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     case = Case(user_id=current_user.id, **data.model_dump())
     db.add(case)
-    db.commit()
-    db.refresh(case)
+    await db.commit()
+    await db.refresh(case)
     return case
 
 
 @router.get("/{case_id}", response_model=CaseResponse)
+@query_budget(2)
 async def get_case(
     case_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    case = db.query(Case).filter(Case.id == case_id, Case.user_id == current_user.id).first()
+    case = await db.scalar(select(Case).where(Case.id == case_id, Case.user_id == current_user.id))
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     return case
@@ -112,58 +121,66 @@ async def get_case(
 async def update_case(
     case_id: str,
     data: CaseUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    case = db.query(Case).filter(Case.id == case_id, Case.user_id == current_user.id).first()
+    case = await db.scalar(select(Case).where(Case.id == case_id, Case.user_id == current_user.id))
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(case, field, value)
-    db.commit()
-    db.refresh(case)
+    await db.commit()
+    await db.refresh(case)
     return case
 
 
 @router.delete("/{case_id}", status_code=204)
 async def delete_case(
     case_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    case = db.query(Case).filter(Case.id == case_id, Case.user_id == current_user.id).first()
-    if not case:
+    # One statement; the database cascades to documents, deadlines and time entries and detaches appointments
+    # (in soft-delete mode the case is only marked, and the cascade runs when the purge removes it)
+    if not await delete_rows(db, Case, Case.id == case_id, Case.user_id == current_user.id):
         raise HTTPException(status_code=404, detail="Case not found")
-    db.delete(case)
-    db.commit()
+    await db.commit()
 
 
 @router.post("/automation/status-sync")
 async def sync_case_statuses(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     now = datetime.utcnow()
     soon = now + timedelta(days=7)
 
-    cases = db.query(Case).filter(
-        Case.user_id == current_user.id,
-        Case.status.notin_(["closed", "archived"]),
-    ).all()
-
-    updated = 0
-    for case in cases:
-        deadlines = db.query(Deadline).filter(
+    cases = (await db.scalars(
+        select(Case).where(
+            Case.user_id == current_user.id,
+            Case.status.notin_(["closed", "archived"]),
+        )
+    )).all()
+
+    # One pass over the user's open deadlines instead of a query per case
+    due_dates: dict[str, list[datetime]] = defaultdict(list)
+    for case_id, due_date in await db.execute(
+        select(Deadline.case_id, Deadline.due_date).where(
             Deadline.user_id == current_user.id,
-            Deadline.case_id == case.id,
+            Deadline.case_id.isnot(None),
             Deadline.is_completed == False,
-        ).all()
+        )
+    ):
+        due_dates[case_id].append(due_date)
 
+    updated = 0
+    for case in cases:
+        deadlines = due_dates.get(case.id)
         if not deadlines:
             continue
 
-        has_overdue = any(d.due_date < now for d in deadlines)
-        has_upcoming = any(now <= d.due_date <= soon for d in deadlines)
+        has_overdue = any(due < now for due in deadlines)
+        has_upcoming = any(now <= due <= soon for due in deadlines)
 
         target_status = case.status
         if has_overdue:
@@ -178,21 +195,23 @@ async def sync_case_statuses(
             updated += 1
 
     if updated:
-        db.commit()
+        await db.commit()
 
     return {"updated": updated, "scanned": len(cases)}
 
 
 @router.post("/automation/deadline-templates")
 async def generate_case_deadlines(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     now = datetime.utcnow()
-    cases = db.query(Case).filter(
-        Case.user_id == current_user.id,
-        Case.status.notin_(["closed", "archived"]),
-    ).all()
+    cases = (await db.scalars(
+        select(Case).where(
+            Case.user_id == current_user.id,
+            Case.status.notin_(["closed", "archived"]),
+        )
+    )).all()
 
     templates = [
         {"title": "Initial Case Review", "days": 3, "priority": "medium", "reminder_days": 1},
@@ -201,16 +220,20 @@ async def generate_case_deadlines(
         {"title": "Client Status Update", "days": 30, "priority": "low", "reminder_days": 2},
     ]
 
+    titles_by_case: dict[str, set[str]] = defaultdict(set)
+    for case_id, title in await db.execute(
+        select(Deadline.case_id, Deadline.title).where(
+            Deadline.user_id == current_user.id,
+            Deadline.case_id.isnot(None),
+        )
+    ):
+        titles_by_case[case_id].add(title.strip().lower())
+
     created = 0
     skipped_cases = 0
     for case in cases:
         base_date = case.filing_date or now
-        existing_titles = {
-            d.title.strip().lower() for d in db.query(Deadline).filter(
-                Deadline.user_id == current_user.id,
-                Deadline.case_id == case.id,
-            ).all()
-        }
+        existing_titles = titles_by_case[case.id]
 
         case_created = 0
         for t in templates:
@@ -233,7 +256,7 @@ async def generate_case_deadlines(
         created += case_created
 
     if created:
-        db.commit()
+        await db.commit()
 
     return {
         "created": created,
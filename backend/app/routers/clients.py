@@ -1,118 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.models.billing import Invoice
+from app.models.case import Case
 from app.models.client import Client
-from app.models.user import User
 from app.schemas.client import ClientCreate, ClientResponse, ClientUpdate
-from app.services.auth import get_current_user
+from app.services.auth import CurrentUser, get_current_user
+from app.services.importer import ImportSpec, import_rows, non_empty
+from app.services.pagination import paginate
+from app.services.query_stats import query_budget
+from app.services.search import contains, ranked
+from app.services.soft_delete import delete_rows, soft_delete_enabled
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
 
+def _client_name(row: dict) -> str:
+    name = row.get("name", "").strip()
+    if not name:
+        raise ValueError("name is required")
+    return name
+
+
+CLIENT_IMPORT = ImportSpec(
+    model=Client,
+    key_column=Client.name,
+    key=_client_name,
+    new=lambda row: {
+        "name": _client_name(row),
+        "email": row.get("email"),
+        "phone": row.get("phone"),
+        "address": row.get("address"),
+        "company": row.get("company"),
+        "status": row.get("status", "active"),
+        "notes": row.get("notes"),
+    },
+    changes=lambda row: non_empty(row, ["email", "phone", "address", "company", "status", "notes"]),
+)
+
+
 @router.post("/import")
+@query_budget(None)
 async def import_clients(
     body: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """Bulk import clients from JSON array. Updates existing by name match."""
     rows = body.get("data", [])
     if not rows:
         raise HTTPException(status_code=400, detail="No data provided")
-    created = 0
-    updated = 0
-    errors = []
-    for i, row in enumerate(rows):
-        try:
-            name = row.get("name", "").strip()
-            if not name:
-                errors.append(f"Row {i+1}: name is required")
-                continue
-            # Check if client already exists (by name + user)
-            existing = db.query(Client).filter(
-                Client.user_id == current_user.id,
-                Client.name.ilike(name)
-            ).first()
-            if existing:
-                # Update existing record with non-empty fields
-                for field in ["email", "phone", "address", "company", "status", "notes"]:
-                    val = row.get(field)
-                    if val is not None and str(val).strip():
-                        setattr(existing, field, val)
-                updated += 1
-            else:
-                client = Client(
-                    user_id=current_user.id,
-                    name=name,
-                    email=row.get("email"),
-                    phone=row.get("phone"),
-                    address=row.get("address"),
-                    company=row.get("company"),
-                    status=row.get("status", "active"),
-                    notes=row.get("notes"),
-                )
-                db.add(client)
-                created += 1
-        except Exception as e:
-            errors.append(f"Row {i+1}: {str(e)}")
-    db.commit()
-    return {"created": created, "updated": updated, "errors": errors}
+    result = await import_rows(db, CLIENT_IMPORT, current_user.id, rows)
+    await db.commit()
+    return result
 
 
 @router.get("/addresses")
+@query_budget(2)
 async def list_addresses(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Return distinct non-empty addresses used by this user's clients."""
-    rows = (
-        db.query(Client.address)
-        .filter(Client.user_id == current_user.id, Client.address.isnot(None), Client.address != "")
+    rows = await db.scalars(
+        select(Client.address)
+        .where(Client.user_id == current_user.id, Client.address.isnot(None), Client.address != "")
         .distinct()
         .order_by(Client.address)
-        .all()
     )
-    return [r[0] for r in rows]
+    return rows.all()
 
 
 @router.get("", response_model=list[ClientResponse])
+@query_budget(2)
 async def list_clients(
+    response: Response,
     status: str | None = None,
     search: str | None = None,
+    rank: bool = False,
     limit: int = Query(default=25, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Client).filter(Client.user_id == current_user.id)
+    query = select(Client).where(Client.user_id == current_user.id)
     if status:
-        query = query.filter(Client.status == status)
+        query = query.where(Client.status == status)
     if search:
-        query = query.filter(Client.name.ilike(f"%{search}%"))
-    return query.order_by(Client.created_at.desc()).offset(offset).limit(limit).all()
+        query = query.where(contains(search, Client.name, Client.email, Client.company))
+        if rank:
+            return await ranked(db, query, search, Client.name, Client.email, Client.company, limit=limit, offset=offset)
+    return await paginate(
+        db, query, Client.created_at, Client.id, response,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
 
 
 @router.post("", response_model=ClientResponse, status_code=201)
 async def create_client(
     data: ClientCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     client = Client(user_id=current_user.id, **data.model_dump())
     db.add(client)
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
     return client
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
+@query_budget(2)
 async def get_client(
     client_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+    client = await db.scalar(select(Client).where(Client.id == client_id, Client.user_id == current_user.id))
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     return client
@@ -122,27 +129,30 @@ async def get_client(
 async def update_client(
     client_id: str,
     data: ClientUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
+    client = await db.scalar(select(Client).where(Client.id == client_id, Client.user_id == current_user.id))
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(client, field, value)
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
     return client
 
 
 @router.delete("/{client_id}", status_code=204)
 async def delete_client(
     client_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    client = db.query(Client).filter(Client.id == client_id, Client.user_id == current_user.id).first()
-    if not client:
+    # One statement: a hard delete cascades in the database to cases (and everything under them) and invoices
+    if not await delete_rows(db, Client, Client.id == client_id, Client.user_id == current_user.id):
         raise HTTPException(status_code=404, detail="Client not found")
-    db.delete(client)
-    db.commit()
+    if soft_delete_enabled():
+        # The marked client still holds its rows: mark its invoices and cases with it, the purge removes them all
+        await delete_rows(db, Invoice, Invoice.client_id == client_id)
+        await delete_rows(db, Case, Case.client_id == client_id)
+    await db.commit()
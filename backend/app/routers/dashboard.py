@@ -1,87 +1,78 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
 
-from app.database import get_db
-from app.services.auth import get_current_user
-from app.models.user import User
-from app.models.client import Client, ClientStatus
-from app.models.case import Case, CaseStatus
+from app.database import get_read_db
+from app.services.auth import CurrentUser, get_current_user
+from app.services.dashboard_stats import COUNTERS, count_dashboard_stats, month_bounds
+from app.services.query_stats import query_budget
+from app.models.case import Case
+from app.models.dashboard import DashboardStats
 from app.models.document import Document
-from app.models.billing import Invoice, InvoiceStatus, TimeEntry
+from app.models.billing import Invoice, TimeEntry
 from app.models.calendar import Deadline, Appointment, AppointmentStatus
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
 
 @router.get("/stats")
+@query_budget(2)
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
+    """Totals from the user's dashboard_stats row, with how long ago they were last fully recounted (null if never)."""
     uid = current_user.id
-
-    active_clients = db.query(func.count(Client.id)).filter(
-        Client.user_id == uid, Client.status == ClientStatus.ACTIVE
-    ).scalar()
-
-    open_cases = db.query(func.count(Case.id)).filter(
-        Case.user_id == uid, Case.status.in_([CaseStatus.OPEN, CaseStatus.IN_PROGRESS, CaseStatus.PENDING])
-    ).scalar()
-
-    documents = db.query(func.count(Document.id)).filter(
-        Document.user_id == uid
-    ).scalar()
-
-    pending_invoices = db.query(func.count(Invoice.id)).filter(
-        Invoice.user_id == uid, Invoice.status.in_([InvoiceStatus.SENT, InvoiceStatus.OVERDUE])
-    ).scalar()
-
-    # Revenue
-    total_billed = db.query(func.coalesce(func.sum(Invoice.total), 0)).filter(
-        Invoice.user_id == uid, Invoice.status != InvoiceStatus.CANCELLED
-    ).scalar()
-
-    total_collected = db.query(func.coalesce(func.sum(Invoice.total), 0)).filter(
-        Invoice.user_id == uid, Invoice.status == InvoiceStatus.PAID
-    ).scalar()
-
-    outstanding = db.query(func.coalesce(func.sum(Invoice.total), 0)).filter(
-        Invoice.user_id == uid, Invoice.status.in_([InvoiceStatus.SENT, InvoiceStatus.OVERDUE])
-    ).scalar()
-
-    # Billable hours this month
-    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    billable_hours = db.query(func.coalesce(func.sum(TimeEntry.hours), 0)).filter(
-        TimeEntry.user_id == uid, TimeEntry.is_billable == True, TimeEntry.date >= month_start
-    ).scalar()
+    now = datetime.utcnow()
+    month_start, next_month_start = month_bounds(now)
+
+    stored = await db.get(DashboardStats, uid)
+    if stored is None:
+        totals = await count_dashboard_stats(db, uid)
+        updated_at = reconciled_at = now
+    else:
+        totals = {key: getattr(stored, key) for key in COUNTERS}
+        updated_at, reconciled_at = stored.updated_at, stored.reconciled_at
+        if stored.hours_month != month_start.date():
+            # The month rolled over since the last reconcile; only the hours need a live sum
+            totals["billable_hours_month"] = await db.scalar(
+                select(func.coalesce(func.sum(TimeEntry.hours), 0)).where(
+                    TimeEntry.user_id == uid, TimeEntry.is_billable == True,
+                    TimeEntry.date >= month_start, TimeEntry.date < next_month_start,
+                )
+            )
 
     return {
-        "active_clients": active_clients,
-        "open_cases": open_cases,
-        "documents": documents,
-        "pending_invoices": pending_invoices,
-        "total_billed": float(total_billed),
-        "total_collected": float(total_collected),
-        "outstanding": float(outstanding),
-        "billable_hours_month": float(billable_hours),
+        "active_clients": int(totals["active_clients"]),
+        "open_cases": int(totals["open_cases"]),
+        "documents": int(totals["documents"]),
+        "pending_invoices": int(totals["pending_invoices"]),
+        "total_billed": float(totals["total_billed"]),
+        "total_collected": float(totals["total_collected"]),
+        "outstanding": float(totals["outstanding"]),
+        "billable_hours_month": float(totals["billable_hours_month"]),
+        "updated_at": updated_at.isoformat(),
+        "reconciled_at": reconciled_at.isoformat() if reconciled_at else None,
+        "age_seconds": max(0, int((now - reconciled_at).total_seconds())) if reconciled_at else None,
     }
 
 
 @router.get("/deadlines")
+@query_budget(3)
 async def get_upcoming_deadlines(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     uid = current_user.id
-    deadlines = (
-        db.query(Deadline)
-        .filter(Deadline.user_id == uid, Deadline.is_completed == False, Deadline.due_date >= datetime.utcnow())
+    deadlines = (await db.scalars(
+        select(Deadline)
+        .where(Deadline.user_id == uid, Deadline.is_completed == False, Deadline.due_date >= datetime.utcnow())
+        .options(selectinload(Deadline.case))
         .order_by(Deadline.due_date)
         .limit(5)
-        .all()
-    )
+    )).all()
     return [
         {
             "id": d.id,
@@ -96,22 +87,22 @@ async def get_upcoming_deadlines(
 
 
 @router.get("/activity")
+@query_budget(4)
 async def get_recent_activity(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Aggregates recent items from multiple tables as activity feed."""
     uid = current_user.id
     activities = []
 
     # Recent documents
-    recent_docs = (
-        db.query(Document)
-        .filter(Document.user_id == uid)
+    recent_docs = (await db.scalars(
+        select(Document)
+        .where(Document.user_id == uid)
         .order_by(Document.created_at.desc())
         .limit(3)
-        .all()
-    )
+    )).all()
     for doc in recent_docs:
         activities.append({
             "type": "document",
@@ -121,13 +112,12 @@ async def get_recent_activity(
         })
 
     # Recent invoices
-    recent_inv = (
-        db.query(Invoice)
-        .filter(Invoice.user_id == uid)
+    recent_inv = (await db.scalars(
+        select(Invoice)
+        .where(Invoice.user_id == uid)
         .order_by(Invoice.created_at.desc())
         .limit(3)
-        .all()
-    )
+    )).all()
     for inv in recent_inv:
         status_verb = {"paid": "Payment received", "sent": "Invoice sent", "draft": "Invoice drafted", "overdue": "Invoice overdue"}.get(inv.status.value, "Invoice updated")
         activities.append({
@@ -138,13 +128,12 @@ async def get_recent_activity(
         })
 
     # Recent cases
-    recent_cases = (
-        db.query(Case)
-        .filter(Case.user_id == uid)
+    recent_cases = (await db.scalars(
+        select(Case)
+        .where(Case.user_id == uid)
         .order_by(Case.created_at.desc())
         .limit(2)
-        .all()
-    )
+    )).all()
     for c in recent_cases:
         activities.append({
             "type": "case",
@@ -159,25 +148,26 @@ async def get_recent_activity(
 
 
 @router.get("/appointments")
+@query_budget(4)
 async def get_upcoming_appointments(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     uid = current_user.id
     now = datetime.utcnow()
     window_start = now - timedelta(hours=12)
 
-    appointments = (
-        db.query(Appointment)
-        .filter(
+    appointments = (await db.scalars(
+        select(Appointment)
+        .where(
             Appointment.user_id == uid,
             Appointment.start_time >= window_start,
             Appointment.status.in_([AppointmentStatus.SCHEDULED, AppointmentStatus.CONFIRMED]),
         )
+        .options(selectinload(Appointment.case), selectinload(Appointment.client))
         .order_by(Appointment.start_time)
         .limit(12)
-        .all()
-    )
+    )).all()
 
     upcoming = [ap for ap in appointments if ap.end_time >= now]
     if len(upcoming) < 6:
@@ -1,129 +1,200 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import LargeBinary, cast, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer, undefer_group, with_expression
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.document import Document, DocumentTemplate
-from app.models.user import User
 from app.schemas.document import (
-    DocumentCreate, DocumentResponse, DocumentUpdate,
-    DocumentTemplateCreate, DocumentTemplateResponse,
+    DocumentCreate, DocumentResponse, DocumentUpdate, DocumentSearchResult, DocumentSummary,
+    DocumentTemplateCreate, DocumentTemplateResponse, DocumentTemplateSummary,
     DocumentAnalysisRequest, DocumentAnalysisResponse,
     DocumentDraftRequest,
 )
-from app.services.auth import get_current_user
+from app.services.auth import CurrentUser, get_current_user
+from app.services.importer import ImportSpec, import_rows, non_empty
+from app.services.pagination import paginate
+from app.services.query_stats import query_budget
+from app.services.search import contains, ranked, search_document_text
 from app.services.ai_service import analyze_document, draft_document
+from app.services.batch_analysis import get_status as get_batch_analysis_status
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
+EXCERPT_CHARS = 200  # Start of each body sent with list entries
+
+
+def summary_options(db: AsyncSession, model) -> list:
+    """Fill the model's `size` and `excerpt` expressions in SQL, leaving the deferred bodies unread."""
+    if db.bind.dialect.name == "postgresql":
+        size = func.octet_length(model.content)  # Read from the TOAST header, without decompressing
+    else:
+        size = func.length(cast(model.content, LargeBinary))
+    options = [
+        with_expression(model.size, func.coalesce(size, 0)),
+        with_expression(model.excerpt, func.substr(model.content, 1, EXCERPT_CHARS)),
+    ]
+    if model is Document:
+        options.append(with_expression(Document.ai_summary_excerpt, func.substr(Document.ai_summary, 1, EXCERPT_CHARS)))
+    return options
+
+
+def _document_title(row: dict) -> str:
+    title = row.get("title", "").strip()
+    if not title:
+        raise ValueError("title is required")
+    return title
+
+
+DOCUMENT_IMPORT = ImportSpec(
+    model=Document,
+    key_column=Document.title,
+    key=_document_title,
+    new=lambda row: {
+        "title": _document_title(row),
+        "doc_type": row.get("doc_type", "other"),
+        "content": row.get("content", ""),
+        "case_id": row.get("case_id") or None,
+    },
+    changes=lambda row: non_empty(row, ["doc_type", "content", "case_id"]),
+    bump="version",
+)
+
+
+async def refresh_with_body(db: AsyncSession, obj) -> None:
+    """refresh() leaves deferred columns unloaded; naming every column loads the bodies too."""
+    await db.refresh(obj, [prop.key for prop in inspect(obj).mapper.column_attrs])
+
 
 @router.post("/import")
+@query_budget(None)
 async def import_documents(
     body: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """Bulk import documents from JSON array. Updates existing by title match."""
     rows = body.get("data", [])
     if not rows:
         raise HTTPException(status_code=400, detail="No data provided")
-    created = 0
-    updated = 0
-    errors = []
-    for i, row in enumerate(rows):
-        try:
-            title = row.get("title", "").strip()
-            if not title:
-                errors.append(f"Row {i+1}: title is required")
-                continue
-            existing = db.query(Document).filter(
-                Document.user_id == current_user.id,
-                Document.title.ilike(title)
-            ).first()
-            if existing:
-                for field in ["doc_type", "content", "case_id"]:
-                    val = row.get(field)
-                    if val is not None and str(val).strip():
-                        setattr(existing, field, val)
-                existing.version += 1
-                updated += 1
-            else:
-                doc = Document(
-                    user_id=current_user.id,
-                    title=title,
-                    doc_type=row.get("doc_type", "other"),
-                    content=row.get("content", ""),
-                    case_id=row.get("case_id") or None,
-                )
-                db.add(doc)
-                created += 1
-        except Exception as e:
-            errors.append(f"Row {i+1}: {str(e)}")
-    db.commit()
-    return {"created": created, "updated": updated, "errors": errors}
+    result = await import_rows(db, DOCUMENT_IMPORT, current_user.id, rows)
+    await db.commit()
+    return result
 
 
 # --- Templates (must be before /{doc_id} to avoid path conflicts) ---
 
-@router.get("/templates", response_model=list[DocumentTemplateResponse])
-async def list_templates(db: Session = Depends(get_db)):
-    return db.query(DocumentTemplate).order_by(DocumentTemplate.name).all()
+@router.get("/templates", response_model=list[DocumentTemplateSummary] | list[DocumentTemplateResponse])
+@query_budget(1)
+async def list_templates(include_content: bool = False, db: AsyncSession = Depends(get_read_db)):
+    """Templates without their bodies, unless include_content=true."""
+    query = select(DocumentTemplate).order_by(DocumentTemplate.name)
+    if include_content:
+        rows = await db.scalars(query.options(undefer_group("body")))
+        return [DocumentTemplateResponse.model_validate(row) for row in rows]
+    rows = await db.scalars(query.options(*summary_options(db, DocumentTemplate)))
+    return [DocumentTemplateSummary.model_validate(row) for row in rows]
+
+
+@router.get("/templates/{template_id}", response_model=DocumentTemplateResponse)
+@query_budget(1)
+async def get_template(template_id: str, db: AsyncSession = Depends(get_read_db)):
+    template = await db.scalar(
+        select(DocumentTemplate).where(DocumentTemplate.id == template_id).options(undefer_group("body"))
+    )
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template
 
 
 @router.post("/templates", response_model=DocumentTemplateResponse, status_code=201)
 async def create_template(
     data: DocumentTemplateCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     template = DocumentTemplate(**data.model_dump())
     db.add(template)
-    db.commit()
-    db.refresh(template)
+    await db.commit()
+    await refresh_with_body(db, template)
     return template
 
 
+@router.get("/search", response_model=list[DocumentSearchResult])
+@query_budget(2)
+async def search_documents(
+    q: str = Query(min_length=2, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Full-text search over document titles and bodies, best matches first, with highlighted snippets."""
+    return await search_document_text(db, current_user.id, q.strip(), limit=limit, offset=offset)
+
+
 # --- Documents CRUD ---
 
-@router.get("", response_model=list[DocumentResponse])
+@router.get("", response_model=list[DocumentSummary] | list[DocumentResponse])
+@query_budget(2)
 async def list_documents(
+    response: Response,
     case_id: str | None = None,
     doc_type: str | None = None,
     search: str | None = None,
+    rank: bool = False,
+    include_content: bool = False,
     limit: int = Query(default=25, ge=1, le=200),
-    offset: int = Query(default=0, ge=0),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    offset: int | None = Query(default=None, ge=0),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    query = db.query(Document).filter(Document.user_id == current_user.id)
+    """Summaries (size and excerpts instead of bodies) unless include_content=true asks for full documents."""
+    query = select(Document).where(Document.user_id == current_user.id)
+    if include_content:
+        query, schema = query.options(undefer_group("body")), DocumentResponse
+    else:
+        query, schema = query.options(*summary_options(db, Document)), DocumentSummary
     if case_id:
-        query = query.filter(Document.case_id == case_id)
+        query = query.where(Document.case_id == case_id)
     if doc_type:
-        query = query.filter(Document.doc_type == doc_type)
+        query = query.where(Document.doc_type == doc_type)
     if search:
-        query = query.filter(Document.title.ilike(f"%{search}%"))
-    return query.order_by(Document.created_at.desc()).offset(offset).limit(limit).all()
+        query = query.where(contains(search, Document.title))
+        if rank:
+            rows = await ranked(db, query, search, Document.title, limit=limit, offset=offset)
+            return [schema.model_validate(row) for row in rows]
+    rows = await paginate(
+        db, query, Document.created_at, Document.id, response,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
+    return [schema.model_validate(row) for row in rows]
 
 
 @router.post("", response_model=DocumentResponse, status_code=201)
 async def create_document(
     data: DocumentCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     doc = Document(user_id=current_user.id, **data.model_dump())
     db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    await db.commit()
+    await refresh_with_body(db, doc)
     return doc
 
 
 @router.get("/{doc_id}", response_model=DocumentResponse)
+@query_budget(2)
 async def get_document(
     doc_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    doc = db.query(Document).filter(Document.id == doc_id, Document.user_id == current_user.id).first()
+    doc = await db.scalar(
+        select(Document).where(Document.id == doc_id, Document.user_id == current_user.id).options(undefer_group("body"))
+    )
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
@@ -133,31 +204,33 @@ async def get_document(
 async def update_document(
     doc_id: str,
     data: DocumentUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    doc = db.query(Document).filter(Document.id == doc_id, Document.user_id == current_user.id).first()
+    doc = await db.scalar(
+        select(Document).where(Document.id == doc_id, Document.user_id == current_user.id).options(undefer_group("body"))
+    )
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     for field, value in data.model_dump(exclude_unset=True).items():
         setattr(doc, field, value)
     doc.version += 1
-    db.commit()
-    db.refresh(doc)
+    await db.commit()
+    await refresh_with_body(db, doc)
     return doc
 
 
 @router.delete("/{doc_id}", status_code=204)
 async def delete_document(
     doc_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    doc = db.query(Document).filter(Document.id == doc_id, Document.user_id == current_user.id).first()
+    doc = await db.scalar(select(Document).where(Document.id == doc_id, Document.user_id == current_user.id))
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    db.delete(doc)
-    db.commit()
+    await db.delete(doc)
+    await db.commit()
 
 
 # --- AI Document Analysis ---
@@ -165,14 +238,14 @@ async def delete_document(
 @router.post("/analyze", response_model=DocumentAnalysisResponse)
 async def analyze_doc(
     request: DocumentAnalysisRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     content = request.content
     if request.document_id:
-        doc = db.query(Document).filter(
+        doc = await db.scalar(select(Document).where(
             Document.id == request.document_id, Document.user_id == current_user.id
-        ).first()
+        ).options(undefer(Document.content)))
         if not doc:
             raise HTTPException(status_code=404, detail="Document not found")
         content = doc.content
@@ -180,30 +253,43 @@ async def analyze_doc(
     if not content:
         raise HTTPException(status_code=400, detail="No content to analyze")
 
-    result = await analyze_document(content)
+    result = await analyze_document(content, user_id=current_user.id)
 
     # Save analysis to document if document_id provided
     if request.document_id:
         import json
         doc.ai_summary = result.get("summary", "")
         doc.ai_risk_flags = json.dumps(result.get("risk_flags", []))
-        db.commit()
+        doc.ai_analyzed_version = doc.version
+        await db.commit()
 
     return DocumentAnalysisResponse(**result)
 
 
+@router.get("/analysis/batch")
+@query_budget(2)
+async def batch_analysis_status(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """State of the nightly batch analysis job and the caller's documents still waiting for it."""
+    return await get_batch_analysis_status(db, current_user.id)
+
+
 # --- AI Document Drafting ---
 
 @router.post("/draft/preview")
 async def draft_preview(
     request: DocumentDraftRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Generate a draft preview without saving. Returns editable content."""
     template_content = None
     if request.template_id:
-        template = db.query(DocumentTemplate).filter(DocumentTemplate.id == request.template_id).first()
+        template = await db.scalar(
+            select(DocumentTemplate).where(DocumentTemplate.id == request.template_id).options(undefer(DocumentTemplate.content))
+        )
         if template:
             template_content = template.content
 
@@ -212,7 +298,7 @@ async def draft_preview(
     if not context:
         context = f"Draft a professional {request.doc_type} document with all standard legal clauses, sections, and formatting."
 
-    content = await draft_document(request.doc_type, context, template_content)
+    content = await draft_document(request.doc_type, context, template_content, user_id=current_user.id)
     title = f"Draft - {request.doc_type.title()}"
     return {"title": title, "content": content, "doc_type": request.doc_type}
 
@@ -220,12 +306,14 @@ async def draft_preview(
 @router.post("/draft", response_model=DocumentResponse)
 async def draft_doc(
     request: DocumentDraftRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     template_content = None
     if request.template_id:
-        template = db.query(DocumentTemplate).filter(DocumentTemplate.id == request.template_id).first()
+        template = await db.scalar(
+            select(DocumentTemplate).where(DocumentTemplate.id == request.template_id).options(undefer(DocumentTemplate.content))
+        )
         if template:
             template_content = template.content
 
@@ -233,7 +321,7 @@ async def draft_doc(
     if not context:
         context = f"Draft a professional {request.doc_type} document with all standard legal clauses, sections, and formatting."
 
-    content = await draft_document(request.doc_type, context, template_content)
+    content = await draft_document(request.doc_type, context, template_content, user_id=current_user.id)
 
     doc = Document(
         user_id=current_user.id,
@@ -243,8 +331,8 @@ async def draft_doc(
         template_id=request.template_id,
     )
     db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    await db.commit()
+    await refresh_with_body(db, doc)
     return doc
 
 
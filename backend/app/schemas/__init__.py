@@ -2,8 +2,8 @@ from app.schemas.user import RegisterRequest, LoginRequest, UserResponse, UserUp
 from app.schemas.client import ClientCreate, ClientResponse, ClientUpdate
 from app.schemas.case import CaseCreate, CaseResponse, CaseUpdate
 from app.schemas.document import (
-    DocumentCreate, DocumentResponse, DocumentUpdate,
-    DocumentTemplateCreate, DocumentTemplateResponse,
+    DocumentCreate, DocumentResponse, DocumentUpdate, DocumentSummary,
+    DocumentTemplateCreate, DocumentTemplateResponse, DocumentTemplateSummary,
     DocumentAnalysisRequest, DocumentAnalysisResponse,
     DocumentDraftRequest,
 )
@@ -18,4 +18,7 @@ from app.schemas.calendar import (
     AppointmentCreate, AppointmentResponse, AppointmentUpdate,
     AppointmentAutomationRunRequest, AppointmentAutomationResponse,
 )
-from app.schemas.ai import ResearchRequest, ResearchResponse
+from app.schemas.ai import (
+    ResearchRequest, ResearchResponse,
+    ResearchHistoryItem, ResearchHistoryPage, ResearchHistoryDetail,
+)
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 
 
 class ResearchRequest(BaseModel):
@@ -7,6 +8,7 @@ class ResearchRequest(BaseModel):
     area_of_law: str | None = None
     include_case_law: bool = True
     include_statutes: bool = True
+    use_history: bool = False  # Replay a fresh stored result for an identical request
 
 
 class ResearchResponse(BaseModel):
@@ -16,3 +18,29 @@ class ResearchResponse(BaseModel):
     relevant_statutes: list[dict]
     recommendations: list[str]
     disclaimer: str = "This is AI-generated research and should be verified by a licensed attorney."
+    history_id: str | None = None
+    from_history: bool = False
+
+
+class ResearchHistoryItem(BaseModel):
+    id: str
+    query: str
+    jurisdiction: str | None
+    area_of_law: str | None
+    include_case_law: bool
+    include_statutes: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ResearchHistoryPage(BaseModel):
+    items: list[ResearchHistoryItem]
+    total: int
+    limit: int
+    offset: int
+
+
+class ResearchHistoryDetail(ResearchHistoryItem):
+    result: ResearchResponse
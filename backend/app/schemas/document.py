@@ -33,6 +33,34 @@ class DocumentResponse(BaseModel):
         from_attributes = True
 
 
+class DocumentSummary(BaseModel):
+    """List entry: everything but the bodies, which GET /documents/{id} returns."""
+    id: str
+    case_id: str | None
+    title: str
+    doc_type: str
+    file_path: str | None
+    size: int  # Bytes of content
+    excerpt: str | None  # Start of content
+    ai_summary_excerpt: str | None
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentSearchResult(BaseModel):
+    id: str
+    case_id: str | None
+    title: str
+    doc_type: str
+    updated_at: datetime
+    rank: float
+    snippet: str  # Matching passage with terms wrapped in <mark>; not HTML-escaped
+
+
 class DocumentTemplateCreate(BaseModel):
     name: str
     doc_type: str = "other"
@@ -55,6 +83,21 @@ class DocumentTemplateResponse(BaseModel):
         from_attributes = True
 
 
+class DocumentTemplateSummary(BaseModel):
+    id: str
+    name: str
+    doc_type: str
+    size: int  # Bytes of content
+    excerpt: str
+    variables: str | None
+    description: str | None
+    is_system: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class DocumentAnalysisRequest(BaseModel):
     document_id: str | None = None
     content: str | None = None  # Direct text input
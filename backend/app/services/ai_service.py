@@ -1,24 +1,33 @@
 import json
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.config import get_settings
+from app.services.quota import check_quota, record_usage
 
 settings = get_settings()
 
 
-def get_openai_client() -> OpenAI:
+def get_openai_client() -> AsyncOpenAI:
     """Returns an OpenAI-compatible client pointing to Groq."""
-    return OpenAI(
+    return AsyncOpenAI(
         api_key=settings.GROQ_API_KEY,
         base_url="https://api.groq.com/openai/v1",
     )
 
 
-async def analyze_document(content: str) -> dict:
-    """Analyze a legal document for key clauses, risks, and summary."""
-    client = get_openai_client()
+async def _chat_completion(user_id: str | None, **kwargs):
+    """Create a chat completion, enforcing and recording the user's AI quota."""
+    if user_id:
+        check_quota(user_id)
+    response = await get_openai_client().chat.completions.create(model=settings.AI_MODEL, **kwargs)
+    if user_id:
+        record_usage(user_id, response.usage)
+    return response
+
 
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+async def analyze_document(content: str, user_id: str | None = None) -> dict:
+    """Analyze a legal document for key clauses, risks, and summary."""
+    response = await _chat_completion(
+        user_id,
         messages=[
             {
                 "role": "system",
@@ -39,10 +48,8 @@ Return ONLY valid JSON.""",
     return json.loads(response.choices[0].message.content)
 
 
-async def draft_document(doc_type: str, context: str, template: str | None = None) -> str:
+async def draft_document(doc_type: str, context: str, template: str | None = None, user_id: str | None = None) -> str:
     """Draft a legal document using AI. Produces polished, human-written output."""
-    client = get_openai_client()
-
     today = __import__("datetime").date.today().strftime("%B %d, %Y")
 
     system_prompt = f"""You are a senior attorney at a prestigious law firm drafting a {doc_type} document.
@@ -59,8 +66,8 @@ CRITICAL RULES:
 
 Write it as if you are billing $800/hour and this will be reviewed by a partner."""
 
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+    response = await _chat_completion(
+        user_id,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": context},
@@ -78,10 +85,9 @@ async def legal_research(
     area_of_law: str | None = None,
     include_case_law: bool = True,
     include_statutes: bool = True,
+    user_id: str | None = None,
 ) -> dict:
     """Perform AI-powered legal research."""
-    client = get_openai_client()
-
     context_parts = [f"Research query: {query}"]
     if jurisdiction:
         context_parts.append(f"Jurisdiction: {jurisdiction}")
@@ -94,8 +100,8 @@ async def legal_research(
     if include_statutes:
         sections.append('"relevant_statutes": list of objects with "statute", "section", and "relevance"')
 
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+    response = await _chat_completion(
+        user_id,
         messages=[
             {
                 "role": "system",
@@ -120,12 +126,10 @@ Return ONLY valid JSON.""",
     return result
 
 
-async def summarize_text(text: str) -> str:
+async def summarize_text(text: str, user_id: str | None = None) -> str:
     """Summarize any legal text."""
-    client = get_openai_client()
-
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+    response = await _chat_completion(
+        user_id,
         messages=[
             {
                 "role": "system",
@@ -143,10 +147,9 @@ async def suggest_keywords(
     partial_text: str,
     field_type: str = "general",
     context: str = "",
+    user_id: str | None = None,
 ) -> list[str]:
     """Return AI-powered keyword/auto-complete suggestions for a form field."""
-    client = get_openai_client()
-
     field_hints = {
         "case_title": "legal case titles (e.g. 'Smith v. Jones', 'In re Estate of...')",
         "case_type": "legal case types (e.g. civil, criminal, corporate, family, real_estate, immigration, intellectual_property, labor, tax)",
@@ -169,8 +172,8 @@ async def suggest_keywords(
 
     hint = field_hints.get(field_type, field_hints["general"])
 
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+    response = await _chat_completion(
+        user_id,
         messages=[
             {
                 "role": "system",
@@ -194,10 +197,9 @@ async def inline_complete(
     partial_text: str,
     field_type: str = "general",
     context: str = "",
+    user_id: str | None = None,
 ) -> str:
     """Gmail-style inline sentence completion. Returns ONLY the remaining text to append."""
-    client = get_openai_client()
-
     field_hints = {
         "case_title": "legal case titles (e.g. 'Smith v. Jones', 'In re Estate of...')",
         "case_type": "legal case types",
@@ -220,8 +222,8 @@ async def inline_complete(
 
     hint = field_hints.get(field_type, field_hints["general"])
 
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+    response = await _chat_completion(
+        user_id,
         messages=[
             {
                 "role": "system",
@@ -248,10 +250,14 @@ If the partial text already looks complete, return an empty string.""",
     return completion
 
 
-async def auto_fill_form(form_type: str, fields: list[str], existing: dict | None = None, context: str = "") -> dict:
+async def auto_fill_form(
+    form_type: str,
+    fields: list[str],
+    existing: dict | None = None,
+    context: str = "",
+    user_id: str | None = None,
+) -> dict:
     """Auto-fill a form with AI-generated realistic data based on form type and context."""
-    client = get_openai_client()
-
     today = __import__("datetime").date.today().strftime("%Y-%m-%d")
 
     form_prompts = {
@@ -273,8 +279,8 @@ async def auto_fill_form(form_type: str, fields: list[str], existing: dict | Non
         if non_empty:
             existing_str = f"\nAlready provided values (keep these, fill the rest): {json.dumps(non_empty)}"
 
-    response = client.chat.completions.create(
-        model=settings.AI_MODEL,
+    response = await _chat_completion(
+        user_id,
         messages=[
             {
                 "role": "system",
@@ -1,17 +1,138 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, WebSocket, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
 from passlib.context import CryptContext
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import AsyncSessionLocal
 from app.models.user import User
 
 settings = get_settings()
 security = HTTPBearer(auto_error=False)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with a different cost than BCRYPT_ROUNDS are reported as needing an update,
+# so they get rehashed transparently on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_desired_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_desired_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt is CPU-bound: run it on a small dedicated pool instead of the event loop, and
+# shed load once too many requests are queued for it (e.g. during credential stuffing).
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+_hash_pending = 0
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Verified principal for a request; a detached snapshot of the user's profile."""
+
+    id: str
+    email: str
+    name: str
+    picture: str | None
+    is_active: bool
+    firm_name: str | None
+    bar_number: str | None
+    phone: str | None
+    created_at: datetime
+    token_version: int = 1
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            picture=user.picture,
+            is_active=user.is_active,
+            firm_name=user.firm_name,
+            bar_number=user.bar_number,
+            phone=user.phone,
+            created_at=user.created_at,
+            token_version=user.token_version,
+        )
+
+
+# Profile fields carried in the access token so /auth/me and most requests need no DB read
+PROFILE_CLAIMS = ("email", "name", "picture", "is_active", "firm_name", "bar_number", "phone")
+MAX_PICTURE_CLAIM_LENGTH = 1024  # Keep the auth cookie well under browser limits
+
+# (user_id, token_version) -> unix time after which tokens of that version have expired anyway
+_revoked_versions: dict[tuple[str, int], float] = {}
+_revoked_lock = threading.Lock()
+
+
+def revoke_token_version(user_id: str, version: int) -> None:
+    now = time.time()
+    with _revoked_lock:
+        for key in [k for k, expires in _revoked_versions.items() if expires < now]:
+            del _revoked_versions[key]
+        _revoked_versions[(user_id, version)] = now + settings.JWT_EXPIRATION_MINUTES * 60
+
+
+def is_token_version_revoked(user_id: str, version: int) -> bool:
+    return (user_id, version) in _revoked_versions
+
+
+# user_id -> (expires_at, CurrentUser), least recently used first
+_principal_cache: OrderedDict[str, tuple[float, CurrentUser]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def invalidate_user(user_id: str) -> None:
+    with _cache_lock:
+        _principal_cache.pop(user_id, None)
+
+
+@event.listens_for(User, "before_update")
+def _bump_token_version(mapper, connection, target: User) -> None:
+    # Tokens embed the profile, so any profile, status or password change retires them
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in (*PROFILE_CLAIMS, "hashed_password")):
+        target.token_version = (target.token_version or 1) + 1
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target: User) -> None:
+    # Covers profile edits, deactivation and password changes from any code path in this process
+    invalidate_user(target.id)
+    for old_version in inspect(target).attrs.token_version.history.deleted:
+        if old_version is not None:
+            revoke_token_version(target.id, old_version)
+
+
+async def load_principal(user_id: str) -> CurrentUser | None:
+    """Return the cached principal, loading it from the database on a miss or expiry."""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _principal_cache.get(user_id)
+        if cached and cached[0] > now:
+            _principal_cache.move_to_end(user_id)
+            return cached[1]
+
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        principal = CurrentUser.from_user(user) if user else None
+
+    if principal is not None:
+        with _cache_lock:
+            _principal_cache[user_id] = (now + settings.AUTH_CACHE_TTL_SECONDS, principal)
+            _principal_cache.move_to_end(user_id)
+            while len(_principal_cache) > settings.AUTH_CACHE_MAX_ENTRIES:
+                _principal_cache.popitem(last=False)
+    return principal
 
 
 def hash_password(password: str) -> str:
@@ -22,25 +143,120 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(user_id: str) -> str:
-    expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRATION_MINUTES)
-    payload = {"sub": user_id, "exp": expire}
+async def _run_password_work(fn, *args):
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_work(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify off the event loop; also returns a new hash when the stored one uses an outdated cost."""
+    return await _run_password_work(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+# Hashed once at import: built lazily, the first unknown-email login would pay for a hash as well
+_dummy_hash = pwd_context.hash("dummy-password-for-timing")
+
+
+async def dummy_verify_password(plain_password: str) -> None:
+    """Spend the same bcrypt time as a real verify, so unknown emails can't be told apart by timing."""
+    await _run_password_work(pwd_context.verify, plain_password, _dummy_hash)
+
+
+def create_access_token(user: User | CurrentUser) -> str:
+    now = datetime.utcnow()
+    payload = {
+        "sub": user.id,
+        "exp": now + timedelta(minutes=settings.JWT_EXPIRATION_MINUTES),
+        "iat": now,
+        "ver": user.token_version,
+        "created_at": user.created_at.isoformat(),
+    }
+    for field in PROFILE_CLAIMS:
+        payload[field] = getattr(user, field)
+    if payload["picture"] and len(payload["picture"]) > MAX_PICTURE_CLAIM_LENGTH:
+        # Incomplete profile: requests with this token fall back to the principal cache
+        del payload["picture"]
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
-def verify_token(token: str) -> str | None:
+def decode_token(token: str) -> dict | None:
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> str | None:
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
+
+def _principal_from_claims(claims: dict) -> CurrentUser | None:
+    if any(field not in claims for field in PROFILE_CLAIMS):
+        return None
+    return CurrentUser(
+        id=claims["sub"],
+        email=claims["email"],
+        name=claims["name"],
+        picture=claims["picture"],
+        is_active=claims["is_active"],
+        firm_name=claims["firm_name"],
+        bar_number=claims["bar_number"],
+        phone=claims["phone"],
+        created_at=datetime.fromisoformat(claims["created_at"]),
+        token_version=claims["ver"],
+    )
+
+
+async def resolve_principal(token: str) -> CurrentUser:
+    """Turn a token into a principal, raising 401 if it is invalid, revoked or orphaned.
+
+    Recently issued tokens are trusted as-is (plus the in-memory revocation set);
+    older or legacy tokens are checked against the cached user row, which also
+    catches revocations made by other worker processes.
+    """
+    claims = decode_token(token)
+    if not claims or not claims.get("sub"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    user_id = claims["sub"]
+    version = claims.get("ver")
+    if version is not None and is_token_version_revoked(user_id, version):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+
+    principal = None
+    if version is not None and time.time() - claims.get("iat", 0) < settings.JWT_CLAIMS_TRUST_SECONDS:
+        principal = _principal_from_claims(claims)
+    if principal is None:
+        principal = await load_principal(user_id)
+        if principal is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        if version is not None and principal.token_version != version:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    return principal
+
+
 async def get_current_user(
     request: Request,
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
+) -> CurrentUser:
+    """Resolve the caller from token claims, or the principal cache; the DB only on a miss.
+
+    Handlers that need the ORM row (to modify the user) should load it themselves.
+    """
     token: str | None = None
     if credentials and credentials.credentials:
         token = credentials.credentials
@@ -50,11 +266,26 @@ async def get_current_user(
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-    user_id = verify_token(token)
-    if user_id is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user = await resolve_principal(token)
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is disabled")
     return user
 
+
+async def get_websocket_user(websocket: WebSocket) -> CurrentUser | None:
+    """Authenticate a WebSocket handshake from the auth cookie.
+
+    Never from the URL, where the token would end up in access logs. CORS does
+    not cover WebSockets, so a browser handshake must come from one of our origins.
+    """
+    origin = websocket.headers.get("origin")
+    if origin is not None and origin not in settings.allowed_origins:
+        return None
+    token = websocket.cookies.get("auth_token")
+    if not token:
+        return None
+    try:
+        user = await resolve_principal(token)
+    except HTTPException:
+        return None
+    return user if user.is_active else None
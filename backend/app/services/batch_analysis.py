@@ -0,0 +1,218 @@
+"""Off-peak batch analysis of documents whose AI analysis is missing or stale.
+
+Documents are scanned in primary-key order (keyset, never OFFSET) and the scan
+position is checkpointed with every committed document, so a run that stops at the
+end of the window, on the token budget or on a crash picks up where it left off.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.document import Document
+from app.models.job import JobCheckpoint
+from app.services.ai_service import analyze_document
+from app.services.quota import QuotaExceeded
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "document_batch_analysis"
+# Renewed before every analysis call, so it only has to outlast one: the client's default timeout is 10 minutes
+LEASE = timedelta(minutes=15)
+ANALYZED_CHARS = 6000  # analyze_document only sends this much content
+
+# Matches the predicate of ix_documents_pending_analysis, so per-user counts use that index
+PENDING = (
+    Document.content.isnot(None),
+    Document.content != "",
+    or_(Document.ai_summary.is_(None), Document.ai_analyzed_version < Document.version),
+)
+
+# Snapshot of the current/last run in this process; the status endpoint shows its job-level fields
+progress: dict = {
+    "running": False,
+    "started_at": None,
+    "finished_at": None,
+    "processed": 0,
+    "failed": 0,
+    "tokens_used": 0,
+    "stopped_reason": None,
+}
+
+
+def in_window(now: datetime) -> bool:
+    start, end = settings.BATCH_ANALYSIS_WINDOW_START_HOUR, settings.BATCH_ANALYSIS_WINDOW_END_HOUR
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end  # Window crosses midnight
+
+
+def estimate_tokens(content: str) -> int:
+    """Rough prompt + completion cost of one analysis (~4 chars per token)."""
+    return len(content[:ANALYZED_CHARS]) // 4 + 900
+
+
+def _acquire_lease(db) -> JobCheckpoint | None:
+    """Take the job lease so only one worker process runs the batch at a time."""
+    if db.get(JobCheckpoint, JOB_NAME) is None:
+        try:
+            db.add(JobCheckpoint(name=JOB_NAME))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+    now = datetime.utcnow()
+    acquired = db.execute(
+        update(JobCheckpoint)
+        .where(
+            JobCheckpoint.name == JOB_NAME,
+            or_(JobCheckpoint.locked_until.is_(None), JobCheckpoint.locked_until < now),
+        )
+        .values(locked_until=now + LEASE)
+    ).rowcount
+    db.commit()
+    return db.get(JobCheckpoint, JOB_NAME) if acquired else None
+
+
+def _pending_documents(db, cursor: str | None, limit: int):
+    query = db.query(Document.id, Document.user_id, Document.content, Document.version).filter(*PENDING)
+    if cursor:
+        query = query.filter(Document.id > cursor)
+    return query.order_by(Document.id).limit(limit).all()
+
+
+def run_batch_analysis(ignore_window: bool = False) -> dict:
+    """Analyze pending documents until done, out of budget, or outside the off-peak window."""
+    db = SessionLocal()
+    try:
+        checkpoint = _acquire_lease(db)
+        if checkpoint is None:
+            return {**progress, "stopped_reason": "already_running"}
+
+        if checkpoint.cursor is None:
+            # Fresh pass over the table; otherwise resume the interrupted one
+            checkpoint.run_started_at = datetime.utcnow()
+            checkpoint.processed = 0
+            checkpoint.failed = 0
+            checkpoint.tokens_used = 0
+            db.commit()
+
+        progress.update(
+            running=True,
+            started_at=checkpoint.run_started_at.isoformat(),
+            finished_at=None,
+            processed=checkpoint.processed,
+            failed=checkpoint.failed,
+            tokens_used=checkpoint.tokens_used,
+            stopped_reason=None,
+        )
+
+        budget_left = settings.BATCH_ANALYSIS_TOKEN_BUDGET
+        min_interval = 60.0 / max(settings.BATCH_ANALYSIS_REQUESTS_PER_MINUTE, 1)
+        last_call = 0.0
+        stopped_reason = None
+
+        while stopped_reason is None:
+            if not ignore_window and not in_window(datetime.now()):
+                stopped_reason = "window_closed"
+                break
+
+            rows = _pending_documents(db, checkpoint.cursor, settings.BATCH_ANALYSIS_BATCH_SIZE)
+            if not rows:
+                checkpoint.cursor = None
+                stopped_reason = "complete"
+                break
+
+            for row in rows:
+                cost = estimate_tokens(row.content)
+                if cost > budget_left:
+                    stopped_reason = "budget_exhausted"
+                    break
+
+                # Commits the previous document with its cursor, and keeps a slow batch from outliving the lease
+                checkpoint.locked_until = datetime.utcnow() + LEASE
+                db.commit()
+
+                wait = min_interval - (time.monotonic() - last_call)
+                if wait > 0:
+                    time.sleep(wait)
+                last_call = time.monotonic()
+
+                try:
+                    result = asyncio.run(analyze_document(row.content, user_id=row.user_id))
+                    # Skip the write if the document was edited mid-run; the next pass picks it up.
+                    # updated_at is pinned so analysis does not look like a user edit.
+                    written = db.execute(
+                        update(Document)
+                        .where(Document.id == row.id, Document.version == row.version)
+                        .values(
+                            ai_summary=result.get("summary", ""),
+                            ai_risk_flags=json.dumps(result.get("risk_flags", [])),
+                            ai_analyzed_version=row.version,
+                            updated_at=Document.updated_at,
+                        )
+                    ).rowcount
+                    if written:
+                        checkpoint.processed += 1
+                except QuotaExceeded:
+                    # Owner is out of quota: no upstream call was made, retry on a later pass
+                    checkpoint.cursor = row.id
+                    continue
+                except Exception:
+                    checkpoint.failed += 1
+
+                budget_left -= cost
+                checkpoint.tokens_used += cost
+                checkpoint.cursor = row.id
+
+            checkpoint.locked_until = datetime.utcnow() + LEASE
+            db.commit()
+            progress.update(
+                processed=checkpoint.processed,
+                failed=checkpoint.failed,
+                tokens_used=checkpoint.tokens_used,
+            )
+
+        checkpoint.locked_until = None
+        db.commit()
+        progress.update(
+            running=False,
+            finished_at=datetime.utcnow().isoformat(),
+            processed=checkpoint.processed,
+            failed=checkpoint.failed,
+            tokens_used=checkpoint.tokens_used,
+            stopped_reason=stopped_reason,
+        )
+        logger.info(
+            "Batch analysis stopped (%s): %d processed, %d failed, ~%d tokens",
+            stopped_reason, checkpoint.processed, checkpoint.failed, checkpoint.tokens_used,
+        )
+        return dict(progress)
+    except Exception:
+        progress.update(running=False, stopped_reason="error")
+        raise
+    finally:
+        db.close()
+
+
+async def get_status(db: AsyncSession, user_id: str) -> dict:
+    """State of the latest run plus how many of the user's documents are still waiting.
+
+    Run totals and the resume position span every tenant, so they stay in the
+    job's log line rather than this response.
+    """
+    pending = await db.scalar(select(func.count()).select_from(Document).where(Document.user_id == user_id, *PENDING))
+    return {
+        "running": progress["running"],
+        "started_at": progress["started_at"],
+        "finished_at": progress["finished_at"],
+        "stopped_reason": progress["stopped_reason"],
+        "pending": pending,
+    }
@@ -0,0 +1,237 @@
+"""Local per-user n-gram model for inline completion.
+
+Learns word sequences from the user's own Document and TimeEntry rows so that
+`/api/ai/complete` can answer common phrases (boilerplate clauses, court names,
+billing descriptions) without a round trip to the LLM. Rows are read in
+updated_at order, so edits are picked up; deleted rows are not unlearned
+until an edit next makes the model rebuild.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.billing import TimeEntry
+from app.models.document import Document
+
+settings = get_settings()
+
+ORDER = 3  # Words of history used as context
+MAX_COMPLETION_WORDS = 8
+MAX_CANDIDATES_PER_CONTEXT = 32
+MAX_CHARS_PER_ROW = 20000
+
+# Field types that should learn from billing descriptions rather than documents
+TIME_ENTRY_FIELDS = {"time_entry", "invoice_item"}
+
+
+class NgramModel:
+    """Word n-gram counts with backoff, capped at a fixed number of contexts."""
+
+    def __init__(self, max_contexts: int):
+        self.max_contexts = max_contexts
+        self.table: dict[tuple[str, ...], Counter] = {}
+        self.lock = threading.Lock()
+        self.watermark: tuple[datetime, str] | None = None  # (updated_at, id) of the last row learned
+        self.synced_at: datetime | None = None  # Start of the first read, then of the last one that caught up
+        self.rebuild: NgramModel | None = None  # Side model retraining from scratch after an edit
+        self.refreshed_at = 0.0
+        self.refreshing = False
+
+    def train(self, texts: list[str]) -> None:
+        delta: dict[tuple[str, ...], Counter] = {}
+        for text in texts:
+            for line in text[:MAX_CHARS_PER_ROW].splitlines():
+                tokens = line.split()
+                lowered = [t.lower() for t in tokens]
+                for i in range(1, len(tokens)):
+                    for n in range(1, min(ORDER, i) + 1):
+                        ctx = tuple(lowered[i - n:i])
+                        delta.setdefault(ctx, Counter())[tokens[i]] += 1
+
+        with self.lock:
+            for ctx, counts in delta.items():
+                existing = self.table.get(ctx)
+                if existing is None:
+                    self.table[ctx] = counts
+                else:
+                    existing.update(counts)
+            if len(self.table) > self.max_contexts:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Keep the most frequent contexts and their most frequent continuations."""
+        keep = int(self.max_contexts * 0.75)
+        ranked = sorted(self.table.items(), key=lambda kv: kv[1].total(), reverse=True)[:keep]
+        self.table = {
+            ctx: Counter(dict(counts.most_common(MAX_CANDIDATES_PER_CONTEXT)))
+            for ctx, counts in ranked
+        }
+
+    def _best(self, history: list[str], prefix: str) -> tuple[str | None, float]:
+        lowered_prefix = prefix.lower()
+        for n in range(min(ORDER, len(history)), 0, -1):
+            counts = self.table.get(tuple(history[-n:]))
+            if not counts:
+                continue
+            if lowered_prefix:
+                candidates = [(w, c) for w, c in counts.items() if w.lower().startswith(lowered_prefix)]
+            else:
+                candidates = list(counts.items())
+            total = sum(c for _, c in candidates)
+            if not candidates or total < settings.LOCAL_COMPLETION_MIN_SUPPORT:
+                continue
+            word, count = max(candidates, key=lambda wc: wc[1])
+            return word, count / total
+        return None, 0.0
+
+    def complete(self, text: str, min_confidence: float) -> str | None:
+        """Return the text to append, or None if the model is not confident."""
+        tokens = text.split()
+        if not tokens:
+            return None
+        trailing_space = text[-1].isspace()
+        history = [t.lower() for t in tokens]
+
+        completion = ""
+        confidence = 1.0
+        if not trailing_space:
+            prefix = tokens[-1]
+            history = history[:-1]
+            word, p = self._best(history, prefix)
+            if word is None or p < min_confidence:
+                return None
+            completion = word[len(prefix):]
+            history.append(word.lower())
+            confidence = p
+
+        for _ in range(MAX_COMPLETION_WORDS):
+            word, p = self._best(history, "")
+            if word is None or confidence * p < min_confidence:
+                break
+            separator = "" if not completion and trailing_space else " "
+            completion += separator + word
+            history.append(word.lower())
+            confidence *= p
+
+        return completion or None
+
+
+# user_id -> {source: NgramModel}, least recently used first
+_models: OrderedDict[str, dict[str, NgramModel]] = OrderedDict()
+_models_lock = threading.Lock()
+
+
+def _source_for(field_type: str) -> str:
+    return "time_entries" if field_type in TIME_ENTRY_FIELDS else "documents"
+
+
+def _get_model(user_id: str, source: str) -> NgramModel:
+    with _models_lock:
+        per_user = _models.get(user_id)
+        if per_user is None:
+            per_user = {}
+            _models[user_id] = per_user
+            while len(_models) > settings.LOCAL_COMPLETION_MAX_USERS:
+                _models.popitem(last=False)
+        else:
+            _models.move_to_end(user_id)
+        model = per_user.get(source)
+        if model is None:
+            model = NgramModel(settings.LOCAL_COMPLETION_MAX_CONTEXTS)
+            per_user[source] = model
+        return model
+
+
+def _next_batch(db, user_id: str, source: str, after: tuple[datetime, str] | None) -> list:
+    """Rows past the (updated_at, id) keyset position, oldest first."""
+    model = TimeEntry if source == "time_entries" else Document
+    texts = (TimeEntry.description,) if model is TimeEntry else (Document.title, Document.content)
+    query = db.query(*texts, model.id, model.created_at, model.updated_at).filter(model.user_id == user_id)
+    if after is not None:
+        # Ties on the timestamp are broken by id, so a batch boundary never skips a row
+        ts, row_id = after
+        query = query.filter(or_(model.updated_at > ts, and_(model.updated_at == ts, model.id > row_id)))
+    return query.order_by(model.updated_at, model.id).limit(settings.LOCAL_COMPLETION_REFRESH_BATCH).all()
+
+
+def _learn_batch(db, user_id: str, source: str, model: NgramModel) -> int | None:
+    """Learn the next batch; its size, or None if it holds a row edited after the model learned it.
+
+    Every row behind the watermark at synced_at has been learned, so a row
+    created behind it but updated since is a learned row come back edited.
+    Counts cannot be subtracted for it (its old text is gone): the caller
+    has to rebuild.
+    """
+    read_at = datetime.utcnow()
+    rows = _next_batch(db, user_id, source, model.watermark)
+    if model.watermark is not None and any(
+        row.created_at <= model.watermark[0] and row.updated_at > model.synced_at for row in rows
+    ):
+        return None
+    if rows:
+        model.train([" \n".join(part for part in row[:-3] if part) for row in rows])
+        model.watermark = (rows[-1].updated_at, rows[-1].id)
+    if model.synced_at is None or len(rows) < settings.LOCAL_COMPLETION_REFRESH_BATCH:
+        model.synced_at = read_at
+    return len(rows)
+
+
+def _refresh(user_id: str, source: str, model: NgramModel) -> None:
+    """Train on rows past the model's watermark, one bounded batch at a time.
+
+    After an edit the live model keeps answering while a side model retrains
+    from scratch, a batch per refresh, and replaces it once it has caught up.
+    An edit that lands mid-rebuild restarts the side model.
+    """
+    db = SessionLocal()
+    try:
+        if model.rebuild is None and _learn_batch(db, user_id, source, model) is None:
+            model.rebuild = NgramModel(model.max_contexts)
+        if model.rebuild is not None:
+            learned = _learn_batch(db, user_id, source, model.rebuild)
+            if learned is None:
+                model.rebuild = NgramModel(model.max_contexts)
+            elif learned < settings.LOCAL_COMPLETION_REFRESH_BATCH:
+                with model.lock:
+                    model.table, model.watermark = model.rebuild.table, model.rebuild.watermark
+                model.synced_at = model.rebuild.synced_at
+                model.rebuild = None
+    finally:
+        db.close()
+        model.refreshed_at = time.monotonic()
+        model.refreshing = False
+
+
+def _schedule_refresh(user_id: str, source: str, model: NgramModel) -> None:
+    if model.refreshing:
+        return
+    if time.monotonic() - model.refreshed_at < settings.LOCAL_COMPLETION_REFRESH_SECONDS:
+        return
+    model.refreshing = True
+    asyncio.get_running_loop().run_in_executor(None, _refresh, user_id, source, model)
+
+
+def local_complete(user_id: str, partial_text: str, field_type: str = "general") -> str | None:
+    """Answer from the user's local model, or return None to fall back to the LLM.
+
+    Never waits on the database: stale models are refreshed in a worker thread and
+    a model that is busy training is simply skipped for this keystroke.
+    """
+    if not settings.LOCAL_COMPLETION_ENABLED:
+        return None
+    source = _source_for(field_type)
+    model = _get_model(user_id, source)
+    _schedule_refresh(user_id, source, model)
+
+    if not model.lock.acquire(blocking=False):
+        return None
+    try:
+        return model.complete(partial_text, settings.LOCAL_COMPLETION_MIN_CONFIDENCE)
+    finally:
+        model.lock.release()
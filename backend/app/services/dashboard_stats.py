@@ -0,0 +1,418 @@
+"""Per-user dashboard totals, maintained incrementally in dashboard_stats.
+
+Every flush that inserts, updates or deletes a client, case, document, invoice
+or time entry adds its effect on the owner's totals to their dashboard_stats
+row, in the same transaction (an after_flush hook on every Session), so
+GET /dashboard/stats is one primary-key read. The effect comes from attribute
+history; old values the session never loaded (rows expired by a commit,
+columns set without being read) are read from the database before the flush. Billable hours cover the month in
+`hours_month`; entries outside it are not counted until the reconciler moves
+the row to the new month.
+
+Soft-deleted clients, cases and invoices (app.services.soft_delete) count as gone.
+Writes that bypass the ORM unit of work (bulk UPDATE/DELETE, database-side
+cascades, raw SQL) are invisible to the hook: code doing those works out the
+rows' effect itself and passes it to apply_deltas, as delete_rows (with
+count_removed, which sums a delete and its cascades in one query) and the
+bulk importer do. reconcile_dashboard_stats recounts every user periodically
+and corrects whatever drifted anyway.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, event, func, inspect, literal_column, or_, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.billing import Invoice, InvoiceStatus, TimeEntry
+from app.models.case import Case, CaseStatus
+from app.models.client import Client, ClientStatus
+from app.models.dashboard import DashboardStats
+from app.models.document import Document
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+OPEN_CASE_STATUSES = (CaseStatus.OPEN, CaseStatus.IN_PROGRESS, CaseStatus.PENDING)
+PENDING_INVOICE_STATUSES = (InvoiceStatus.SENT, InvoiceStatus.OVERDUE)
+COUNTERS = (
+    "active_clients", "open_cases", "documents", "pending_invoices",
+    "total_billed", "total_collected", "outstanding", "billable_hours_month",
+)
+COUNTS = {"active_clients", "open_cases", "documents", "pending_invoices"}
+TRACKED = (Client, Case, Document, Invoice, TimeEntry)
+
+
+def month_bounds(now: datetime | None = None) -> tuple[datetime, datetime]:
+    start = (now or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def _insert(connection):
+    return sqlite.insert if connection.dialect.name == "sqlite" else postgresql.insert
+
+
+# --- Recounting from the source tables ---
+
+def stats_query(month_start: datetime, next_month: datetime):
+    """One row of dashboard totals per user, counted from the source tables."""
+    def count(model, *conditions):
+        return select(func.count()).select_from(model).where(model.user_id == User.id, *conditions).scalar_subquery()
+
+    def total(column, *conditions):
+        model = column.class_
+        return select(func.coalesce(func.sum(column), 0)).where(model.user_id == User.id, *conditions).scalar_subquery()
+
+    live_invoice = Invoice.deleted_at.is_(None)
+    return select(
+        User.id.label("user_id"),
+        count(Client, Client.status == ClientStatus.ACTIVE, Client.deleted_at.is_(None)).label("active_clients"),
+        count(Case, Case.status.in_(OPEN_CASE_STATUSES), Case.deleted_at.is_(None)).label("open_cases"),
+        count(Document).label("documents"),
+        count(Invoice, Invoice.status.in_(PENDING_INVOICE_STATUSES), live_invoice).label("pending_invoices"),
+        total(Invoice.total, Invoice.status != InvoiceStatus.CANCELLED, live_invoice).label("total_billed"),
+        total(Invoice.total, Invoice.status == InvoiceStatus.PAID, live_invoice).label("total_collected"),
+        total(Invoice.total, Invoice.status.in_(PENDING_INVOICE_STATUSES), live_invoice).label("outstanding"),
+        total(
+            TimeEntry.hours, TimeEntry.is_billable == True,
+            TimeEntry.date >= month_start, TimeEntry.date < next_month,
+        ).label("billable_hours_month"),
+    )
+
+
+async def count_dashboard_stats(db: AsyncSession, user_id: str) -> dict:
+    """The user's totals counted live (one query), for when no current row is stored."""
+    row = (await db.execute(stats_query(*month_bounds()).where(User.id == user_id))).one()
+    return {key: row._mapping[key] for key in COUNTERS}
+
+
+def recount_user_stats(db: Session, user_id: str) -> bool:
+    """Recount one user's row in the caller's transaction; True if the stored totals had drifted."""
+    db.flush()  # Pending ORM changes are counted, not left to the hook
+    month_start, next_month = month_bounds()
+    db.execute(
+        _insert(db.connection())(DashboardStats)
+        .values(user_id=user_id, hours_month=month_start.date())
+        .on_conflict_do_nothing(index_elements=[DashboardStats.user_id])
+    )
+    # Lock the row before counting: concurrent flushes for this user wait for us,
+    # and the count sees everything they committed before we got the lock
+    stored = db.scalars(
+        select(DashboardStats).where(DashboardStats.user_id == user_id).with_for_update().execution_options(
+            populate_existing=True
+        )
+    ).one()
+    fresh = db.execute(stats_query(month_start, next_month).where(User.id == user_id)).one()._mapping
+
+    drifted = stored.hours_month == month_start.date() and any(
+        abs(float(getattr(stored, key) or 0) - float(fresh[key])) >= 0.005 for key in COUNTERS
+    )
+    now = datetime.utcnow()
+    for key in COUNTERS:
+        setattr(stored, key, fresh[key])
+    stored.hours_month = month_start.date()
+    stored.updated_at = now
+    stored.reconciled_at = now
+    db.flush()
+    return drifted
+
+
+def reconcile_dashboard_stats() -> int:
+    """Recount every user's totals (one transaction per user); returns how many had drifted."""
+    db = SessionLocal()
+    try:
+        user_ids = db.scalars(select(User.id)).all()
+        drifted = 0
+        for user_id in user_ids:
+            drifted += recount_user_stats(db, user_id)
+            db.commit()
+    finally:
+        db.close()
+    if drifted:
+        logger.warning("Dashboard stats had drifted for %d of %d users; corrected", drifted, len(user_ids))
+    return drifted
+
+
+# --- Incremental maintenance ---
+
+# The columns _contribution reads, per model
+CONTRIBUTING = {
+    Client: ("user_id", "status", "deleted_at"),
+    Case: ("user_id", "status", "deleted_at"),
+    Document: ("user_id",),
+    Invoice: ("user_id", "status", "total", "deleted_at"),
+    TimeEntry: ("user_id", "hours", "date", "is_billable"),
+}
+
+
+def new_deltas() -> dict[str, dict[str, float]]:
+    """user_id -> counter -> change, for add_row and apply_deltas."""
+    return defaultdict(lambda: defaultdict(float))
+
+
+def _contribution(model, get) -> dict:
+    """What one row of `model` adds to its owner's totals, reading its columns through `get`."""
+    if issubclass(model, (Client, Case, Invoice)) and get("deleted_at") is not None:
+        return {}
+    if issubclass(model, Client):
+        return {"active_clients": get("status") == ClientStatus.ACTIVE}
+    if issubclass(model, Case):
+        return {"open_cases": get("status") in OPEN_CASE_STATUSES}
+    if issubclass(model, Document):
+        return {"documents": 1}
+    if issubclass(model, Invoice):
+        status, total = get("status"), float(get("total") or 0)
+        pending = status in PENDING_INVOICE_STATUSES
+        return {
+            "pending_invoices": pending,
+            "total_billed": total if status is not None and status != InvoiceStatus.CANCELLED else 0,
+            "total_collected": total if status == InvoiceStatus.PAID else 0,
+            "outstanding": total if pending else 0,
+        }
+    if issubclass(model, TimeEntry):
+        month_start, next_month = month_bounds()
+        entry_date = get("date")
+        in_month = bool(get("is_billable")) and entry_date is not None and month_start <= entry_date < next_month
+        return {"billable_hours_month": float(get("hours") or 0) if in_month else 0}
+    return {}
+
+
+def add_row(deltas: dict, model, user_id: str, get, sign: int) -> None:
+    """Add (sign=1) or remove (sign=-1) one row's contribution to its owner's deltas."""
+    for key, value in _contribution(model, get).items():
+        if value:
+            deltas[user_id][key] += sign * float(value)
+
+
+def _sql_contribution(model) -> dict:
+    """_contribution as SQL expressions over the model's columns, for summing rows in the database."""
+    month_start, next_month = month_bounds()
+    if model is Client:
+        active = and_(Client.status == ClientStatus.ACTIVE, Client.deleted_at.is_(None))
+        return {"active_clients": case((active, 1), else_=0)}
+    if model is Case:
+        open_case = and_(Case.status.in_(OPEN_CASE_STATUSES), Case.deleted_at.is_(None))
+        return {"open_cases": case((open_case, 1), else_=0)}
+    if model is Document:
+        return {"documents": literal_column("1")}
+    if model is Invoice:
+        live = Invoice.deleted_at.is_(None)
+        pending = and_(live, Invoice.status.in_(PENDING_INVOICE_STATUSES))
+        return {
+            "pending_invoices": case((pending, 1), else_=0),
+            "total_billed": case((and_(live, Invoice.status != InvoiceStatus.CANCELLED), Invoice.total), else_=0),
+            "total_collected": case((and_(live, Invoice.status == InvoiceStatus.PAID), Invoice.total), else_=0),
+            "outstanding": case((pending, Invoice.total), else_=0),
+        }
+    if model is TimeEntry:
+        in_month = and_(TimeEntry.is_billable == True, TimeEntry.date >= month_start, TimeEntry.date < next_month)
+        return {"billable_hours_month": case((in_month, TimeEntry.hours), else_=0)}
+    return {}
+
+
+def _removed_rows(model, criteria, cascade: bool) -> dict:
+    """tracked model -> conditions for the rows a delete of `model` rows removes, database cascades included."""
+    removed = defaultdict(list)
+    if model in TRACKED:
+        removed[model].append(and_(*criteria))
+    if not cascade:
+        return removed
+    if model is Client:
+        client_ids = select(Client.id).where(*criteria)
+        case_ids = select(Case.id).where(Case.client_id.in_(client_ids))
+        removed[Case].append(Case.client_id.in_(client_ids))
+        removed[Invoice].append(Invoice.client_id.in_(client_ids))
+        removed[Document].append(Document.case_id.in_(case_ids))
+        removed[TimeEntry].append(TimeEntry.case_id.in_(case_ids))
+    elif model is Case:
+        case_ids = select(Case.id).where(*criteria)
+        removed[Document].append(Document.case_id.in_(case_ids))
+        removed[TimeEntry].append(TimeEntry.case_id.in_(case_ids))
+    return removed
+
+
+def _removal_totals(removed: dict, exclude: dict | None = None):
+    """One query summing, per user, what the selected rows count for; None if nothing is selected.
+
+    Each model's conditions are OR-ed, so a row reached twice counts once, and
+    narrowed by foreign key indexes to the rows being removed instead of the
+    owner's whole account.
+    """
+    parts = []
+    for model, conditions in removed.items():
+        condition = or_(*conditions)
+        if exclude and exclude.get(model):
+            condition = and_(condition, model.id.not_in(exclude[model]))
+        expressions = _sql_contribution(model)
+        parts.append(
+            select(
+                model.user_id.label("user_id"),
+                *(func.sum(expressions[key]).label(key) if key in expressions else literal_column("0").label(key) for key in COUNTERS),
+            ).where(condition).group_by(model.user_id)
+        )
+    if not parts:
+        return None
+    totals = union_all(*parts).subquery()
+    return select(totals.c.user_id, *(func.sum(totals.c[key]).label(key) for key in COUNTERS)).group_by(totals.c.user_id)
+
+
+def _subtract(deltas: dict, rows) -> None:
+    for row in rows:
+        for key in COUNTERS:
+            if row._mapping[key]:
+                deltas[row.user_id][key] -= float(row._mapping[key])
+
+
+async def count_removed(db: AsyncSession, model, criteria, cascade: bool = True) -> dict:
+    """Deltas taking away what the matching rows (and their cascades) count for; one query, run before deleting."""
+    deltas = new_deltas()
+    query = _removal_totals(_removed_rows(model, criteria, cascade))
+    if query is not None:
+        _subtract(deltas, await db.execute(query))
+    return deltas
+
+
+def subtract_removed(db: Session, model, criteria) -> None:
+    """count_removed and apply_deltas for a hard delete through a sync session (the purge job); run before deleting."""
+    query = _removal_totals(_removed_rows(model, criteria, cascade=True))
+    if query is not None:
+        deltas = new_deltas()
+        # Marked rows count for nothing already, but the cascade must still find them
+        _subtract(deltas, db.execute(query, execution_options={"include_deleted": True}))
+        _apply_deltas(db.connection(), deltas)
+
+
+def _apply_deltas(connection, deltas: dict) -> None:
+    month = month_bounds()[0].date()
+    now = datetime.utcnow()
+    for user_id, changes in deltas.items():
+        changes = {key: int(round(value)) if key in COUNTS else value for key, value in changes.items() if value}
+        if not changes:
+            continue
+        values = {key: getattr(DashboardStats, key) + value for key, value in changes.items()}
+        if "billable_hours_month" in changes:
+            # A row still on last month keeps its stale hours; readers recount them until reconciled
+            values["billable_hours_month"] = DashboardStats.billable_hours_month + case(
+                (DashboardStats.hours_month == month, changes["billable_hours_month"]), else_=0
+            )
+        # Users without a row yet are counted live and picked up by the next reconcile
+        connection.execute(
+            update(DashboardStats).where(DashboardStats.user_id == user_id).values(**values, updated_at=now)
+        )
+
+
+async def apply_deltas(db: AsyncSession, deltas: dict) -> None:
+    """Add deltas from writes the flush hook cannot see (bulk statements, DB cascades) in the caller's transaction."""
+    if deltas:
+        await db.run_sync(lambda session: _apply_deltas(session.connection(), deltas))
+
+
+def _knows(state, key: str, before: bool) -> bool:
+    history = state.attrs[key].history
+    return bool((history.deleted if before else history.added) or history.unchanged)
+
+
+def _row_id(state) -> str:
+    return state.identity[[column.key for column in state.mapper.primary_key].index("id")]
+
+
+@event.listens_for(Session, "before_flush")
+def _read_from_database(session: Session, flush_context, instances) -> None:
+    """Read what the flush needs from the database while it still holds the pre-flush rows.
+
+    Rows expired by a commit, or columns set without being read first, have no
+    old value in their attribute history; their stored values are loaded (one
+    query per model). Deleted clients and cases take their children with them
+    through database cascades (passive_deletes), which the ORM never sees;
+    those children are summed in one query, leaving out any the ORM deletes
+    itself. Neither query runs unless such rows are in the flush.
+    """
+    unknown: dict = defaultdict(list)
+    deleted: dict = defaultdict(list)
+    for obj in (*session.dirty, *session.deleted):
+        if not isinstance(obj, TRACKED) or inspect(obj).key is None:
+            continue
+        state = inspect(obj)
+        is_deleted = obj in session.deleted
+        if is_deleted:
+            deleted[type(obj)].append(_row_id(state))
+        if not all(
+            _knows(state, key, before=True) and (is_deleted or _knows(state, key, before=False))
+            for key in CONTRIBUTING[type(obj)]
+        ):
+            unknown[type(obj)].append(_row_id(state))
+
+    loaded = {}
+    for model, ids in unknown.items():
+        table = model.__table__
+        rows = session.connection().execute(
+            select(table.c.id, *(table.c[key] for key in CONTRIBUTING[model])).where(table.c.id.in_(ids))
+        )
+        for row in rows:
+            loaded[(model, row.id)] = row._mapping
+
+    cascaded = new_deltas()
+    removed = defaultdict(list)
+    for model in (Client, Case):
+        if deleted.get(model):
+            for child, conditions in _removed_rows(model, [model.id.in_(deleted[model])], cascade=True).items():
+                if child is not model:
+                    removed[child] += conditions
+    query = _removal_totals(removed, exclude=deleted) if removed else None
+    if query is not None:
+        _subtract(cascaded, session.connection().execute(query))
+    session.info["dashboard_flush"] = (loaded, cascaded)
+
+
+def _accumulate(deltas: dict, obj, before: bool, sign: int, loaded: dict) -> None:
+    state = inspect(obj)
+    stored = loaded.get((type(obj), _row_id(state)), {}) if state.key is not None and loaded else {}
+
+    def get(key: str):
+        # Attribute history still holds the pre-flush values during after_flush
+        history = state.attrs[key].history
+        values = (history.deleted if before else history.added) or history.unchanged
+        if values:
+            return values[0]
+        return stored.get(key)  # Never loaded: unchanged by this flush, so the stored value is both before and after
+
+    user_id = get("user_id")
+    if user_id is None:
+        return
+    add_row(deltas, type(obj), user_id, get, sign)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flush(session: Session, flush_context) -> None:
+    loaded, deltas = session.info.pop("dashboard_flush", ({}, new_deltas()))
+    new_users = []
+    for obj in session.new:
+        if isinstance(obj, TRACKED):
+            _accumulate(deltas, obj, before=False, sign=1, loaded=loaded)
+        elif isinstance(obj, User):
+            new_users.append(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED) and session.is_modified(obj):
+            _accumulate(deltas, obj, before=True, sign=-1, loaded=loaded)
+            _accumulate(deltas, obj, before=False, sign=1, loaded=loaded)
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED):
+            _accumulate(deltas, obj, before=True, sign=-1, loaded=loaded)
+    if not deltas and not new_users:
+        return
+
+    connection = session.connection()
+    if new_users:
+        # A new user has nothing to count yet, so an all-zero row is exact
+        connection.execute(
+            _insert(connection)(DashboardStats)
+            .values([
+                {"user_id": user_id, "hours_month": month_bounds()[0].date(), "updated_at": datetime.utcnow()}
+                for user_id in new_users
+            ])
+            .on_conflict_do_nothing(index_elements=[DashboardStats.user_id])
+        )
+    _apply_deltas(connection, deltas)
@@ -0,0 +1,152 @@
+"""Set-based upserts for the bulk /import endpoints.
+
+Each endpoint describes its rows with an ImportSpec: the column records are
+matched on (case-insensitively, within the user's rows), how to build a new
+record and which fields an update changes. import_rows then does the work in a
+fixed number of statements instead of one lookup per row:
+
+    1. one SELECT per IMPORT_BATCH_SIZE rows fetches every record whose
+       lower(key) is among the batch's keys, matched in memory on the same
+       normalized key;
+    2. new records go in with multi-row INSERTs, IMPORT_BATCH_SIZE at a time;
+    3. updates go out as executemany UPDATEs by id, one per set of changed fields.
+
+Matching keeps the old per-row semantics: rows match records that existed
+before the import (two new rows with the same key create two records), several
+rows matching one record are applied in order, and a row that fails to parse
+is reported as "Row N: <error>" without stopping the rest. There is no unique
+constraint on the keys, so INSERT ... ON CONFLICT has nothing to target.
+
+These statements bypass the unit of work, so their effect on the user's
+dashboard totals is added up from the matched rows' stored values and the
+inserted rows (RETURNING) and applied once at the end. The caller commits.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.services.dashboard_stats import CONTRIBUTING, add_row, apply_deltas, new_deltas
+
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """How one endpoint's rows map onto a model."""
+
+    model: Any
+    key_column: Any  # Matched case-insensitively against the key
+    key: Callable[[dict], str]  # Stripped match key of a row; raises ValueError when it is missing
+    new: Callable[[dict], dict]  # Column values for a row that matched nothing (user_id is added)
+    changes: Callable[[dict], dict]  # Columns a row sets on the record it matched
+    bump: str | None = None  # Integer column incremented once per matching row (document version)
+
+
+def normalize(key: str) -> str:
+    return key.lower()
+
+
+def non_empty(row: dict, fields: list[str]) -> dict:
+    """The given fields of a row that hold a non-blank value (what an update overwrites)."""
+    return {name: row[name] for name in fields if row.get(name) is not None and str(row[name]).strip()}
+
+
+async def _match(db: AsyncSession, spec: ImportSpec, user_id: str, keys: set[str], stored: dict) -> dict[str, str]:
+    """normalized key -> id of the first existing record with that key, in one query.
+
+    The matched records' dashboard columns are added to `stored` (id -> values).
+    """
+    model = spec.model
+    columns = CONTRIBUTING.get(model, ())
+    found = await db.execute(
+        select(model.id, spec.key_column.label("match_key"), *(getattr(model, key) for key in columns))
+        .where(model.user_id == user_id, func.lower(spec.key_column).in_(keys))
+        .order_by(model.id)
+    )
+    matches: dict[str, str] = {}
+    for row in found:
+        record_id = matches.setdefault(normalize(row.match_key), row.id)
+        if record_id == row.id and columns:
+            stored[record_id] = {key: row._mapping[key] for key in columns}
+    return matches
+
+
+async def import_rows(db: AsyncSession, spec: ImportSpec, user_id: str, rows: list[dict]) -> dict:
+    """Create or update one record per row; returns the endpoints' {created, updated, errors} body."""
+    errors: list[tuple[int, str]] = []
+    inserts: list[dict] = []
+    updates: dict[str, dict] = {}  # id -> merged changes, later rows winning
+    bumps: dict[str, int] = defaultdict(int)
+    stored: dict[str, dict] = {}
+    batch_size = settings.IMPORT_BATCH_SIZE
+    updated = 0
+
+    for start in range(0, len(rows), batch_size):
+        keyed = []
+        for i, row in enumerate(rows[start:start + batch_size], start=start):
+            try:
+                keyed.append((i, row, spec.key(row)))
+            except Exception as e:
+                errors.append((i, str(e)))
+        matches = await _match(db, spec, user_id, {normalize(key) for _, _, key in keyed}, stored) if keyed else {}
+
+        for i, row, key in keyed:
+            try:
+                record_id = matches.get(normalize(key))
+                if record_id is None:
+                    inserts.append({**spec.new(row), "user_id": user_id})
+                    continue
+                updates.setdefault(record_id, {}).update(spec.changes(row))
+                if spec.bump:
+                    bumps[record_id] += 1
+                updated += 1
+            except Exception as e:
+                errors.append((i, str(e)))
+
+    deltas = new_deltas()
+    columns = CONTRIBUTING.get(spec.model)
+    for start in range(0, len(inserts), batch_size):
+        statement = insert(spec.model)
+        if columns:
+            statement = statement.returning(*(getattr(spec.model, key) for key in columns))
+        result = await db.execute(statement, inserts[start:start + batch_size])
+        if columns:
+            for row in result:
+                add_row(deltas, spec.model, user_id, row._mapping.get, 1)
+    await _apply_updates(db, spec, updates, bumps)
+
+    if columns:
+        for record_id, changes in updates.items():
+            before = stored[record_id]
+            after = {**before, **{key: value for key, value in changes.items() if key in before}}
+            add_row(deltas, spec.model, user_id, before.get, -1)
+            add_row(deltas, spec.model, user_id, after.get, 1)
+        await apply_deltas(db, deltas)
+    errors.sort()
+    return {"created": len(inserts), "updated": updated, "errors": [f"Row {i + 1}: {e}" for i, e in errors]}
+
+
+async def _apply_updates(db: AsyncSession, spec: ImportSpec, updates: dict[str, dict], bumps: dict[str, int]) -> None:
+    # Core UPDATE by id alone: time_entries' mapped primary key also holds the date an import may change
+    table = spec.model.__table__
+    groups: dict[tuple[str, ...], list[dict]] = defaultdict(list)
+    for record_id, changes in updates.items():
+        params = {f"v_{column}": value for column, value in changes.items()}
+        params["b_id"] = record_id
+        if spec.bump:
+            params["b_bump"] = bumps[record_id]
+        groups[tuple(sorted(changes))].append(params)
+
+    for columns, params in groups.items():
+        values = {column: bindparam(f"v_{column}") for column in columns}
+        if spec.bump:
+            values[spec.bump] = table.c[spec.bump] + bindparam("b_bump")
+        if not values:
+            continue  # Matched, but nothing to set
+        statement = update(table).where(table.c.id == bindparam("b_id")).values(values)
+        for start in range(0, len(params), settings.IMPORT_BATCH_SIZE):
+            await db.execute(statement, params[start:start + settings.IMPORT_BATCH_SIZE])
@@ -0,0 +1,66 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by (sort column, id) and the cursor is an opaque token for the
+last row served, so fetching page N costs the same as fetching page 1. The next
+cursor goes out in the X-Next-Cursor header, leaving the list bodies unchanged.
+`offset` is still accepted for older clients.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(sort_value), str(uuid.UUID(row_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    sort_column,
+    id_column,
+    response: Response,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    offset: int | None = None,
+    descending: bool = False,
+) -> list:
+    """Run one page of `query` ordered by (sort_column, id_column) and set the next cursor header."""
+    if cursor is not None and offset is not None:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    if cursor is not None:
+        sort_value, row_id = decode_cursor(cursor)
+        position = tuple_(sort_column, id_column)
+        after = tuple_(literal(sort_value, sort_column.type), literal(row_id, id_column.type))
+        query = query.where(position < after if descending else position > after)
+        # Implied by the row comparison, but only a plain bound lets Postgres skip partitions
+        query = query.where(sort_column <= sort_value if descending else sort_column >= sort_value)
+    elif offset:
+        query = query.offset(offset)
+    order = (sort_column.desc(), id_column.desc()) if descending else (sort_column, id_column)
+
+    # One extra row tells whether another page exists without a COUNT
+    rows = (await db.scalars(query.order_by(*order).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return rows
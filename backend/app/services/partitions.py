@@ -0,0 +1,79 @@
+"""Monthly range partitions for time_entries (by date) and appointments (by start_time).
+
+Migration 0008 turns both tables into partitioned tables on Postgres. This
+module keeps PARTITION_MONTHS_AHEAD months of future partitions in place; it
+runs at startup and daily from the scheduler. Rows dated beyond the last
+partition land in the table's DEFAULT partition and are moved into their month
+when it is created. Queries that bound the partition column (a month's hours,
+an appointment window) then touch only the partitions in range.
+"""
+import logging
+from datetime import date
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = {"time_entries": "date", "appointments": "start_time"}
+
+
+def month_start(day: date, months_ahead: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 + months_ahead
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def _is_partitioned(conn, table: str) -> bool:
+    return conn.scalar(text("SELECT relkind = 'p' FROM pg_class WHERE relname = :table"), {"table": table}) or False
+
+
+def _existing_partitions(conn, table: str) -> set[str]:
+    return set(conn.scalars(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table}))
+
+
+def _create_partition(conn, table: str, column: str, month: date) -> None:
+    name = partition_name(table, month)
+    start, end = month.isoformat(), month_start(month, 1).isoformat()
+    in_range = f"\"{column}\" >= '{start}' AND \"{column}\" < '{end}'"
+    # Build the partition detached, move any rows that were parked in the default
+    # partition, then attach: ATTACH refuses while the default still holds rows in range
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"WITH moved AS (DELETE FROM {table}_default WHERE {in_range} RETURNING *) "
+                      f"INSERT INTO {name} SELECT * FROM moved"))
+    conn.execute(text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_range CHECK ({in_range})"))
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_range"))  # Only there to skip the attach scan
+
+
+def ensure_partitions(months_ahead: int | None = None) -> list[str]:
+    """Create any missing monthly partitions from this month to `months_ahead` months out."""
+    if engine.dialect.name != "postgresql":
+        return []
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = month_start(date.today())
+    created = []
+    for table, column in PARTITIONED_TABLES.items():
+        with engine.begin() as conn:
+            if not _is_partitioned(conn, table):
+                continue
+            existing = _existing_partitions(conn, table)
+            for offset in range(months_ahead + 1):
+                month = month_start(this_month, offset)
+                if partition_name(table, month) not in existing:
+                    _create_partition(conn, table, column, month)
+                    created.append(partition_name(table, month))
+    if created:
+        logger.info("Created partitions: %s", ", ".join(created))
+    return created
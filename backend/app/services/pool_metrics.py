@@ -0,0 +1,98 @@
+"""Connection pool metrics: checkout wait, connections in use and overflow usage.
+
+The engines in app.database are built with the instrumented pool classes below,
+which time every checkout. Compare `checkout_wait_ms` and `overflow_checkouts`
+with the worker count to tell whether DB_POOL_SIZE / DB_MAX_OVERFLOW are right:
+waits that keep growing mean requests are queueing for a connection.
+"""
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Counters for one pool; updated from whichever thread checks a connection out."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0  # Checkouts served while the pool was past pool_size
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float, overflow: bool) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if overflow:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self, wait: float) -> None:
+        with self.lock:
+            self.timeouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+
+_pools: dict[str, tuple[QueuePool, PoolStats]] = {}
+
+
+class _TimedCheckout:
+    stats_name = "default"
+
+    def _do_get(self):
+        stats = _pools[self.stats_name][1] if self.stats_name in _pools else PoolStats()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.record_timeout(time.perf_counter() - start)
+            raise
+        stats.record(time.perf_counter() - start, self.overflow() > 0)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting under the same name
+        pool = super().recreate()
+        pool.stats_name = self.stats_name
+        if self.stats_name in _pools:
+            _pools[self.stats_name] = (pool, _pools[self.stats_name][1])
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+def register_pool(name: str, pool: QueuePool) -> None:
+    """Start collecting stats for an engine's pool under `name`."""
+    pool.stats_name = name
+    _pools[name] = (pool, PoolStats())
+
+
+def get_pool_metrics() -> dict:
+    metrics = {}
+    for name, (pool, stats) in _pools.items():
+        with stats.lock:
+            metrics[name] = {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": stats.checkouts,
+                "overflow_checkouts": stats.overflow_checkouts,
+                "timeouts": stats.timeouts,
+                "checkout_wait_ms": {
+                    "avg": round(stats.wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+                    "max": round(stats.wait_max * 1000, 3),
+                },
+            }
+    return metrics
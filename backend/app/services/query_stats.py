@@ -0,0 +1,173 @@
+"""Per-request SQL instrumentation: query count, database time and the slowest statement.
+
+Cursor execution hooks on every engine add to the stats of the request that is
+running (tracked in a context variable set by the middleware in app.main). The
+totals go out in the Server-Timing header and the app.access log line; any
+statement slower than SQL_SLOW_QUERY_MS is logged to app.sql.slow along with
+the route that issued it and the shape of its parameters (types, never values).
+
+Routes declare how many statements they may issue with @query_budget; a request
+over its budget, or one that runs the same SELECT shape SQL_REPEATED_SELECT_LIMIT
+times (the signature of an N+1 loop), is logged to app.sql.budget and, with
+SQL_QUERY_BUDGET_STRICT, fails with QueryBudgetExceeded so tests catch it.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+settings = get_settings()
+slow_log = logging.getLogger("app.sql.slow")
+budget_log = logging.getLogger("app.sql.budget")
+
+MAX_LOGGED_STATEMENT = 2000
+
+
+class QueryBudgetExceeded(Exception):
+    """A request issued more statements than its route allows, or repeated one per row."""
+
+
+def query_budget(limit: int | None):
+    """Declare the most statements a route may issue, including the principal lookup on a cache miss.
+
+    Apply below the router decorator; `None` exempts the route from both checks (e.g. per-row imports).
+    """
+    def decorate(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorate
+
+
+class QueryStats:
+    """SQL totals for one request."""
+
+    def __init__(self, scope: dict | None = None):
+        self.scope = scope
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = ""
+        self.selects: Counter[str] = Counter()
+
+    @property
+    def route(self) -> str:
+        if self.scope is None:
+            return "background"
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "-")
+
+    @property
+    def budget(self) -> int | None | bool:
+        """The route's declared budget, SQL_DEFAULT_QUERY_BUDGET when undeclared, False when exempt."""
+        endpoint = getattr(self.scope and self.scope.get("route"), "endpoint", None)
+        declared = getattr(endpoint, "query_budget", ...)
+        if declared is ...:
+            return settings.SQL_DEFAULT_QUERY_BUDGET or None
+        return False if declared is None else declared
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+        # Flushes legitimately repeat INSERT/UPDATE shapes; only reads point at a lazy load or a loop
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.selects[statement] += 1
+
+    def violations(self) -> list[str]:
+        """Budget overruns and repeated SELECT shapes, as log-ready descriptions."""
+        problems = []
+        budget = self.budget
+        if budget is False:
+            return problems
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} queries over a budget of {budget}")
+        limit = settings.SQL_REPEATED_SELECT_LIMIT
+        if limit:
+            for statement, times in self.selects.items():
+                if times >= limit:
+                    shape = " ".join(statement.split())[:MAX_LOGGED_STATEMENT]
+                    problems.append(f"same SELECT issued {times} times: {shape}")
+        return problems
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.total * 1000:.1f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest * 1000:.1f}"
+        )
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_request(scope: dict) -> QueryStats:
+    stats = QueryStats(scope)
+    _current.set(stats)
+    return stats
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+def check_budget(stats: QueryStats) -> None:
+    """Log the request's violations; raise QueryBudgetExceeded for them in strict mode."""
+    problems = stats.violations()
+    if not problems:
+        return
+    for problem in problems:
+        budget_log.warning("route=%s %s", stats.route, problem)
+    if settings.SQL_QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(f"{stats.route}: " + "; ".join(problems))
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Bound parameters with each value replaced by its type name."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if duration * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        slow_log.warning(
+            "%.1fms route=%s params=%s sql=%s",
+            duration * 1000,
+            stats.route if stats is not None else "background",
+            parameter_shape(parameters, executemany),
+            " ".join(statement.split())[:MAX_LOGGED_STATEMENT],
+        )
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the timing hooks to a (sync) engine; pass `async_engine.sync_engine` for async ones."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
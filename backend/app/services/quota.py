@@ -0,0 +1,133 @@
+"""Per-user AI token and request quotas.
+
+Usage is counted in memory on every AI call and flushed to the ai_usage table
+periodically with a single bulk upsert, so the request path never writes to the
+database. Quota checks read the in-memory view; every flush, with or without
+usage of its own to write, reloads today's stored totals for all users, so usage
+recorded by other worker processes counts here within one flush interval.
+"""
+import threading
+from datetime import date, datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models.usage import AIUsage
+
+settings = get_settings()
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+_lock = threading.Lock()
+# (user_id, period) -> [tokens, requests], last known totals including unflushed usage
+_totals: dict[tuple[str, date], list[int]] = {}
+# (user_id, period) -> [tokens, requests] recorded since the last flush
+_pending: dict[tuple[str, date], list[int]] = {}
+
+
+def _period() -> date:
+    return datetime.utcnow().date()
+
+
+def check_quota(user_id: str) -> None:
+    """Raise QuotaExceeded if the user has used up today's allowance."""
+    token_limit = settings.AI_DAILY_TOKEN_QUOTA
+    request_limit = settings.AI_DAILY_REQUEST_QUOTA
+    if not token_limit and not request_limit:
+        return
+    tokens, requests = _totals.get((user_id, _period()), (0, 0))
+    if token_limit and tokens >= token_limit:
+        raise QuotaExceeded("Daily AI token quota exceeded")
+    if request_limit and requests >= request_limit:
+        raise QuotaExceeded("Daily AI request quota exceeded")
+
+
+def record_usage(user_id: str, usage) -> None:
+    """Count one upstream call; `usage` is the `usage` object of a chat completion."""
+    tokens = getattr(usage, "total_tokens", 0) or 0
+    key = (user_id, _period())
+    with _lock:
+        for bucket in (_totals, _pending):
+            counts = bucket.setdefault(key, [0, 0])
+            counts[0] += tokens
+            counts[1] += 1
+
+
+def get_usage(user_id: str) -> dict:
+    tokens, requests = _totals.get((user_id, _period()), (0, 0))
+    return {
+        "period": _period().isoformat(),
+        "tokens": tokens,
+        "requests": requests,
+        "token_quota": settings.AI_DAILY_TOKEN_QUOTA or None,
+        "request_quota": settings.AI_DAILY_REQUEST_QUOTA or None,
+    }
+
+
+def _insert():
+    return sqlite.insert if engine.dialect.name == "sqlite" else postgresql.insert
+
+
+def flush_usage() -> None:
+    """Write pending counters with one upsert, then reload today's totals from the stored rows."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+
+    db = SessionLocal()
+    try:
+        if pending:
+            rows = [
+                {"user_id": user_id, "period": period, "tokens": tokens, "requests": requests}
+                for (user_id, period), (tokens, requests) in pending.items()
+            ]
+            stmt = _insert()(AIUsage).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AIUsage.user_id, AIUsage.period],
+                set_={
+                    "tokens": AIUsage.tokens + stmt.excluded.tokens,
+                    "requests": AIUsage.requests + stmt.excluded.requests,
+                    "updated_at": datetime.utcnow(),
+                },
+            )
+            try:
+                db.execute(stmt)
+                db.commit()
+            except Exception:
+                # Put the usage back so the next flush retries it
+                with _lock:
+                    for key, (tokens, requests) in pending.items():
+                        counts = _pending.setdefault(key, [0, 0])
+                        counts[0] += tokens
+                        counts[1] += requests
+                raise
+        today = _period()
+        stored = db.execute(
+            select(AIUsage.user_id, AIUsage.tokens, AIUsage.requests).where(AIUsage.period == today)
+        ).all()
+    finally:
+        db.close()
+
+    with _lock:
+        for user_id, tokens, requests in stored:
+            unflushed = _pending.get((user_id, today), (0, 0))
+            _totals[(user_id, today)] = [tokens + unflushed[0], requests + unflushed[1]]
+        # Forget previous days once they are safely stored
+        for key in [k for k in _totals if k[1] < today and k not in _pending]:
+            del _totals[key]
+
+
+def load_usage() -> None:
+    """Seed the in-memory view with today's stored usage (called at startup)."""
+    db = SessionLocal()
+    try:
+        rows = db.query(AIUsage).filter(AIUsage.period == _period()).all()
+        with _lock:
+            for row in rows:
+                _totals[(row.user_id, row.period)] = [row.tokens, row.requests]
+    finally:
+        db.close()
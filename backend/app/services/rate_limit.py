@@ -0,0 +1,163 @@
+"""Sliding-window throttling for login and registration.
+
+Attempts are counted per client IP and per email address. The check runs before
+the user lookup and before any bcrypt work, so a credential-stuffing flood is
+turned away for the cost of a dict lookup. With AUTH_RATE_LIMIT_STORE=database
+the windows are kept in the auth_attempts table and shared by all workers.
+"""
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Request, status
+from sqlalchemy import DateTime, String, delete, func, insert, literal, select, union_all
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.auth_attempt import AuthAttempt
+
+settings = get_settings()
+
+SWEEP_EVERY = 1000  # Memory store: drop idle keys after this many new keys
+
+
+class MemoryStore:
+    """Per-process windows: key -> timestamps of attempts still inside the window."""
+
+    def __init__(self):
+        self.attempts: dict[str, deque[float]] = {}
+        self.lock = threading.Lock()
+        self.new_keys = 0
+
+    async def hit(self, keys: list[tuple[str, int]], window: int) -> float | None:
+        """Record an attempt for every key unless one is over its limit; return the wait if so."""
+        now = time.monotonic()
+        with self.lock:
+            wait = None
+            for key, limit in keys:
+                hits = self.attempts.get(key)
+                if hits is None:
+                    continue
+                while hits and hits[0] <= now - window:
+                    hits.popleft()
+                if len(hits) >= limit:
+                    wait = max(wait or 0, hits[0] + window - now)
+            if wait is not None:
+                return wait
+            for key, _ in keys:
+                if key not in self.attempts:
+                    self.attempts[key] = deque()
+                    self.new_keys += 1
+                self.attempts[key].append(now)
+            if self.new_keys >= SWEEP_EVERY:
+                self._sweep(now - window)
+        return None
+
+    def _sweep(self, cutoff: float) -> None:
+        for key in [k for k, hits in self.attempts.items() if not hits or hits[-1] <= cutoff]:
+            del self.attempts[key]
+        self.new_keys = 0
+
+    async def reset(self, key: str) -> None:
+        with self.lock:
+            self.attempts.pop(key, None)
+
+
+class DatabaseStore:
+    """Windows shared between workers through the auth_attempts table."""
+
+    async def hit(self, keys: list[tuple[str, int]], window: int) -> float | None:
+        """Check and record the attempt in one conditional INSERT ... SELECT.
+
+        The rows go in only if every key is under its limit, so the check and
+        the write cannot be split by a racing attempt. On Postgres, whose
+        snapshots would let two racing statements see the same count, the keys'
+        advisory locks serialize the attempts for the rest of the transaction.
+        """
+        now = datetime.utcnow()
+        since = now - timedelta(seconds=window)
+        async with AsyncSessionLocal() as db:
+            if db.bind.dialect.name == "postgresql":
+                for key in sorted(key for key, _ in keys):  # One order for everyone: no deadlocks
+                    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(key))))
+            under_limit = [
+                select(func.count()).select_from(AuthAttempt)
+                .where(AuthAttempt.key == key, AuthAttempt.created_at > since)
+                .scalar_subquery() < limit
+                for key, limit in keys
+            ]
+            attempts = union_all(*(
+                select(literal(key, String).label("key"), literal(now, DateTime).label("created_at"))
+                .where(*under_limit)
+                for key, _ in keys
+            ))
+            result = await db.execute(insert(AuthAttempt).from_select(["key", "created_at"], attempts))
+            await db.commit()
+            if result.rowcount:
+                return None
+
+            rows = (await db.execute(
+                select(AuthAttempt.key, func.count(), func.min(AuthAttempt.created_at))
+                .where(AuthAttempt.key.in_([key for key, _ in keys]), AuthAttempt.created_at > since)
+                .group_by(AuthAttempt.key)
+            )).all()
+            limits = dict(keys)
+            waits = [
+                (oldest - since).total_seconds()
+                for key, count, oldest in rows
+                if count >= limits[key]
+            ]
+            # The blocking attempts can fall out of the window between the two statements
+            return max(waits, default=1.0)
+
+    async def reset(self, key: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(AuthAttempt).where(AuthAttempt.key == key))
+            await db.commit()
+
+
+_store = DatabaseStore() if settings.AUTH_RATE_LIMIT_STORE == "database" else MemoryStore()
+
+
+def client_ip(request: Request) -> str:
+    # Behind a reverse proxy run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+def _email_key(email: str) -> str:
+    return f"email:{email.strip().lower()}"
+
+
+async def check_auth_rate_limit(request: Request, email: str) -> None:
+    """Count one sign-in attempt, raising 429 if the IP or the email is over its limit."""
+    if not settings.AUTH_RATE_LIMIT_ENABLED:
+        return
+    keys = [
+        (f"ip:{client_ip(request)}", settings.AUTH_RATE_LIMIT_PER_IP),
+        (_email_key(email), settings.AUTH_RATE_LIMIT_PER_EMAIL),
+    ]
+    wait = await _store.hit(keys, settings.AUTH_RATE_LIMIT_WINDOW_SECONDS)
+    if wait is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+async def reset_email_attempts(email: str) -> None:
+    """Clear an email's window after a successful login so its owner is not locked out."""
+    if settings.AUTH_RATE_LIMIT_ENABLED:
+        await _store.reset(_email_key(email))
+
+
+def purge_auth_attempts() -> None:
+    """Delete rows that fell out of the window (scheduled when the database store is used)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.AUTH_RATE_LIMIT_WINDOW_SECONDS)
+    db = SessionLocal()
+    try:
+        db.execute(delete(AuthAttempt).where(AuthAttempt.created_at <= cutoff))
+        db.commit()
+    finally:
+        db.close()
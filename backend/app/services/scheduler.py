@@ -0,0 +1,86 @@
+"""Process-wide APScheduler instance for background jobs."""
+from datetime import datetime
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.config import get_settings
+from app.services.batch_analysis import run_batch_analysis
+from app.services.dashboard_stats import reconcile_dashboard_stats
+from app.services.partitions import ensure_partitions
+from app.services.quota import flush_usage
+from app.services.rate_limit import purge_auth_attempts
+from app.services.soft_delete import purge_deleted
+
+settings = get_settings()
+
+scheduler = BackgroundScheduler()
+
+
+def start_scheduler() -> None:
+    scheduler.add_job(
+        flush_usage,
+        "interval",
+        seconds=settings.AI_USAGE_FLUSH_SECONDS,
+        id="ai_usage_flush",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        ensure_partitions,
+        "interval",
+        days=1,
+        next_run_time=datetime.now(),
+        id="ensure_partitions",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    if settings.DASHBOARD_STATS_RECONCILE_MINUTES:
+        scheduler.add_job(
+            reconcile_dashboard_stats,
+            "interval",
+            minutes=settings.DASHBOARD_STATS_RECONCILE_MINUTES,
+            next_run_time=datetime.now(),
+            id="dashboard_stats_reconcile",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+    # Also runs with soft delete off, to clear rows marked while it was on (an empty partial index scan otherwise)
+    scheduler.add_job(
+        purge_deleted,
+        "interval",
+        days=1,
+        next_run_time=datetime.now(),
+        id="soft_delete_purge",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    if settings.BATCH_ANALYSIS_ENABLED:
+        scheduler.add_job(
+            run_batch_analysis,
+            "cron",
+            hour=settings.BATCH_ANALYSIS_WINDOW_START_HOUR,
+            id="document_batch_analysis",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+    if settings.AUTH_RATE_LIMIT_STORE == "database":
+        scheduler.add_job(
+            purge_auth_attempts,
+            "interval",
+            seconds=settings.AUTH_RATE_LIMIT_WINDOW_SECONDS,
+            id="auth_attempts_purge",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
+    scheduler.start()
+
+
+def shutdown_scheduler() -> None:
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,112 @@
+"""Text search: substring matching on short columns and full-text search of documents.
+
+Substring matching stays `ILIKE '%term%'`, which Postgres answers from the
+pg_trgm GIN indexes (migration 0006) instead of scanning every row the user
+owns. Ranked search orders matches by pg_trgm word similarity.
+
+Document bodies are searched through `documents.search_vector`, a stored
+generated tsvector over title (weight A) and content (weight B) with a GIN index
+(migration 0007); Postgres recomputes it whenever a row is saved. Only the page
+of hits gets a ts_headline snippet, since headlines re-parse the whole body.
+
+SQLite has none of this and falls back to LIKE matching, ranked by match
+position, with snippets cut in Python.
+"""
+import re
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.document import Document
+
+TEXT_SEARCH_CONFIG = "english"  # Must match the expression of documents.search_vector
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+SNIPPET_CHARS = 200  # Fallback snippet length
+
+LIKE_ESCAPE = "\\"
+
+
+def escape_like(term: str) -> str:
+    """Make `%` and `_` in user input match literally."""
+    return term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2).replace("%", LIKE_ESCAPE + "%").replace("_", LIKE_ESCAPE + "_")
+
+
+def contains(term: str, *columns):
+    """Rows where any of `columns` contains `term`, case-insensitively."""
+    pattern = f"%{escape_like(term)}%"
+    return or_(*(column.ilike(pattern, escape=LIKE_ESCAPE) for column in columns))
+
+
+def relevance_order(dialect_name: str, term: str, *columns) -> list:
+    """ORDER BY clauses putting the best matches for `term` first."""
+    if dialect_name == "postgresql":
+        scores = [func.word_similarity(term, func.coalesce(column, "")) for column in columns]
+        return [func.greatest(*scores).desc()]
+    first = columns[0]
+    position = func.instr(func.lower(first), term.lower())
+    return [position == 0, position, func.length(first)]  # Matches on other columns go last
+
+
+async def ranked(db: AsyncSession, query, term: str, *columns, limit: int, offset: int | None = None) -> list:
+    """One page of `query` ordered by relevance to `term` (offset paging; relevance has no stable cursor)."""
+    order = relevance_order(db.bind.dialect.name, term, *columns)
+    rows = await db.scalars(query.order_by(*order).offset(offset or 0).limit(limit))
+    return rows.all()
+
+
+async def search_document_text(db: AsyncSession, user_id: str, q: str, *, limit: int, offset: int = 0) -> list[dict]:
+    """The user's documents matching `q`, best first, each with a highlighted snippet instead of the body."""
+    if db.bind.dialect.name != "postgresql":
+        return await _search_documents_fallback(db, user_id, q, limit=limit, offset=offset)
+
+    config = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+    query = func.websearch_to_tsquery(config, q)
+    vector = literal_column("documents.search_vector")
+    rank = func.ts_rank_cd(vector, query)
+    hits = (
+        select(Document.id, rank.label("rank"))
+        .where(Document.user_id == user_id, vector.op("@@")(query))
+        .order_by(rank.desc(), Document.id)
+        .offset(offset)
+        .limit(limit)
+        .subquery()
+    )
+    body = func.coalesce(Document.content, Document.title)
+    snippet = func.ts_headline(config, body, query, HEADLINE_OPTIONS)
+    rows = await db.execute(
+        select(
+            Document.id, Document.case_id, Document.title, Document.doc_type, Document.updated_at,
+            hits.c.rank, snippet.label("snippet"),
+        )
+        .join(hits, hits.c.id == Document.id)
+        .order_by(hits.c.rank.desc(), Document.id)
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+async def _search_documents_fallback(
+    db: AsyncSession, user_id: str, q: str, *, limit: int, offset: int
+) -> list[dict]:
+    rows = await db.execute(
+        select(Document.id, Document.case_id, Document.title, Document.doc_type, Document.updated_at, Document.content)
+        .where(Document.user_id == user_id, contains(q, Document.title, Document.content))
+        .order_by(*relevance_order(db.bind.dialect.name, q, Document.title))
+        .offset(offset)
+        .limit(limit)
+    )
+    results = []
+    for position, row in enumerate(rows):
+        result = dict(row._mapping)
+        result["snippet"] = highlight(result.pop("content") or result["title"], q)
+        result["rank"] = 1.0 / (offset + position + 1)
+        results.append(result)
+    return results
+
+
+def highlight(text: str, term: str, width: int = SNIPPET_CHARS) -> str:
+    """A window of `text` around the first match of `term`, with matches wrapped in <mark>."""
+    pattern = re.compile(re.escape(term), re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - width // 2) if match else 0
+    window = text[start:start + width]
+    marked = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", window)
+    return ("..." if start else "") + marked + ("..." if start + width < len(text) else "")
@@ -0,0 +1,106 @@
+"""Optional soft-delete mode for clients, cases, invoices and appointments.
+
+Deletes normally remove the row at once and the database cascades to its
+children (see migration 0010). With SOFT_DELETE_RETENTION_DAYS > 0 these four
+models are only marked with deleted_at instead, which is one cheap UPDATE even
+for a client with years of invoices. purge_deleted then removes rows deleted
+longer ago than the retention, in small batches from the scheduler, and the
+cascades run there rather than in a request: a marked case's documents, time
+entries and deadlines stay (and keep counting on the dashboard) until then.
+
+While the mode is on, every ORM select hides marked rows, relationship loads
+included; pass execution_options(include_deleted=True) to see them. With it
+off no filter is installed, and the purge job removes any rows still marked
+from when it was on.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.billing import Invoice
+from app.models.calendar import Appointment
+from app.models.case import Case
+from app.models.client import Client
+from app.services.dashboard_stats import apply_deltas, count_removed, subtract_removed
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Purge order: children first, so each batch deletes what it selected and nothing more
+SOFT_DELETE_MODELS = (Invoice, Appointment, Case, Client)
+
+
+def soft_delete_enabled() -> bool:
+    return settings.SOFT_DELETE_RETENTION_DAYS > 0
+
+
+def _hide_deleted(execute_state):
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(*(
+            with_loader_criteria(model, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+            for model in SOFT_DELETE_MODELS
+        ))
+
+
+if soft_delete_enabled():
+    event.listen(Session, "do_orm_execute", _hide_deleted)
+
+
+async def delete_rows(db: AsyncSession, model, *criteria) -> int:
+    """Delete (or in soft-delete mode, mark) the matching rows of `model` in one statement; returns the count.
+
+    Models without deleted_at are always deleted outright. Either way this
+    bypasses the unit of work, so what the rows counted for on the dashboard
+    (and, for a hard delete, everything the database cascades to) is summed
+    first and taken off their owners' totals in the same transaction.
+    """
+    soft = model in SOFT_DELETE_MODELS and soft_delete_enabled()
+    if model in SOFT_DELETE_MODELS:
+        criteria = (*criteria, model.deleted_at.is_(None))
+    removed = await count_removed(db, model, criteria, cascade=not soft)
+    if soft:
+        statement = update(model).where(*criteria).values(deleted_at=datetime.utcnow())
+    else:
+        statement = delete(model).where(*criteria)
+    count = (await db.execute(statement, execution_options={"synchronize_session": False})).rowcount
+    if count:
+        await apply_deltas(db, removed)
+    return count
+
+
+def purge_deleted() -> int:
+    """Hard-delete rows soft-deleted more than SOFT_DELETE_RETENTION_DAYS ago (all of them when off); returns how many."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.SOFT_DELETE_RETENTION_DAYS)
+    purged = 0
+    db = SessionLocal()
+    try:
+        for model in SOFT_DELETE_MODELS:
+            table = model.__table__
+            while True:
+                # Core statements, so no flush hooks run: the rows stopped counting when they were marked,
+                # and what the database cascades to from them is taken off the dashboard here
+                ids = db.execute(
+                    select(table.c.id).where(table.c.deleted_at < cutoff).limit(settings.SOFT_DELETE_PURGE_BATCH_SIZE),
+                    execution_options={"include_deleted": True},
+                ).scalars().all()
+                if not ids:
+                    break
+                subtract_removed(db, model, [model.id.in_(ids)])
+                db.execute(delete(table).where(table.c.id.in_(ids)))
+                db.commit()
+                purged += len(ids)
+    finally:
+        db.close()
+    if purged:
+        logger.info("Purged %d soft-deleted rows older than %s", purged, cutoff.isoformat())
+    return purged
@@ -0,0 +1,224 @@
+"""Test profile helpers: a throwaway database and bulk fixture data.
+
+With ENVIRONMENT=test (see TEST_DEFAULTS in app.config) the app runs against a
+shared in-memory SQLite database, so nothing needs to be running. Setting
+DATABASE_URL to a Postgres server instead puts every table in a scratch schema
+(TEST_DATABASE_SCHEMA, default test_<pid>) on that server. Either way the
+schema comes from the models via create_all instead of Alembic. On Postgres
+that means time_entries and appointments are not partitioned.
+
+    create_schema()                       # once per run
+    user = create_user(db, "a@example.com")
+    populate(db, user.id, clients=50)     # bulk rows for every list and dashboard route
+    reset_database()                      # between tests
+    drop_schema()                         # at the end
+
+scripts/bench_routes.py uses these helpers to time the hot routes.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import TEST_SCHEMA, Base, engine
+from app.models.billing import Invoice, InvoiceStatus, TimeEntry
+from app.models.calendar import Appointment, AppointmentStatus, Deadline, DeadlinePriority
+from app.models.case import Case, CaseStatus, CaseType
+from app.models.client import Client, ClientStatus
+from app.models.document import Document, DocumentType
+from app.models.ids import new_id
+from app.models.user import User
+from app.services.auth import hash_password
+from app.services.dashboard_stats import recount_user_stats
+
+settings = get_settings()
+
+BATCH_SIZE = 1000
+# documents.search_vector as created by migration 0007 (create_all does not know it)
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+WORDS = (
+    "agreement party shall notice term breach indemnify liability court motion counsel filing "
+    "claim damages settlement clause warranty confidential discovery hearing plaintiff defendant"
+).split()
+
+# Keeps the shared in-memory SQLite database alive between requests
+_keeper = None
+
+
+def _require_test_profile() -> None:
+    if settings.ENVIRONMENT != "test":
+        raise RuntimeError("app.testing only runs with ENVIRONMENT=test")
+
+
+def create_schema() -> None:
+    """Create every table (and, on Postgres, the scratch schema holding them)."""
+    global _keeper
+    _require_test_profile()
+    if TEST_SCHEMA:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public"))
+            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{TEST_SCHEMA}"'))
+    elif _keeper is None:
+        _keeper = engine.connect()
+    Base.metadata.create_all(engine)
+    if TEST_SCHEMA:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_documents_search_vector ON documents USING gin (search_vector)"
+            ))
+
+
+def reset_database() -> None:
+    """Empty every table; much faster than recreating the schema between tests."""
+    _require_test_profile()
+    tables = Base.metadata.sorted_tables
+    with engine.begin() as conn:
+        if TEST_SCHEMA:
+            conn.execute(text("TRUNCATE " + ", ".join(f'"{table.name}"' for table in tables)))
+        else:
+            for table in reversed(tables):
+                conn.execute(table.delete())
+
+
+def drop_schema() -> None:
+    global _keeper
+    _require_test_profile()
+    if TEST_SCHEMA:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{TEST_SCHEMA}" CASCADE'))
+    else:
+        Base.metadata.drop_all(engine)
+        if _keeper is not None:
+            _keeper.close()
+            _keeper = None
+    engine.dispose()
+
+
+def create_user(db: Session, email: str, password: str = "password123", name: str = "Test User") -> User:
+    user = User(email=email, name=name, hashed_password=hash_password(password))
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _insert(db: Session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words, length = [], 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def populate(
+    db: Session,
+    user_id: str,
+    *,
+    clients: int = 10,
+    cases_per_client: int = 2,
+    documents_per_case: int = 3,
+    time_entries_per_case: int = 5,
+    deadlines_per_case: int = 2,
+    invoices_per_client: int = 2,
+    appointments_per_client: int = 2,
+    document_chars: int = 2000,
+    seed: int = 0,
+) -> dict[str, int]:
+    """Bulk-insert a realistic spread of rows for one user and return how many of each were made.
+
+    Rows go in with multi-row INSERTs in batches of BATCH_SIZE, bypassing the
+    unit of work, so the user's dashboard totals are recounted at the end.
+    Dates are spread over the past two years (appointments and deadlines
+    around today) so paging, sorting and the dashboard windows all have data.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    def past(days: int) -> datetime:
+        return now - timedelta(days=rng.randint(0, days), minutes=rng.randint(0, 1439))
+
+    client_rows, case_rows, document_rows, entry_rows = [], [], [], []
+    deadline_rows, invoice_rows, appointment_rows = [], [], []
+    for c in range(clients):
+        client_id = new_id()
+        client_rows.append({
+            "id": client_id, "user_id": user_id, "name": f"Client {c} {rng.choice(WORDS).title()}",
+            "email": f"client{c}.{client_id[-6:]}@example.com", "company": f"{rng.choice(WORDS).title()} LLC",
+            "status": rng.choice(list(ClientStatus)), "created_at": past(730),
+        })
+        client_case_ids = []
+        for k in range(cases_per_client):
+            case_id = new_id()
+            client_case_ids.append(case_id)
+            case_rows.append({
+                "id": case_id, "user_id": user_id, "client_id": client_id,
+                "title": f"{rng.choice(WORDS).title()} matter {c}-{k}", "case_number": f"CASE-{case_id[-12:]}",
+                "case_type": rng.choice(list(CaseType)), "status": rng.choice(list(CaseStatus)),
+                "description": _text(rng, 200), "created_at": past(730),
+            })
+            for d in range(documents_per_case):
+                document_rows.append({
+                    "user_id": user_id, "case_id": case_id, "title": f"{rng.choice(WORDS).title()} {d} for case {k}",
+                    "doc_type": rng.choice(list(DocumentType)), "content": _text(rng, document_chars),
+                    "created_at": past(730),
+                })
+            for _ in range(time_entries_per_case):
+                entry_rows.append({
+                    "user_id": user_id, "case_id": case_id, "description": _text(rng, 60),
+                    "hours": rng.choice((0.25, 0.5, 1, 1.5, 2, 3)), "rate": rng.choice((150, 250, 400)),
+                    "date": past(365), "is_billable": rng.random() < 0.8,
+                })
+            for _ in range(deadlines_per_case):
+                deadline_rows.append({
+                    "user_id": user_id, "case_id": case_id, "title": f"File {rng.choice(WORDS)}",
+                    "due_date": now + timedelta(days=rng.randint(-30, 90)),
+                    "priority": rng.choice(list(DeadlinePriority)),
+                })
+        for _ in range(invoices_per_client):
+            invoice_id, subtotal = new_id(), rng.randint(5, 200) * 50
+            invoice_rows.append({
+                "id": invoice_id, "user_id": user_id, "client_id": client_id,
+                "invoice_number": f"INV-{invoice_id[-12:]}", "status": rng.choice(list(InvoiceStatus)),
+                "subtotal": subtotal, "total": subtotal, "due_date": now + timedelta(days=rng.randint(-60, 60)),
+                "created_at": past(730),
+            })
+        for _ in range(appointments_per_client):
+            start = (now + timedelta(days=rng.randint(-60, 60))).replace(minute=0, second=0)
+            appointment_rows.append({
+                "user_id": user_id, "client_id": client_id,
+                "case_id": rng.choice(client_case_ids) if client_case_ids else None,
+                "title": f"Meeting about {rng.choice(WORDS)}", "start_time": start,
+                "end_time": start + timedelta(hours=1), "status": AppointmentStatus.SCHEDULED,
+            })
+
+    # Parents before children for the foreign keys
+    for model, rows in (
+        (Client, client_rows), (Case, case_rows), (Document, document_rows), (TimeEntry, entry_rows),
+        (Deadline, deadline_rows), (Invoice, invoice_rows), (Appointment, appointment_rows),
+    ):
+        _insert(db, model, rows)
+    recount_user_stats(db, user_id)
+    db.commit()
+    return {
+        "clients": len(client_rows),
+        "cases": len(case_rows),
+        "documents": len(document_rows),
+        "time_entries": len(entry_rows),
+        "deadlines": len(deadline_rows),
+        "invoices": len(invoice_rows),
+        "appointments": len(appointment_rows),
+    }
@@ -0,0 +1,94 @@
+"""
+Login throughput benchmark: fires parallel logins at a running backend and, at the
+same time, probes /api/health to show whether the event loop stays responsive.
+
+Run:  cd backend && python scripts/bench_login.py --base-url http://localhost:8000 -n 200 -c 32
+
+Start the server with AUTH_RATE_LIMIT_ENABLED=false, otherwise most logins are throttled (429).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+BENCH_EMAIL = "bench-login@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+async def ensure_user(client: httpx.AsyncClient) -> None:
+    r = await client.post(
+        "/api/auth/register",
+        json={"email": BENCH_EMAIL, "name": "Bench User", "password": BENCH_PASSWORD},
+    )
+    if r.status_code not in (200, 400):
+        r.raise_for_status()
+
+
+async def run_logins(client: httpx.AsyncClient, total: int, concurrency: int) -> tuple[list[float], dict[int, int]]:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            r = await client.post("/api/auth/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+            latencies.append(time.perf_counter() - start)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies, statuses
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    latencies: list[float] = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        await ensure_user(client)
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop))
+        start = time.perf_counter()
+        latencies, statuses = await run_logins(client, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        health = await probe
+
+    print(f"logins:      {args.requests} with concurrency {args.concurrency} in {elapsed:.2f}s")
+    print(f"throughput:  {args.requests / elapsed:.1f} logins/s")
+    print(f"status:      {dict(sorted(statuses.items()))}")
+    print(
+        f"login ms:    p50={statistics.median(latencies) * 1000:.0f} "
+        f"p95={percentile(latencies, 0.95) * 1000:.0f} max={max(latencies) * 1000:.0f}"
+    )
+    if health:
+        print(
+            f"health ms:   p50={statistics.median(health) * 1000:.1f} "
+            f"p95={percentile(health, 0.95) * 1000:.1f} max={max(health) * 1000:.1f}  (event loop responsiveness)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,180 @@
+"""
+Partitioning benchmark: the time entry queries we run most, against a plain
+table and a monthly range-partitioned one holding the same synthetic rows.
+
+Both scratch tables are shaped like time_entries (indexed on user_id, date, id)
+and filled server-side with generate_series, spreading the rows evenly over
+`--years` of history across `--users` users. Each query is timed over several
+runs and reported with the number of partitions the plan touches. Dropping the
+oldest month (DELETE against DROP of a detached partition) is timed last. The
+tables are dropped afterwards.
+
+Run:  cd backend && python scripts/bench_partitions.py -n 5000000
+
+Needs Postgres 13+ (DATABASE_URL) for gen_random_uuid().
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.services.partitions import month_start
+
+PLAIN = "bench_time_entries_plain"
+PARTITIONED = "bench_time_entries_partitioned"
+
+QUERIES = [
+    (
+        "hours this month",
+        "SELECT coalesce(sum(hours), 0) FROM {table} "
+        "WHERE user_id = :user_id AND is_billable AND date >= :month_start AND date < :next_month",
+    ),
+    (
+        "latest page",
+        "SELECT * FROM {table} WHERE user_id = :user_id ORDER BY date DESC, id DESC LIMIT 25",
+    ),
+    (
+        "page at cursor",
+        "SELECT * FROM {table} WHERE user_id = :user_id AND date <= :cursor AND (date, id) < (:cursor, :max_id) "
+        "ORDER BY date DESC, id DESC LIMIT 25",
+    ),
+    (
+        "90-day window",
+        "SELECT count(*) FROM {table} WHERE user_id = :user_id AND date >= :window_start AND date <= :now",
+    ),
+]
+
+
+def user_id(n: int) -> str:
+    return f"00000000-0000-0000-0000-{n:012x}"
+
+
+def create_tables(conn, first_month: date, last_month: date) -> None:
+    columns = "(id uuid NOT NULL, user_id uuid NOT NULL, hours numeric(6,2) NOT NULL, " \
+              "is_billable boolean NOT NULL, date timestamp NOT NULL, description text)"
+    conn.execute(text(f"DROP TABLE IF EXISTS {PLAIN}, {PARTITIONED}"))
+    conn.execute(text(f"CREATE TABLE {PLAIN} {columns}"))
+    conn.execute(text(f"CREATE TABLE {PARTITIONED} {columns} PARTITION BY RANGE (date)"))
+    month = first_month
+    while month <= last_month:
+        following = month_start(month, 1)
+        conn.execute(text(
+            f"CREATE TABLE {PARTITIONED}_y{month.year}m{month.month:02d} PARTITION OF {PARTITIONED} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        ))
+        month = following
+    conn.execute(text(f"CREATE TABLE {PARTITIONED}_default PARTITION OF {PARTITIONED} DEFAULT"))
+    conn.commit()
+
+
+def fill(conn, table: str, rows: int, users: int, first: datetime, span_seconds: int) -> float:
+    start = time.perf_counter()
+    conn.execute(text(
+        f"INSERT INTO {table} "
+        f"SELECT gen_random_uuid(), ('00000000-0000-0000-0000-' || lpad(to_hex(g % :users), 12, '0'))::uuid, "
+        f"(g % 16) / 4.0 + 0.25, g % 5 <> 0, "
+        f"CAST(:first AS timestamp) + (g::float8 / :rows * :span) * interval '1 second', 'Synthetic entry' "
+        f"FROM generate_series(0, :rows - 1) AS g"
+    ), {"users": users, "first": first, "rows": rows, "span": span_seconds})
+    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, date)"))
+    conn.execute(text(f"CREATE INDEX {table}_user_date ON {table} (user_id, date, id)"))
+    conn.commit()
+    conn.execute(text(f"ANALYZE {table}"))
+    conn.commit()
+    return time.perf_counter() - start
+
+
+def partitions_scanned(conn, sql: str, params: dict) -> int:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    relations = set()
+
+    def walk(node: dict) -> None:
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return len(relations)
+
+
+def time_query(conn, sql: str, params: dict, runs: int) -> float:
+    conn.execute(text(sql), params).all()  # Warm the cache
+    start = time.perf_counter()
+    for _ in range(runs):
+        conn.execute(text(sql), params).all()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def drop_oldest_month(conn, first_month: date) -> tuple[float, float]:
+    following = month_start(first_month, 1)
+    start = time.perf_counter()
+    conn.execute(text(f"DELETE FROM {PLAIN} WHERE date < :following"), {"following": following})
+    conn.commit()
+    delete_ms = (time.perf_counter() - start) * 1000
+
+    partition = f"{PARTITIONED}_y{first_month.year}m{first_month.month:02d}"
+    start = time.perf_counter()
+    conn.execute(text(f"ALTER TABLE {PARTITIONED} DETACH PARTITION {partition}"))
+    conn.execute(text(f"DROP TABLE {partition}"))
+    conn.commit()
+    return delete_ms, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rows", type=int, default=5000000)
+    parser.add_argument("--years", type=int, default=5, help="History the rows are spread over")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=50, help="Timed executions per query")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("This benchmark needs Postgres; set DATABASE_URL")
+
+    now = datetime.utcnow().replace(microsecond=0)
+    first = now - timedelta(days=365 * args.years)
+    first_month, this_month = month_start(first.date()), month_start(now.date())
+    next_month = month_start(this_month, 1)
+    params = {
+        "user_id": user_id(args.users // 2),
+        "month_start": this_month,
+        "next_month": next_month,
+        "cursor": now - timedelta(days=180),
+        "max_id": "ffffffff-ffff-ffff-ffff-ffffffffffff",
+        "window_start": now - timedelta(days=90),
+        "now": now,
+    }
+
+    with engine.connect() as conn:
+        create_tables(conn, first_month, month_start(this_month, 12))
+        span = int((now - first).total_seconds())
+        print(f"{args.rows} rows over {args.years} years, {args.users} users")
+        for table in (PLAIN, PARTITIONED):
+            print(f"  filled {table} in {fill(conn, table, args.rows, args.users, first, span):.1f}s")
+
+        print(f"\n{'query':<18} {'plain ms':>10} {'partitioned ms':>15} {'partitions read':>16}")
+        for name, sql in QUERIES:
+            plain_ms = time_query(conn, sql.format(table=PLAIN), params, args.runs)
+            partitioned_sql = sql.format(table=PARTITIONED)
+            partitioned_ms = time_query(conn, partitioned_sql, params, args.runs)
+            scanned = partitions_scanned(conn, partitioned_sql, params)
+            print(f"{name:<18} {plain_ms:>10.2f} {partitioned_ms:>15.2f} {scanned:>16}")
+
+        delete_ms, drop_ms = drop_oldest_month(conn, first_month)
+        print(f"\ndrop oldest month: DELETE {delete_ms:.0f} ms, DETACH + DROP partition {drop_ms:.0f} ms")
+
+        conn.execute(text(f"DROP TABLE {PLAIN}, {PARTITIONED}"))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
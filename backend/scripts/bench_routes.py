@@ -0,0 +1,108 @@
+"""
+Router hot-path benchmark on the test profile: the list and dashboard routes
+timed in-process against a populated throwaway database, without any server.
+
+The app runs with ENVIRONMENT=test, so by default the database is in-memory
+SQLite and nothing needs to be running. Point DATABASE_URL at Postgres to
+measure there instead; a scratch schema is used and dropped afterwards. Each
+route is called --runs times through FastAPI's TestClient. The report shows
+latency percentiles, the statement count from the Server-Timing header and
+the response size. Query budgets are strict in this profile, so a regression
+that adds queries fails loudly.
+
+Run:  cd backend && python scripts/bench_routes.py --clients 200 --runs 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+os.environ.setdefault("ENVIRONMENT", "test")
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.testing import create_schema, create_user, drop_schema, populate
+
+ROUTES = [
+    "/api/dashboard/stats",
+    "/api/dashboard/deadlines",
+    "/api/dashboard/activity",
+    "/api/dashboard/appointments",
+    "/api/clients",
+    "/api/cases",
+    "/api/cases?search=matter",
+    "/api/documents",
+    "/api/documents/search?q=breach",
+    "/api/billing/invoices",
+    "/api/billing/time-entries",
+    "/api/calendar/deadlines",
+    "/api/calendar/appointments",
+]
+
+
+def query_count(server_timing: str) -> str:
+    for part in server_timing.split(","):
+        if part.strip().startswith("db;"):
+            return part.split('desc="')[-1].split(" ")[0]
+    return "?"
+
+
+def bench_route(client: TestClient, path: str, headers: dict, runs: int) -> None:
+    response = client.get(path, headers=headers)  # Warm caches and check the route works
+    if response.status_code != 200:
+        print(f"{path:<34} HTTP {response.status_code}: {response.text[:100]}")
+        return
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        client.get(path, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{path:<34} {statistics.median(timings):>8.2f} {p95:>8.2f} "
+        f"{query_count(response.headers.get('server-timing', '')):>8} {len(response.content) / 1024:>9.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--cases-per-client", type=int, default=2)
+    parser.add_argument("--documents-per-case", type=int, default=3)
+    parser.add_argument("--document-chars", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=30, help="Timed requests per route")
+    args = parser.parse_args()
+
+    create_schema()
+    try:
+        db = SessionLocal()
+        try:
+            user = create_user(db, "bench@example.com")
+            start = time.perf_counter()
+            counts = populate(
+                db, user.id, clients=args.clients, cases_per_client=args.cases_per_client,
+                documents_per_case=args.documents_per_case, document_chars=args.document_chars,
+            )
+        finally:
+            db.close()
+        print(f"populated in {time.perf_counter() - start:.1f}s: " + ", ".join(f"{n} {k}" for k, n in counts.items()))
+
+        with TestClient(app) as client:
+            token = client.post(
+                "/api/auth/login", json={"email": "bench@example.com", "password": "password123"}
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            print(f"\n{'route':<34} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'size KiB':>9}")
+            for path in ROUTES:
+                bench_route(client, path, headers, args.runs)
+    finally:
+        drop_schema()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Key type benchmark: insert throughput and index size for the old VARCHAR(36) keys
+with random v4 ids against native UUID keys with random (v4) and time-ordered (v7) ids.
+
+Each variant gets a scratch table shaped like ours (primary key plus an indexed
+foreign-key-like column), filled in batches; the tables are dropped afterwards.
+
+Run:  cd backend && python scripts/bench_uuid_keys.py -n 200000
+
+Needs Postgres (DATABASE_URL); sizes come from pg_relation_size.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.models.ids import uuid7
+
+VARIANTS = [
+    ("varchar(36) + v4", "varchar(36)", lambda: str(uuid.uuid4())),
+    ("uuid + v4", "uuid", lambda: str(uuid.uuid4())),
+    ("uuid + v7", "uuid", lambda: str(uuid7())),
+]
+
+
+def run_variant(conn, name: str, column_type: str, make_id, rows: int, batch: int, parents: list[str]) -> None:
+    table = "bench_keys_" + "".join(c if c.isalnum() else "_" for c in name)
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    conn.execute(text(
+        f"CREATE TABLE {table} (id {column_type} PRIMARY KEY, user_id {column_type} NOT NULL, title text)"
+    ))
+    conn.execute(text(f"CREATE INDEX {table}_user_id ON {table} (user_id)"))
+    conn.commit()
+
+    insert = text(
+        f"INSERT INTO {table} (id, user_id, title) "
+        f"VALUES (CAST(:id AS {column_type}), CAST(:user_id AS {column_type}), :title)"
+    )
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        conn.execute(insert, [
+            {"id": make_id(), "user_id": parents[i % len(parents)], "title": "row"}
+            for i in range(offset, min(offset + batch, rows))
+        ])
+        conn.commit()
+    elapsed = time.perf_counter() - start
+
+    pk_size, fk_size = conn.execute(text(
+        f"SELECT pg_relation_size('{table}_pkey'), pg_relation_size('{table}_user_id')"
+    )).one()
+    conn.execute(text(f"DROP TABLE {table}"))
+    conn.commit()
+    print(
+        f"{name:<18} {rows / elapsed:>10.0f} rows/s   "
+        f"pk index {pk_size / 1024 / 1024:>7.1f} MiB   fk index {fk_size / 1024 / 1024:>7.1f} MiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--parents", type=int, default=100, help="Distinct values in the foreign-key-like column")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("This benchmark needs Postgres; set DATABASE_URL")
+
+    parents = [str(uuid.uuid4()) for _ in range(args.parents)]
+    print(f"{args.rows} rows in batches of {args.batch}")
+    with engine.connect() as conn:
+        for name, column_type, make_id in VARIANTS:
+            run_variant(conn, name, column_type, make_id, args.rows, args.batch, parents)
+
+
+if __name__ == "__main__":
+    main()
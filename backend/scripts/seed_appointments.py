@@ -1,11 +1,11 @@
 from datetime import datetime, timedelta
-import uuid
 import os
 import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.database import SessionLocal
+from app.models.ids import new_id
 from app.models.user import User
 from app.models.case import Case
 from app.models.client import Client
@@ -114,7 +114,7 @@ def main() -> None:
         )
 
         appointment = Appointment(
-            id=str(uuid.uuid4()),
+            id=new_id(),
             user_id=user.id,
             case_id=item["case_id"],
             client_id=item["client_id"],
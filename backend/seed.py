@@ -1,15 +1,16 @@
 """
 Seed script: populates the database with realistic demo data.
-Run:  cd backend && python seed.py
+Run:  cd backend && alembic upgrade head && python seed.py
 """
 
-import uuid, sys, os
+import sys, os
 from datetime import datetime, timedelta
 
 # Ensure app package is importable
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal
+from app.models.ids import new_id
 from app.models.user import User
 from app.models.client import Client, ClientStatus
 from app.models.case import Case, CaseStatus, CaseType
@@ -24,15 +25,13 @@ from app.models.calendar import (
      AppointmentStatus,
 )
 from app.services.auth import hash_password
-
-# Create tables if missing
-Base.metadata.create_all(bind=engine)
+from app.services.dashboard_stats import reconcile_dashboard_stats
 
 db = SessionLocal()
 
 # ──────────── helper ────────────
 now = datetime.utcnow()
-uid = lambda: str(uuid.uuid4())
+uid = new_id
 
 
 def d(days: int) -> datetime:
@@ -472,6 +471,7 @@ for ad in appointments_data:
 # ──────────── commit ────────────
 db.commit()
 db.close()
+reconcile_dashboard_stats()
 
 print("✅  Demo data seeded successfully!")
 print(f"   User:  demo@lawfirm.com / demo1234")
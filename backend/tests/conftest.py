@@ -0,0 +1,58 @@
+"""Shared fixtures: the whole suite runs on the test profile (see app.testing).
+
+Settings are read once at import, so ENVIRONMENT is set before anything from
+app is imported. Tables are created once per run and emptied after each test.
+"""
+import os
+
+os.environ["ENVIRONMENT"] = "test"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.services.auth import create_access_token
+from app.testing import create_schema, create_user, drop_schema, reset_database
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    create_schema()
+    yield
+    drop_schema()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    reset_database()
+
+
+@pytest.fixture(scope="session")
+def api():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(api):
+    api.cookies.clear()  # Requests authenticate with the bearer header only
+    return api
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(db):
+    return create_user(db, "owner@example.com")
+
+
+@pytest.fixture
+def auth(user):
+    return {"Authorization": f"Bearer {create_access_token(user)}"}
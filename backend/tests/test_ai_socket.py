@@ -0,0 +1,36 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.services.auth import create_access_token
+
+
+def connect(client, user):
+    return client.websocket_connect("/api/ai/ws", headers={"Cookie": f"auth_token={create_access_token(user)}"})
+
+
+def test_bad_frames_get_an_error_and_keep_the_connection(client, user):
+    with connect(client, user) as socket:
+        socket.send_text("{not json")
+        assert socket.receive_json() == {"id": "", "type": "error", "detail": "Invalid JSON"}
+        for frame in ("[]", '"x"', "3"):
+            socket.send_text(frame)
+            assert socket.receive_json() == {"id": "", "type": "error", "detail": "Expected a JSON object"}
+
+        # Still serving requests on the same connection
+        socket.send_json({"id": "1", "type": "complete", "text": "a"})
+        assert socket.receive_json() == {"id": "1", "type": "complete", "completion": ""}
+
+
+def test_the_token_is_only_taken_from_the_cookie(client, user):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/api/ai/ws?token={create_access_token(user)}") as socket:
+            socket.receive_json()
+
+
+def test_handshakes_from_other_origins_are_refused(client, user):
+    token = create_access_token(user)
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(
+            "/api/ai/ws", headers={"Cookie": f"auth_token={token}", "Origin": "https://evil.example"},
+        ) as socket:
+            socket.receive_json()
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.document import Document
+from app.models.job import JobCheckpoint
+from app.services import batch_analysis
+from app.testing import create_user
+
+
+def test_status_counts_only_the_callers_pending_documents(client, auth, db, user):
+    other = create_user(db, "other@example.com")
+    db.add_all([
+        Document(user_id=user.id, title="Lease", content="Terms"),
+        Document(user_id=user.id, title="Analyzed", content="Terms", ai_summary="Fine", ai_analyzed_version=1),
+        Document(user_id=user.id, title="Empty", content=""),
+        Document(user_id=user.id, title="Edited", content="New terms", ai_summary="Old", ai_analyzed_version=1, version=2),
+        Document(user_id=other.id, title="Theirs", content="Terms"),
+    ])
+    db.commit()
+
+    status = client.get("/api/documents/analysis/batch", headers=auth).json()
+    assert status["pending"] == 2
+    assert "resume_cursor" not in status
+
+
+@pytest.fixture
+def fast_batches(monkeypatch):
+    monkeypatch.setattr(batch_analysis.settings, "BATCH_ANALYSIS_REQUESTS_PER_MINUTE", 60000)
+    monkeypatch.setitem(batch_analysis.progress, "running", False)
+
+
+def lease_expiry():
+    db = SessionLocal()
+    try:
+        return db.get(JobCheckpoint, batch_analysis.JOB_NAME).locked_until
+    finally:
+        db.close()
+
+
+def test_documents_edited_mid_run_are_not_counted_as_processed(db, user, fast_batches, monkeypatch):
+    document = Document(user_id=user.id, title="Lease", content="Terms")
+    db.add(document)
+    db.commit()
+
+    async def analyze_while_the_user_edits(content, user_id=None):
+        edit = SessionLocal()
+        edit.execute(update(Document).values(content="New terms", version=Document.version + 1))
+        edit.commit()
+        edit.close()
+        return {"summary": "Fine"}
+
+    monkeypatch.setattr(batch_analysis, "analyze_document", analyze_while_the_user_edits)
+    result = batch_analysis.run_batch_analysis(ignore_window=True)
+    assert (result["processed"], result["stopped_reason"]) == (0, "complete")
+    db.expire_all()
+    assert document.ai_summary is None
+
+
+def test_the_lease_is_renewed_before_every_call(db, user, fast_batches, monkeypatch):
+    db.add_all([Document(user_id=user.id, title=f"Memo {i}", content="Terms") for i in range(3)])
+    db.commit()
+    expiries = []
+
+    async def analyze(content, user_id=None):
+        expiries.append(lease_expiry())
+        return {"summary": "Fine"}
+
+    monkeypatch.setattr(batch_analysis, "analyze_document", analyze)
+    assert batch_analysis.run_batch_analysis(ignore_window=True)["processed"] == 3
+    assert expiries == sorted(expiries) and len(set(expiries)) == 3
+    assert lease_expiry() is None
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.models.billing import TimeEntry
+from app.models.document import Document
+from app.services import completion_model
+from app.services.completion_model import NgramModel, _refresh
+
+PHRASE = "the parties agree to arbitrate"
+
+
+def learn(model: NgramModel, user_id: str, source: str = "documents") -> None:
+    model.refreshing = True
+    _refresh(user_id, source, model)
+
+
+def count(model: NgramModel, context: str, word: str) -> int:
+    return model.table.get(tuple(context.split()), {}).get(word, 0)
+
+
+def test_rows_sharing_a_timestamp_survive_batch_boundaries(db, user, monkeypatch):
+    monkeypatch.setattr(completion_model.settings, "LOCAL_COMPLETION_REFRESH_BATCH", 2)
+    stamp = datetime(2026, 10, 1, 9, 0)
+    db.add_all([
+        Document(user_id=user.id, title=f"Memo {i}", content=PHRASE, created_at=stamp, updated_at=stamp)
+        for i in range(5)
+    ])
+    db.commit()
+
+    model = NgramModel(1000)
+    for _ in range(4):
+        learn(model, user.id)
+    assert count(model, "agree", "to") == 5
+
+
+def test_an_edit_rebuilds_on_the_side_one_batch_per_refresh(db, user, monkeypatch):
+    monkeypatch.setattr(completion_model.settings, "LOCAL_COMPLETION_REFRESH_BATCH", 2)
+    created = datetime.utcnow() - timedelta(days=1)
+    documents = [
+        Document(user_id=user.id, title=f"Memo {i}", content=PHRASE, created_at=created, updated_at=created + timedelta(minutes=i))
+        for i in range(5)
+    ]
+    db.add_all(documents)
+    db.commit()
+    model = NgramModel(1000)
+    for _ in range(3):
+        learn(model, user.id)
+    assert count(model, "agree", "to") == 5
+
+    documents[0].content = PHRASE + " in london"
+    db.commit()
+    learn(model, user.id)
+    # The live model keeps its counts while the side model has learned one batch
+    assert model.rebuild is not None and count(model.rebuild, "agree", "to") == 2
+    assert count(model, "agree", "to") == 5
+    for _ in range(2):
+        learn(model, user.id)
+    assert model.rebuild is None
+    assert (count(model, "agree", "to"), count(model, "arbitrate", "in")) == (5, 1)
+    learn(model, user.id)
+    assert model.rebuild is None  # The edit was learned by the rebuild and does not trigger another
+
+
+def test_edited_time_entries_are_learned_again(db, user):
+    entry = TimeEntry(user_id=user.id, description="draft lease review", hours=1, rate=200, date=datetime.utcnow())
+    db.add(entry)
+    db.commit()
+    model = NgramModel(1000)
+    learn(model, user.id, "time_entries")
+
+    db.execute(update(TimeEntry).values(description="draft lease amendment"))
+    db.commit()
+    learn(model, user.id, "time_entries")
+    learn(model, user.id, "time_entries")
+    assert (count(model, "lease", "review"), count(model, "lease", "amendment")) == (0, 1)
+
+
+def test_deleted_rows_stay_learned_until_a_rebuild(db, user):
+    document = Document(user_id=user.id, title="Memo", content=PHRASE)
+    db.add(document)
+    db.commit()
+    model = NgramModel(1000)
+    learn(model, user.id)
+
+    db.delete(document)
+    db.commit()
+    learn(model, user.id)
+    assert count(model, "agree", "to") == 1
+
+
+def test_no_matching_candidates_without_a_support_threshold(monkeypatch):
+    monkeypatch.setattr(completion_model.settings, "LOCAL_COMPLETION_MIN_SUPPORT", 0)
+    model = NgramModel(1000)
+    model.train([PHRASE])
+    assert model._best(["agree"], "x") == (None, 0.0)
+    assert model.complete("the parties agree t", 0.5) == "o arbitrate"
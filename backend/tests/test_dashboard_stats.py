@@ -0,0 +1,95 @@
+"""The stored dashboard totals must match a recount after every kind of write."""
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.models.billing import Invoice, InvoiceStatus
+from app.models.case import Case, CaseStatus
+from app.models.client import Client, ClientStatus
+from app.models.dashboard import DashboardStats
+from app.services.dashboard_stats import recount_user_stats
+from app.testing import populate
+
+
+def stats(client, auth) -> dict:
+    return client.get("/api/dashboard/stats", headers=auth).json()
+
+
+def assert_no_drift(db, user_id: str) -> None:
+    assert not recount_user_stats(db, user_id), "stored dashboard totals drifted from a recount"
+    db.rollback()
+
+
+def test_orm_writes_apply_deltas(client, auth, db, user):
+    assert stats(client, auth)["active_clients"] == 0
+
+    acme = client.post("/api/clients", json={"name": "Acme"}, headers=auth).json()
+    case = client.post("/api/cases", json={"title": "Lease dispute", "client_id": acme["id"]}, headers=auth).json()
+    client.post("/api/documents", json={"title": "Lease", "content": "Terms"}, headers=auth)
+    invoice = client.post("/api/billing/invoices", json={
+        "client_id": acme["id"], "items": [{"description": "Advice", "quantity": 2, "rate": 150, "amount": 300}],
+    }, headers=auth).json()
+    client.post("/api/billing/time-entries", json={
+        "description": "Call", "hours": 1.5, "rate": 200, "date": datetime.utcnow().isoformat(),
+    }, headers=auth)
+    totals = stats(client, auth)
+    assert (totals["active_clients"], totals["open_cases"], totals["documents"]) == (1, 1, 1)
+    assert (totals["total_billed"], totals["billable_hours_month"]) == (300, 1.5)
+    assert_no_drift(db, user.id)
+
+    client.patch(f"/api/cases/{case['id']}", json={"status": "closed"}, headers=auth)
+    client.patch(f"/api/billing/invoices/{invoice['id']}", json={"status": "sent"}, headers=auth)
+    totals = stats(client, auth)
+    assert (totals["open_cases"], totals["pending_invoices"], totals["outstanding"]) == (0, 1, 300)
+    assert_no_drift(db, user.id)
+
+    client.patch(f"/api/billing/invoices/{invoice['id']}", json={"status": "paid"}, headers=auth)
+    client.patch(f"/api/clients/{acme['id']}", json={"status": "inactive"}, headers=auth)
+    totals = stats(client, auth)
+    assert (totals["active_clients"], totals["outstanding"], totals["total_collected"]) == (0, 0, 300)
+    assert_no_drift(db, user.id)
+
+
+def test_bulk_writes_keep_totals_exact(client, auth, db, user):
+    populate(db, user.id, clients=4)
+    first = db.scalars(select(Client.id).order_by(Client.id)).first()
+    client.post("/api/clients/import", json={"data": [{"name": "New client"}]}, headers=auth)
+    client.post("/api/cases/import", json={"data": [{"title": "Imported", "client_id": first}]}, headers=auth)
+    client.post("/api/documents/import", json={"data": [{"title": "Imported"}]}, headers=auth)
+    assert_no_drift(db, user.id)
+
+    client.delete(f"/api/clients/{first}", headers=auth)
+    assert_no_drift(db, user.id)
+    # populate: 4 clients x 2 cases x 3 documents, one client's share gone, plus the import
+    assert stats(client, auth)["documents"] == 3 * 2 * 3 + 1
+
+
+def test_writes_through_expired_objects_keep_totals_exact(db, user):
+    # The sync session expires everything on commit: these writes happen without the old values loaded
+    populate(db, user.id, clients=2)
+    sent, active, case = db.scalars(select(Invoice)).first(), db.scalars(select(Client)).first(), db.scalars(select(Case)).first()
+    sent.status, active.status, case.status = InvoiceStatus.SENT, ClientStatus.ACTIVE, CaseStatus.OPEN
+    db.commit()
+
+    sent.status = InvoiceStatus.PAID
+    active.status = ClientStatus.INACTIVE
+    db.delete(case)
+    db.commit()
+    assert_no_drift(db, user.id)
+
+
+def test_bulk_deletes_apply_deltas_instead_of_recounting(client, auth, db, user):
+    populate(db, user.id, clients=3)
+    reconciled_at = stats(client, auth)["reconciled_at"]
+    doomed = db.scalars(select(Client.id).order_by(Client.id)).first()
+
+    client.delete(f"/api/clients/{doomed}", headers=auth)
+    assert stats(client, auth)["reconciled_at"] == reconciled_at
+    assert_no_drift(db, user.id)
+
+
+def test_stats_never_reconciled_report_null(client, auth, db, user):
+    db.execute(update(DashboardStats).values(reconciled_at=None))
+    db.commit()
+    totals = stats(client, auth)
+    assert totals["reconciled_at"] is None and totals["age_seconds"] is None
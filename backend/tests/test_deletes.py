@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.models.billing import Invoice, TimeEntry
+from app.models.calendar import Appointment, Deadline
+from app.models.case import Case
+from app.models.client import Client
+from app.models.document import Document
+from app.testing import create_user, populate
+
+
+def count(db, model) -> int:
+    return db.scalar(select(func.count()).select_from(model))
+
+
+def test_deleting_a_client_cascades_in_the_database(client, auth, db, user):
+    populate(db, user.id, clients=2)
+    doomed = db.scalars(select(Client).order_by(Client.id)).first()
+    doomed_id = doomed.id
+    before = {model: count(db, model) for model in (Case, Document, TimeEntry, Deadline, Invoice, Appointment)}
+
+    assert client.delete(f"/api/clients/{doomed_id}", headers=auth).status_code == 204
+
+    db.expire_all()
+    assert db.get(Client, doomed_id) is None
+    assert db.scalar(select(func.count()).select_from(Case).where(Case.client_id == doomed_id)) == 0
+    # Half the rows went with the client's cases and invoices; appointments stay, detached
+    for model in (Case, Document, TimeEntry, Deadline, Invoice):
+        assert count(db, model) == before[model] // 2
+    assert count(db, Appointment) == before[Appointment]
+    assert db.scalar(select(func.count()).select_from(Appointment).where(Appointment.client_id == doomed_id)) == 0
+
+
+def test_deleting_a_case_detaches_its_appointments(client, auth, db, user):
+    populate(db, user.id, clients=1, cases_per_client=1, appointments_per_client=0)
+    case = db.scalars(select(Case)).one()
+    start = datetime.utcnow().replace(microsecond=0)
+    db.add(Appointment(user_id=user.id, case_id=case.id, title="Prep", start_time=start, end_time=start + timedelta(hours=1)))
+    db.commit()
+    case_id = case.id
+
+    assert client.delete(f"/api/cases/{case_id}", headers=auth).status_code == 204
+    assert client.delete(f"/api/cases/{case_id}", headers=auth).status_code == 404
+
+    db.expire_all()
+    assert count(db, Document) == count(db, TimeEntry) == count(db, Deadline) == 0
+    assert db.scalars(select(Appointment.case_id)).one() is None
+
+
+def test_other_users_rows_cannot_be_deleted(client, auth, db):
+    other = create_user(db, "other@example.com")
+    populate(db, other.id, clients=1)
+    other_client = db.scalars(select(Client.id)).one()
+
+    assert client.delete(f"/api/clients/{other_client}", headers=auth).status_code == 404
+    assert count(db, Client) == 1
@@ -0,0 +1,8 @@
+def test_liveness_is_public(client):
+    assert client.get("/api/health").status_code == 200
+
+
+def test_pool_metrics_require_a_signed_in_user(client, auth):
+    assert client.get("/api/health/db").status_code == 401
+    response = client.get("/api/health/db", headers=auth)
+    assert response.status_code == 200 and "pools" in response.json()
@@ -0,0 +1,65 @@
+from sqlalchemy import select
+
+from app.models.billing import TimeEntry
+from app.models.client import Client
+from app.models.document import Document
+from app.testing import create_user
+
+
+def test_client_import_matches_existing_names_case_insensitively(client, auth, db):
+    first = client.post("/api/clients/import", json={"data": [{"name": "Acme"}, {"name": " "}]}, headers=auth)
+    assert first.json() == {"created": 1, "updated": 0, "errors": ["Row 2: name is required"]}
+
+    second = client.post("/api/clients/import", json={"data": [
+        {"name": "  ACME ", "email": "legal@acme.com"},
+        {"name": "acme", "phone": "555-0100", "email": "  "},
+    ]}, headers=auth)
+    assert second.json() == {"created": 0, "updated": 2, "errors": []}
+
+    acme = db.scalars(select(Client)).one()
+    assert (acme.name, acme.email, acme.phone) == ("Acme", "legal@acme.com", "555-0100")
+
+
+def test_rows_only_match_records_that_existed_before_the_import(client, auth, db):
+    response = client.post("/api/clients/import", json={"data": [{"name": "Gamma"}, {"name": "gamma"}]}, headers=auth)
+    assert response.json()["created"] == 2
+    assert len(db.scalars(select(Client)).all()) == 2
+
+
+def test_import_is_scoped_to_the_caller(client, auth, db):
+    other = create_user(db, "other@example.com")
+    db.add(Client(user_id=other.id, name="Acme"))
+    db.commit()
+
+    response = client.post("/api/clients/import", json={"data": [{"name": "Acme"}]}, headers=auth)
+    assert response.json()["created"] == 1
+
+
+def test_document_import_bumps_the_version_once_per_matching_row(client, auth, db):
+    client.post("/api/documents/import", json={"data": [{"title": "Lease", "content": "v1"}]}, headers=auth)
+    response = client.post("/api/documents/import", json={"data": [
+        {"title": "lease", "content": "v2"}, {"title": "LEASE", "doc_type": "memo"},
+    ]}, headers=auth)
+    assert response.json()["updated"] == 2
+
+    document = db.scalars(select(Document)).one()
+    assert (document.version, document.content, document.doc_type.value) == (3, "v2", "memo")
+
+
+def test_time_entry_import_updates_date_and_billable_flag(client, auth, db):
+    response = client.post("/api/billing/import", json={"data": [
+        {"description": "Call", "hours": 2, "date": "2026-10-01T10:00:00"},
+        {"description": "Bad date", "date": "yesterday"},
+    ]}, headers=auth)
+    assert response.json()["created"] == 1
+    assert response.json()["errors"][0].startswith("Row 2: ")
+
+    client.post("/api/billing/import", json={"data": [
+        {"description": "call", "hours": "1.5", "date": "2026-10-05T10:00:00", "is_billable": False},
+    ]}, headers=auth)
+    entry = db.scalars(select(TimeEntry)).one()
+    assert (float(entry.hours), entry.date.day, entry.is_billable) == (1.5, 5, False)
+
+
+def test_import_without_rows_is_rejected(client, auth):
+    assert client.post("/api/cases/import", json={"data": []}, headers=auth).status_code == 400
@@ -0,0 +1,19 @@
+from app.testing import populate
+
+
+def test_following_the_cursor_header_visits_every_row_once(client, auth, db, user):
+    populate(db, user.id, clients=7)
+    seen, cursor = [], None
+    while True:
+        query = "?limit=3" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(f"/api/clients{query}", headers=auth)
+        assert isinstance(response.json(), list)  # The body stays a plain list
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 7
+
+
+def test_a_malformed_cursor_is_rejected(client, auth):
+    assert client.get("/api/clients?cursor=not-a-cursor", headers=auth).status_code == 400
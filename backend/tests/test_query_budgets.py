@@ -0,0 +1,73 @@
+"""Every route with a @query_budget must stay within it on the strict test profile.
+
+Requests use a token without profile claims and start with an empty principal
+cache, so the principal lookup a budget has to allow for is always counted.
+"""
+import json
+
+import pytest
+from jose import jwt
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.main import app
+from app.models.billing import Invoice
+from app.models.case import Case
+from app.models.client import Client
+from app.models.document import Document, DocumentTemplate
+from app.models.research import ResearchHistory
+from app.services import auth as auth_service
+from app.testing import populate
+
+settings = get_settings()
+
+# Extra query strings: required parameters, and branches with a different query shape
+QUERIES = {
+    "/api/documents/search": ["?q=breach"],
+    "/api/clients": ["", "?search=client", "?search=client&rank=true"],
+    "/api/cases": ["", "?search=matter"],
+    "/api/documents": ["", "?include_content=true"],
+    "/api/documents/templates": ["", "?include_content=true"],
+}
+
+STORED_RESULT = json.dumps({
+    "summary": "", "key_points": [], "relevant_cases": [], "relevant_statutes": [], "recommendations": [],
+})
+
+BUDGETED_ROUTES = sorted(
+    route.path for route in app.routes
+    if "GET" in getattr(route, "methods", ()) and isinstance(getattr(route.endpoint, "query_budget", None), int)
+)
+
+
+@pytest.fixture
+def path_ids(db, user) -> dict[str, str]:
+    populate(db, user.id, clients=3)
+    template = DocumentTemplate(name="Engagement letter", content="Dear {client}")
+    research = ResearchHistory(user_id=user.id, query="adverse possession", request_hash="0" * 64, response=STORED_RESULT)
+    db.add_all([template, research])
+    db.commit()
+    return {
+        "client_id": db.scalars(select(Client.id)).first(),
+        "case_id": db.scalars(select(Case.id)).first(),
+        "doc_id": db.scalars(select(Document.id)).first(),
+        "invoice_id": db.scalars(select(Invoice.id)).first(),
+        "template_id": template.id,
+        "entry_id": research.id,
+    }
+
+
+def test_routes_are_discovered():
+    assert "/api/dashboard/stats" in BUDGETED_ROUTES
+    assert "/api/documents/analysis/batch" in BUDGETED_ROUTES
+
+
+@pytest.mark.parametrize("path", BUDGETED_ROUTES)
+def test_route_stays_within_its_budget(client, user, path_ids, path):
+    token = jwt.encode({"sub": user.id}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    url = path.format(**path_ids)
+    for query in QUERIES.get(path, [""]):
+        auth_service._principal_cache.clear()
+        # Strict budgets raise QueryBudgetExceeded out of the TestClient on a violation
+        response = client.get(url + query, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, f"{url}{query}: {response.text[:200]}"
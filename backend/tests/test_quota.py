@@ -0,0 +1,31 @@
+import pytest
+
+from app.models.usage import AIUsage
+from app.services import quota
+
+
+@pytest.fixture
+def used_up(monkeypatch, user):
+    monkeypatch.setattr(quota.settings, "AI_DAILY_REQUEST_QUOTA", 1)
+    monkeypatch.setitem(quota._totals, (user.id, quota._period()), [0, 1])
+
+
+def test_an_exhausted_quota_is_a_429_not_an_empty_result(client, auth, used_up):
+    for path in ("/api/ai/complete", "/api/ai/suggest"):
+        response = client.post(path, json={"text": "the parties agree"}, headers=auth)
+        assert response.status_code == 429
+
+
+def test_an_exhausted_quota_is_an_error_frame_on_the_socket(client, auth, used_up):
+    with client.websocket_connect("/api/ai/ws", headers={"Cookie": f"auth_token={auth['Authorization'][7:]}"}) as socket:
+        socket.send_json({"id": "1", "type": "suggest", "text": "the parties agree"})
+        assert socket.receive_json() == {"id": "1", "type": "error", "detail": "Daily AI request quota exceeded"}
+
+
+def test_a_flush_picks_up_other_workers_usage(db, user, monkeypatch):
+    monkeypatch.setattr(quota, "_totals", {})
+    db.add(AIUsage(user_id=user.id, period=quota._period(), tokens=500, requests=3))
+    db.commit()
+
+    quota.flush_usage()  # Nothing pending here
+    assert quota.get_usage(user.id)["requests"] == 3
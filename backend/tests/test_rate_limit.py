@@ -0,0 +1,27 @@
+from sqlalchemy import func, select
+
+from app.models.auth_attempt import AuthAttempt
+from app.services.rate_limit import DatabaseStore
+
+
+def attempts(db, key: str) -> int:
+    return db.scalar(select(func.count()).select_from(AuthAttempt).where(AuthAttempt.key == key))
+
+
+def test_database_store_blocks_once_the_window_is_full(api, db):
+    # Run on the TestClient's event loop: the async engine's connections belong to it
+    store = DatabaseStore()
+    keys = [("email:someone@example.com", 2)]
+    results = [api.portal.call(store.hit, keys, 60) for _ in range(3)]
+    assert results[:2] == [None, None] and 0 < results[2] <= 60
+    # Rejected attempts are not recorded
+    assert attempts(db, "email:someone@example.com") == 2
+
+
+def test_database_store_records_nothing_when_any_key_is_over(api, db):
+    store = DatabaseStore()
+    assert api.portal.call(store.hit, [("ip:203.0.113.9", 1)], 60) is None
+
+    wait = api.portal.call(store.hit, [("ip:203.0.113.9", 1), ("email:new@example.com", 5)], 60)
+    assert wait is not None
+    assert attempts(db, "email:new@example.com") == 0
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models.billing import Invoice
+from app.models.case import Case
+from app.models.client import Client
+from app.models.document import Document
+from app.services import soft_delete
+from app.services.dashboard_stats import recount_user_stats
+from app.testing import populate
+
+settings = get_settings()
+
+
+@pytest.fixture
+def soft_mode(monkeypatch):
+    monkeypatch.setattr(settings, "SOFT_DELETE_RETENTION_DAYS", 30)
+    event.listen(Session, "do_orm_execute", soft_delete._hide_deleted)
+    yield
+    event.remove(Session, "do_orm_execute", soft_delete._hide_deleted)
+
+
+def live_clients(db) -> int:
+    return db.scalar(select(func.count()).select_from(Client))
+
+
+def stored(db, model, *criteria) -> int:
+    return db.scalar(select(func.count()).select_from(model).where(*criteria).execution_options(include_deleted=True))
+
+
+def age_marked_rows(db) -> None:
+    for model in (Client, Case, Invoice):
+        db.execute(
+            update(model).where(model.deleted_at.isnot(None)).values(deleted_at=datetime.utcnow() - timedelta(days=31))
+        )
+    db.commit()
+
+
+def test_hard_delete_mode_installs_no_filter():
+    assert not event.contains(Session, "do_orm_execute", soft_delete._hide_deleted)
+
+
+def test_soft_deleted_rows_are_hidden_then_purged(soft_mode, client, auth, db, user):
+    populate(db, user.id, clients=2)
+    doomed = db.scalars(select(Client.id).order_by(Client.id)).first()
+
+    assert client.delete(f"/api/clients/{doomed}", headers=auth).status_code == 204
+    assert client.get(f"/api/clients/{doomed}", headers=auth).status_code == 404
+    assert client.delete(f"/api/clients/{doomed}", headers=auth).status_code == 404
+    db.expire_all()
+    assert live_clients(db) == 1
+    assert not recount_user_stats(db, user.id)
+    db.rollback()
+
+    assert soft_delete.purge_deleted() == 0  # Still within the retention period
+    age_marked_rows(db)
+    assert soft_delete.purge_deleted() == 5  # The client, its two invoices and two cases
+    assert stored(db, Client) == 1
+    assert not recount_user_stats(db, user.id)
+
+
+def test_a_soft_deleted_clients_cases_and_documents_stay_until_the_purge(soft_mode, client, auth, db, user):
+    populate(db, user.id, clients=2)
+    doomed = db.scalars(select(Client.id).order_by(Client.id)).first()
+    cases = select(Case.id).where(Case.client_id == doomed)
+    documents_before = stored(db, Document, Document.case_id.in_(cases))
+    case_id = db.scalars(cases).first()
+
+    assert client.delete(f"/api/clients/{doomed}", headers=auth).status_code == 204
+    db.expire_all()
+    assert stored(db, Case, Case.client_id == doomed) == 2
+    assert stored(db, Document, Document.case_id.in_(cases)) == documents_before > 0
+    assert client.get(f"/api/cases/{case_id}", headers=auth).status_code == 404
+
+    age_marked_rows(db)
+    soft_delete.purge_deleted()
+    assert stored(db, Case, Case.client_id == doomed) == 0
+    assert stored(db, Document, Document.case_id == case_id) == 0
+    assert not recount_user_stats(db, user.id)
+
+def test_rows_marked_while_soft_mode_was_on_are_purged_once_it_is_off(db, user):
+    populate(db, user.id, clients=2)
+    db.execute(update(Client).values(deleted_at=datetime.utcnow()))
+    db.commit()
+
+    assert soft_delete.purge_deleted() == 2
+    assert live_clients(db) == 0
@@ -573,10 +573,10 @@ export default function DocumentsPage() {
                       {getCaseName(doc.case_id)}
                     </p>
                   )}
-                  {doc.ai_summary && (
+                  {doc.ai_summary_excerpt && (
                     <p className="text-sm text-slate-500 mt-2 leading-relaxed line-clamp-2">
                       <Brain className="h-3.5 w-3.5 inline mr-1 text-slate-500" />
-                      {doc.ai_summary}
+                      {doc.ai_summary_excerpt}
                     </p>
                   )}
                   <p className="text-xs text-slate-400 mt-2">
@@ -97,11 +97,13 @@ export default function ResearchPage() {
   async function summarizeDocument(docId: string) {
     setSelectedDocId(docId);
     const doc = documents.find(d => d.id === docId);
-    if (!doc?.content) { toast.error("Document has no content"); return; }
+    if (!doc?.size) { toast.error("Document has no content"); return; }
     setSummarizing(true);
     setDocSummary("");
     try {
-      const res = await api.summarizeText(doc.content);
+      // The list only carries an excerpt; fetch the full body
+      const full = await api.getDocument(docId);
+      const res = await api.summarizeText(full.content);
       const summaryText = typeof res === "string" ? res : res.summary;
       setDocSummary(summaryText);
       setForm(prev => ({
@@ -237,7 +239,7 @@ export default function ResearchPage() {
               <select value={selectedDocId} onChange={(e) => summarizeDocument(e.target.value)}
                 className="field mb-2">
                 <option value="">Choose a document...</option>
-                {documents.filter(d => d.content).map(d => (
+                {documents.filter(d => d.size).map(d => (
                   <option key={d.id} value={d.id}>{d.title}</option>
                 ))}
               </select>
@@ -9,10 +9,7 @@ class ApiClient {
 
   clearToken() {}
 
-  private async request<T>(
-    endpoint: string,
-    options: RequestInit = {}
-  ): Promise<T> {
+  private async send(endpoint: string, options: RequestInit = {}): Promise<Response> {
     const headers: Record<string, string> = {
       "Content-Type": "application/json",
       ...(options.headers as Record<string, string>),
@@ -50,10 +47,32 @@ class ApiClient {
       throw new Error(error.detail || "Request failed");
     }
 
+    return response;
+  }
+
+  private async request<T>(
+    endpoint: string,
+    options: RequestInit = {}
+  ): Promise<T> {
+    const response = await this.send(endpoint, options);
     if (response.status === 204) return undefined as T;
     return response.json();
   }
 
+  // Follows the X-Next-Cursor header until the list is exhausted
+  private async requestAllPages<T>(endpoint: string): Promise<T[]> {
+    const items: T[] = [];
+    let cursor: string | null = null;
+    do {
+      const separator = endpoint.includes("?") ? "&" : "?";
+      const url: string = cursor ? `${endpoint}${separator}cursor=${encodeURIComponent(cursor)}` : endpoint;
+      const response = await this.send(url);
+      items.push(...(await response.json()));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return items;
+  }
+
   // Auth
   async register(email: string, name: string, password: string) {
     return this.request<{ access_token: string; user: any }>("/auth/register", {
@@ -274,7 +293,7 @@ class ApiClient {
   // Calendar
   async getEvents(params?: { start_date?: string; end_date?: string; event_type?: string }) {
     const query = new URLSearchParams(params as any).toString();
-    return this.request<any[]>(`/calendar/events?${query}`);
+    return this.requestAllPages<any>(`/calendar/events?${query}`);
   }
 
   async createEvent(data: any) {
@@ -297,7 +316,7 @@ class ApiClient {
 
   async getDeadlines(params?: { case_id?: string; is_completed?: string; priority?: string }) {
     const query = new URLSearchParams(params as any).toString();
-    return this.request<any[]>(`/calendar/deadlines?${query}`);
+    return this.requestAllPages<any>(`/calendar/deadlines?${query}`);
   }
 
   async createDeadline(data: any) {
@@ -326,7 +345,7 @@ class ApiClient {
     client_id?: string;
   }) {
     const query = new URLSearchParams(params as any).toString();
-    return this.request<any[]>(`/calendar/appointments?${query}`);
+    return this.requestAllPages<any>(`/calendar/appointments?${query}`);
   }
 
   async createAppointment(data: any) {
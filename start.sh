@@ -230,7 +230,7 @@ fi
 
 if [ -f "alembic.ini" ]; then
   log "Running database migrations..."
-  alembic upgrade head 2>/dev/null || warn "Alembic migrations skipped"
+  alembic upgrade head || { err "Alembic migrations failed"; exit 1; }
 fi
 
 if [[ "$SEED_DEMO_DATA" == "true" ]]; then